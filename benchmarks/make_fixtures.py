@@ -0,0 +1,153 @@
+"""
+Regenerate the checked-in benchmark fixtures under benchmarks/fixtures/.
+
+    python -m benchmarks.make_fixtures
+
+The fixtures are deterministic (seeded) stand-ins for recorded upstream
+responses, shaped like the real thing:
+
+- ofgem_{small,medium,large}.html(.gz): the "Energy price cap explained"
+  page layout (head scripts/styles, navigation, <main> with the cap
+  figures, footer) padded with body copy to ~30 KB / ~300 KB / ~3 MB.
+- octopus_agile_{1day,1month,1year}.json(.gz): one Agile standard-unit-rates
+  API page (newest first, as the API returns it) for region C.
+
+Files over 256 KB are stored gzipped; load_fixture() handles both.
+Only rerun this when the fixture shape needs to change: regenerating
+moves the baselines.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+GZIP_OVER_BYTES = 256 * 1024
+
+_WORDS = (
+    "energy price cap ofgem supplier household tariff direct debit standing charge unit rate "
+    "kilowatt hour electricity gas meter bill consumption default customer quarter review "
+    "wholesale network costs policy support vulnerable payment prepayment region average"
+).split()
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Energy price cap explained | Ofgem</title>
+<style>
+body { font-family: Arial, sans-serif; } .nav a { color: #005ea5; } /* {{ not a template }} */
+.cap-table td { padding: 4px 8px; } .hidden { display: none; }
+</style>
+<script>
+window.dataLayer = window.dataLayer || [];
+function gtag(){ dataLayer.push(arguments); }
+var snippet = "<p>Electricity 99.99 pence per kWh</p>";  // must not be parsed as page text
+</script>
+</head>
+<body>
+<nav class="nav"><ul>
+<li><a href="/">Home</a></li><li><a href="/energy-advice">Energy advice</a></li>
+<li><a href="/energy-price-cap">Energy price cap</a></li><li><a href="/news">News</a></li>
+</ul></nav>
+"""
+
+_MAIN = """<main id="main-content">
+<h1>Energy price cap explained</h1>
+<p>Between 1 October and 31 December 2025, the energy price cap is set at
+<strong>£1,755</strong> per year for a typical household who uses electricity and gas
+and pays by Direct Debit.</p>
+<h2>Energy price cap rates</h2>
+<table class="cap-table">
+<tr><th>Fuel</th><th>Unit rate</th><th>Standing charge</th></tr>
+<tr><td>Electricity</td><td>26.35 pence per kWh</td><td>53.68 pence daily standing charge</td></tr>
+<tr><td>Gas</td><td>6.29 pence per kWh</td><td>34.03 pence daily standing charge</td></tr>
+</table>
+"""
+
+_TAIL = """</main>
+<footer><p>&copy; Ofgem</p>
+<script>document.querySelectorAll('a').forEach(function(a){ a.rel = 'noopener'; });</script>
+</footer>
+</body>
+</html>
+"""
+
+
+def _paragraph(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(40, 90))]
+    words[0] = words[0].capitalize()
+    extra = ""
+    if rng.random() < 0.2:
+        extra = f'<aside class="hidden"><script>var x{rng.randint(0, 9999)} = "{rng.choice(_WORDS)}";</script></aside>'
+    return f"<p>{' '.join(words)}.</p>{extra}\n"
+
+
+def ofgem_page(target_bytes: int, seed: int) -> str:
+    rng = random.Random(seed)
+    parts = [_HEAD, _MAIN]
+    size = sum(len(p) for p in parts) + len(_TAIL)
+    while size < target_bytes:
+        p = _paragraph(rng)
+        parts.append(p)
+        size += len(p)
+    parts.append(_TAIL)
+    return "".join(parts)
+
+
+def agile_page(days: int, seed: int, region: str = "C") -> dict:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    results = []
+    for i in range(days * 48):
+        t = start + timedelta(minutes=30 * i)
+        hour = t.hour + t.minute / 60
+        # overnight trough, 16:00–19:00 peak, some noise and the odd negative slot
+        price = 18 + 6 * math.sin((hour - 9) / 24 * 2 * math.pi) + rng.gauss(0, 2.5)
+        if 16 <= hour < 19:
+            price += 14
+        if rng.random() < 0.01:
+            price = -rng.uniform(0.5, 4)
+        inc = round(price, 2)
+        results.append({
+            "value_exc_vat": round(inc / 1.05, 4),
+            "value_inc_vat": inc,
+            "valid_from": t.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "valid_to": (t + timedelta(minutes=30)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "payment_method": None,
+        })
+    results.reverse()  # API returns newest first
+    return {"count": len(results), "next": None, "previous": None, "results": results}
+
+
+def _write(name: str, data: str) -> Path:
+    raw = data.encode("utf-8")
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in FIXTURES_DIR.glob(name + "*"):
+        stale.unlink()
+    if len(raw) > GZIP_OVER_BYTES:
+        path = FIXTURES_DIR / (name + ".gz")
+        path.write_bytes(gzip.compress(raw, mtime=0))
+    else:
+        path = FIXTURES_DIR / name
+        path.write_bytes(raw)
+    print(f"[ok] wrote {path} ({len(raw) // 1024} KB raw)")
+    return path
+
+
+def main() -> None:
+    _write("ofgem_small.html", ofgem_page(30_000, seed=1))
+    _write("ofgem_medium.html", ofgem_page(300_000, seed=2))
+    _write("ofgem_large.html", ofgem_page(3_000_000, seed=3))
+    _write("octopus_agile_1day.json", json.dumps(agile_page(1, seed=11)))
+    _write("octopus_agile_1month.json", json.dumps(agile_page(31, seed=12)))
+    _write("octopus_agile_1year.json", json.dumps(agile_page(365, seed=13)))
+
+
+if __name__ == "__main__":
+    main()
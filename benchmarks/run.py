@@ -0,0 +1,356 @@
+"""
+Offline benchmarks for the parse / summarise / render hot paths.
+
+    python -m benchmarks.run                       # run everything, compare with baseline
+    python -m benchmarks.run -k ofgem              # only names containing "ofgem"
+    python -m benchmarks.run --save-baseline       # record benchmarks/baseline.json
+    python -m benchmarks.run --threshold 0.15      # fail on >15% slowdown
+
+Every benchmark runs against the checked-in fixtures in benchmarks/fixtures/
+(see make_fixtures.py), so no network is needed. For each one we report:
+
+- ops/sec: best of several timed repeats, each long enough to be stable;
+- peak memory: tracemalloc peak for a single call.
+
+A benchmark regresses when its ops/sec drops by more than --threshold or
+its peak memory grows by more than --mem-threshold against
+benchmarks/baseline.json; any regression, or a missing baseline, makes the
+run exit with status 1. Baselines are machine-specific: the checked-in one
+is a reference point, save your own on the machine you compare on.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import gzip
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MEM_THRESHOLD = 0.10
+
+
+def load_fixture(name: str) -> str:
+    """Fixture text by name; transparently reads the .gz variant."""
+    path = FIXTURES_DIR / name
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    with gzip.open(FIXTURES_DIR / (name + ".gz"), "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_agile_fixture(span: str) -> List[Dict]:
+    return json.loads(load_fixture(f"octopus_agile_{span}.json"))["results"]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], object]]  # returns the zero-arg function to time
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def bench(name: str):
+    """Register a setup function; it runs once and returns the callable to time."""
+
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS.append(Benchmark(name, setup))
+        return setup
+
+    return register
+
+
+# --- benchmark definitions ---
+
+OFGEM_SIZES = ("small", "medium", "large")
+AGILE_SPANS = ("1day", "1month", "1year")
+
+
+def _register_ofgem(size: str) -> None:
+    from scripts.fetch_ofgem import _CapStreamExtractor, _parse_rates, _strip_tags, _summary_from_html
+
+    @bench(f"ofgem.strip_tags[{size}]")
+    def _():
+        html = load_fixture(f"ofgem_{size}.html")
+        return lambda: _strip_tags(html)
+
+    @bench(f"ofgem.parse_rates[{size}]")
+    def _():
+        text = _strip_tags(load_fixture(f"ofgem_{size}.html"))
+        return lambda: _parse_rates(text)
+
+    @bench(f"ofgem.summary_from_html[{size}]")
+    def _():
+        html = load_fixture(f"ofgem_{size}.html")
+        return lambda: _summary_from_html(html)
+
+    def stream(html: str, chunk_size: int = 8192):
+        parser = _CapStreamExtractor()
+        for i in range(0, len(html), chunk_size):
+            parser.feed(html[i:i + chunk_size])
+        return parser.close()
+
+    @bench(f"ofgem.stream_extract[{size}]")
+    def _():
+        html = load_fixture(f"ofgem_{size}.html")
+        # the streaming parser must give the buffered parser's answer, also
+        # when a later rate pair sits after </main> (the last pair wins)
+        footer_pair = "<p>Electricity 30.01 pence per kWh 60.02 pence daily standing charge</p></footer>"
+        for variant in (html, html.replace("</footer>", footer_pair, 1)):
+            for chunk_size in (8192, 997):
+                if stream(variant, chunk_size) != _summary_from_html(variant):
+                    raise AssertionError(f"ofgem_{size}: streaming and buffered parsers disagree")
+        return lambda: stream(html)
+
+
+def _register_agile(span: str) -> None:
+    from scripts.fetch_octopus import summarize_agile
+
+    @bench(f"agile.summarize[{span}]")
+    def _():
+        rates = sorted(load_agile_fixture(span), key=lambda r: r["valid_from"])
+        return lambda: summarize_agile(rates)
+
+
+for _size in OFGEM_SIZES:
+    _register_ofgem(_size)
+for _span in AGILE_SPANS:
+    _register_agile(_span)
+
+
+@bench("agile.summarize_regions[1day x14]")
+def _():
+    from scripts.fetch_octopus import GSP_REGIONS, summarize_agile_regions
+
+    rates = sorted(load_agile_fixture("1day"), key=lambda r: r["valid_from"])
+    by_region = {region: rates for region in GSP_REGIONS}
+    return lambda: summarize_agile_regions(by_region)
+
+
+@bench("agile.window_extremes[1year]")
+def _():
+    from datetime import date
+
+    from scripts.agile_analytics import day_matrix, window_extremes
+
+    matrix = day_matrix(load_agile_fixture("1year"), date(2025, 1, 1), 365)
+    return lambda: window_extremes(matrix, (2, 4, 6, 8))
+
+
+@bench("bill.compute_typical_bill")
+def _():
+    from scripts.build_report import compute_typical_bill
+    from scripts.fetch_ofgem import _summary_from_html
+
+    ofgem = _summary_from_html(load_fixture("ofgem_small.html"))
+    return lambda: compute_typical_bill(ofgem)
+
+
+@bench("bill.grid[200x200 x history]")
+def _():
+    import numpy as np
+
+    from scripts.bill_engine import bill_grid
+    from scripts.ofgem_history import OFGEM_CAP_HISTORY
+
+    elec, gas = np.linspace(0, 8000, 200), np.linspace(0, 30000, 200)
+    return lambda: bill_grid(elec, gas, OFGEM_CAP_HISTORY)
+
+
+@bench("caps.values_for_dates[10y daily]")
+def _():
+    import numpy as np
+
+    from scripts.ofgem_history import CapHistory, OFGEM_CAP_HISTORY
+
+    history = CapHistory(OFGEM_CAP_HISTORY)
+    days = np.datetime64("2020-01-01") + np.arange(3653)
+    return lambda: history.values_for_dates("electricity_unit_avg", days)
+
+
+@bench("tariff.day_costs[100 profiles x 365d x 5]")
+def _():
+    from datetime import date
+
+    import numpy as np
+
+    from scripts.agile_analytics import day_matrix
+    from scripts.tariff_compare import as_load, day_costs, day_slot_mask
+
+    first, n_days = date(2025, 1, 1), 365
+    agile = day_matrix(load_agile_fixture("1year"), first, n_days)
+    rates = np.stack([agile, agile * 0.8, agile + 5.0, np.full_like(agile, 24.5), agile * 1.1])
+    rng = np.random.default_rng(0)
+    loads = np.stack([as_load(rng.random(48)) for _ in range(100)])
+    mask = day_slot_mask(first, n_days)
+    return lambda: day_costs(loads, rates, mask)
+
+
+@bench("report.render")
+def _():
+    from scripts.build_report import (
+        REPORT_TEMPLATE,
+        build_cap_history_with_current,
+        compute_cap_changes,
+        compute_typical_bill,
+        report_context,
+    )
+    from scripts.fetch_octopus import GSP_REGIONS, summarize_agile_regions
+    from scripts.fetch_ofgem import _summary_from_html
+    from scripts.templating import load_template
+
+    ofgem = _summary_from_html(load_fixture("ofgem_small.html"))
+    rates = sorted(load_agile_fixture("1day"), key=lambda r: r["valid_from"])
+    agile = summarize_agile_regions({region: rates for region in GSP_REGIONS})
+    cap_change = compute_cap_changes(build_cap_history_with_current(ofgem))
+    context = report_context(
+        "2025-01-01", "2025-01-01 06:00 UTC", ofgem, agile, compute_typical_bill(ofgem), cap_change
+    )
+    template = load_template(REPORT_TEMPLATE)
+    return lambda: template.render(context)
+
+
+# --- measurement ---
+
+
+def measure(fn: Callable[[], object], min_time: float, repeats: int) -> Dict:
+    """Best-of-`repeats` ops/sec with auto-calibrated loop counts, plus tracemalloc peak."""
+    fn()  # warm caches / lazy imports
+
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time / repeats or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / repeats / elapsed) + 1))
+
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(1.0 / best, 3) if best > 0 else float("inf"),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def _load_baseline(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pct(new: float, old: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run offline benchmarks against the checked-in fixtures.")
+    parser.add_argument("-k", "--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds of timing per benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed ops/sec drop before failing (fraction, default 0.25)")
+    parser.add_argument("--mem-threshold", type=float, default=DEFAULT_MEM_THRESHOLD,
+                        help="allowed peak-memory growth before failing (fraction, default 0.10)")
+    parser.add_argument("--json", type=Path, default=None, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS if args.filter in b.name]
+    if not selected:
+        print(f"[skip] no benchmarks match {args.filter!r}")
+        return 0
+
+    baseline = None if args.save_baseline else _load_baseline(args.baseline)
+    base_results = (baseline or {}).get("results", {})
+
+    results: Dict[str, Dict] = {}
+    regressions: List[str] = []
+    width = max(len(b.name) for b in selected)
+    print(f"{'benchmark':<{width}} {'ops/sec':>12} {'ms/op':>10} {'peak KB':>10}   vs baseline")
+    for b in selected:
+        r = measure(b.setup(), args.min_time, args.repeats)
+        results[b.name] = r
+
+        note = ""
+        base = base_results.get(b.name)
+        if base:
+            speed = _pct(r["ops_per_sec"], base["ops_per_sec"])
+            mem = _pct(r["peak_kb"], base["peak_kb"])
+            note = f"{speed:+6.1f}% speed  {mem:+6.1f}% mem"
+            if r["ops_per_sec"] < base["ops_per_sec"] * (1 - args.threshold):
+                regressions.append(f"{b.name}: {speed:+.1f}% ops/sec")
+                note += "  << SLOWER"
+            if r["peak_kb"] > base["peak_kb"] * (1 + args.mem_threshold) and r["peak_kb"] - base["peak_kb"] > 4:
+                regressions.append(f"{b.name}: {mem:+.1f}% peak memory")
+                note += "  << MORE MEMORY"
+        print(f"{b.name:<{width}} {r['ops_per_sec']:>12,.1f} {1000 / r['ops_per_sec']:>10.3f} "
+              f"{r['peak_kb']:>10,.1f}   {note}")
+
+    payload = {
+        "python": sys.version.split()[0],
+        "machine": f"{platform.system()} {platform.machine()}",
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        if args.baseline.exists():
+            # keep entries for benchmarks that were filtered out of this run
+            previous = _load_baseline(args.baseline) or {}
+            payload["results"] = {**previous.get("results", {}), **results}
+        args.baseline.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"[ok] wrote baseline {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\n[fail] no baseline at {args.baseline}; nothing was compared. "
+              f"Run with --save-baseline to record one.")
+        return 1
+    if regressions:
+        print(f"\n[fail] {len(regressions)} regression(s) beyond thresholds:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\n[ok] no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,59 @@
-from scripts.build_report import build_daily_report
+import argparse
+import cProfile
+import os
+import pstats
+
+from scripts.artifacts import output_path, report_changes, run_lock
+from scripts.build_report import DATA_DIR, build_daily_report
+from scripts.http_cassette import HTTP_MODE_ENV, MODES
+from scripts.payloads import PRETTY_ENV
+from scripts.tracing import RUN_METRICS_PATH, start_trace, write_run_metrics
+
+PROFILE_PATH = DATA_DIR / "run_profile.pstats"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build today's report, latest.json and history.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"run under cProfile and save stats to {PROFILE_PATH.relative_to(DATA_DIR.parent)}",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="also write indented copies of the dashboard JSON to data/pretty/",
+    )
+    parser.add_argument(
+        "--http",
+        choices=MODES,
+        help="live network (default), record responses to cassettes, or replay them offline",
+    )
+    args = parser.parse_args()
+    if args.pretty:
+        os.environ[PRETTY_ENV] = "1"
+    if args.http:
+        os.environ[HTTP_MODE_ENV] = args.http
+
+    # one run at a time: overlapping runs would interleave writes to data/ and reports/
+    with run_lock():
+        root = start_trace("daily")
+        try:
+            if args.profile:
+                profiler = cProfile.Profile()
+                profiler.runcall(build_daily_report)
+                profile_path = output_path(PROFILE_PATH)
+                profile_path.parent.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(profile_path))
+                print(f"[ok] wrote {profile_path}")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+            else:
+                build_daily_report()
+        finally:
+            # stage timings for the dashboard (data/run_metrics.json)
+            write_run_metrics(root, RUN_METRICS_PATH)
+    report_changes()
+
 
 if __name__ == "__main__":
-    build_daily_report()
+    main()
@@ -0,0 +1,230 @@
+"""
+Vectorised Agile analytics on NumPy arrays.
+
+Rates are laid out as arrays whose last axis is the half-hour slot of a
+UK-local day (50 columns, so the long clock-change day fits; unused slots
+are NaN). Any leading axes are batch axes, e.g. (days, slots) for one
+region or (regions, days, slots) for everything in the store, so one
+call covers years of data.
+
+- window_extremes(): cheapest / most expensive contiguous N-slot windows
+  for several N, in O(slots) per row via prefix sums. Windows that touch
+  a missing slot are ignored.
+- price_stats(): mean, std, percentiles, min/max and negative-slot counts.
+- day_matrix() / store_matrix(): build those arrays from API-shaped rows
+  or straight from the AgileStore (any stored product, Agile by default).
+- day_window_summary(): the per-day summary used by summarize_agile().
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import zoneinfo
+
+from .agile_store import AGILE_PRODUCT
+
+UK_TZ = "Europe/London"
+SLOT_SECONDS = 30 * 60
+SLOTS_PER_DAY = 50
+
+# Windows shown in reports: 1h, 2h, 3h, 4h.
+DEFAULT_WINDOW_HOURS = (1, 2, 3, 4)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _epochs(rates: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """API-shaped rows → (slot start epoch seconds, value_inc_vat), sorted by time."""
+    rates = list(rates)
+    starts = np.fromiter(
+        (datetime.fromisoformat(r["valid_from"].replace("Z", "+00:00")).timestamp() for r in rates),
+        dtype=np.int64,
+        count=len(rates),
+    )
+    prices = np.fromiter((float(r["value_inc_vat"]) for r in rates), dtype=np.float64, count=len(rates))
+    order = np.argsort(starts, kind="stable")
+    return starts[order], prices[order]
+
+
+def uk_midnights(first: date, n_days: int) -> np.ndarray:
+    """Epoch seconds of UK-local midnight for first .. first + n_days (n_days + 1 values)."""
+    tz = zoneinfo.ZoneInfo(UK_TZ)
+    out = np.empty(n_days + 1, dtype=np.int64)
+    for i in range(n_days + 1):
+        d = first + timedelta(days=i)
+        out[i] = int(datetime(d.year, d.month, d.day, tzinfo=tz).timestamp())
+    return out
+
+
+def grid_from_arrays(starts: np.ndarray, prices: np.ndarray, first: date, n_days: int) -> np.ndarray:
+    """Scatter (start, price) pairs into a (n_days, SLOTS_PER_DAY) NaN-padded matrix."""
+    midnights = uk_midnights(first, n_days)
+    matrix = np.full((n_days, SLOTS_PER_DAY), np.nan)
+
+    day = np.searchsorted(midnights, starts, side="right") - 1
+    ok = (day >= 0) & (day < n_days)
+    day, s, p = day[ok], starts[ok], prices[ok]
+    slot = (s - midnights[day]) // SLOT_SECONDS
+    ok = (slot >= 0) & (slot < SLOTS_PER_DAY)
+    matrix[day[ok], slot[ok]] = p[ok]
+    return matrix
+
+
+def day_matrix(rates: Iterable[Dict], first: date, n_days: int = 1) -> np.ndarray:
+    """API-shaped rows → (n_days, SLOTS_PER_DAY) matrix starting at UK-local `first`."""
+    starts, prices = _epochs(rates)
+    return grid_from_arrays(starts, prices, first, n_days)
+
+
+def store_matrix(
+    store,
+    regions: Sequence[str],
+    first: date,
+    n_days: int,
+    product: str = AGILE_PRODUCT,
+) -> np.ndarray:
+    """(regions, n_days, SLOTS_PER_DAY) matrix read straight from an AgileStore."""
+    midnights = uk_midnights(first, n_days)
+    start = datetime.fromtimestamp(int(midnights[0]), tz=timezone.utc)
+    end = datetime.fromtimestamp(int(midnights[-1]), tz=timezone.utc)
+
+    out = np.full((len(regions), n_days, SLOTS_PER_DAY), np.nan)
+    for i, region in enumerate(regions):
+        rows = store.query_range_raw(region, start, end, product=product)
+        if not rows:
+            continue
+        arr = np.asarray(rows, dtype=np.float64)
+        out[i] = grid_from_arrays(arr[:, 0].astype(np.int64), arr[:, 1], first, n_days)
+    return out
+
+
+def window_extremes(prices: np.ndarray, widths: Sequence[int]) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Cheapest and most expensive contiguous windows of each width (in slots)
+    along the last axis.
+
+    Returns {width: {"min_avg", "min_start", "max_avg", "max_start"}}, each an
+    array of the batch shape. Rows with no complete window get NaN / -1.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    valid = np.isfinite(prices)
+    zero_filled = np.where(valid, prices, 0.0)
+
+    pad = [(0, 0)] * (prices.ndim - 1) + [(1, 0)]
+    csum = np.pad(np.cumsum(zero_filled, axis=-1), pad)
+    ccount = np.pad(np.cumsum(valid, axis=-1), pad)
+
+    out: Dict[int, Dict[str, np.ndarray]] = {}
+    n = prices.shape[-1]
+    for w in widths:
+        batch_shape = prices.shape[:-1]
+        if w <= 0 or w > n:
+            nan = np.full(batch_shape, np.nan)
+            none = np.full(batch_shape, -1)
+            out[w] = {"min_avg": nan, "min_start": none, "max_avg": nan.copy(), "max_start": none.copy()}
+            continue
+
+        sums = csum[..., w:] - csum[..., :-w]
+        complete = (ccount[..., w:] - ccount[..., :-w]) == w
+        avg = sums / w
+
+        low = np.where(complete, avg, np.inf)
+        high = np.where(complete, avg, -np.inf)
+        min_start = np.argmin(low, axis=-1)
+        max_start = np.argmax(high, axis=-1)
+        any_complete = complete.any(axis=-1)
+
+        min_avg = np.take_along_axis(avg, min_start[..., None], axis=-1)[..., 0]
+        max_avg = np.take_along_axis(avg, max_start[..., None], axis=-1)[..., 0]
+        out[w] = {
+            "min_avg": np.where(any_complete, min_avg, np.nan),
+            "min_start": np.where(any_complete, min_start, -1),
+            "max_avg": np.where(any_complete, max_avg, np.nan),
+            "max_start": np.where(any_complete, max_start, -1),
+        }
+    return out
+
+
+def price_stats(prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-row statistics along the last axis, ignoring NaN slots."""
+    prices = np.asarray(prices, dtype=np.float64)
+    valid = np.isfinite(prices)
+    count = valid.sum(axis=-1)
+    has = count > 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        filled = np.where(valid, prices, 0.0)
+        mean = np.where(has, filled.sum(axis=-1) / np.maximum(count, 1), np.nan)
+        sq = np.where(valid, (prices - mean[..., None]) ** 2, 0.0)
+        std = np.where(has, np.sqrt(sq.sum(axis=-1) / np.maximum(count, 1)), np.nan)
+        low = np.where(has, np.where(valid, prices, np.inf).min(axis=-1), np.nan)
+        high = np.where(has, np.where(valid, prices, -np.inf).max(axis=-1), np.nan)
+
+    stats = {
+        "count": count,
+        "mean": mean,
+        "std": std,
+        "min": low,
+        "max": high,
+        "negative_slots": (np.where(valid, prices, 0.0) < 0).sum(axis=-1),
+    }
+    if has.any():
+        pct = np.nanpercentile(np.where(has[..., None], prices, 0.0), PERCENTILES, axis=-1)
+        for p, values in zip(PERCENTILES, pct):
+            stats[f"p{p}"] = np.where(has, values, np.nan)
+    else:
+        for p in PERCENTILES:
+            stats[f"p{p}"] = np.full(prices.shape[:-1], np.nan)
+    return stats
+
+
+def _slot_label(epoch: int, tz) -> str:
+    return datetime.fromtimestamp(epoch, tz=tz).strftime("%H:%M")
+
+
+def day_window_summary(rates: List[Dict], hours: Sequence[int] = DEFAULT_WINDOW_HOURS) -> Dict:
+    """
+    Cheapest / dearest 1h..4h windows and price statistics for one day of
+    API-shaped rows. Times are UK local; prices are p/kWh inc. VAT.
+    """
+    if not rates:
+        return {"cheapest_windows": [], "stats": None}
+
+    starts, prices = _epochs(rates)
+    # contiguous grid from the first slot, so gaps in the data stay gaps
+    slot = (starts - starts[0]) // SLOT_SECONDS
+    grid = np.full(int(slot[-1]) + 1, np.nan)
+    grid[slot] = prices
+
+    widths = [h * 2 for h in hours]
+    extremes = window_extremes(grid, widths)
+    tz = zoneinfo.ZoneInfo(UK_TZ)
+
+    windows = []
+    for h, w in zip(hours, widths):
+        e = extremes[w]
+        if int(e["min_start"]) < 0:
+            continue
+        lo_from = int(starts[0]) + int(e["min_start"]) * SLOT_SECONDS
+        hi_from = int(starts[0]) + int(e["max_start"]) * SLOT_SECONDS
+        windows.append({
+            "hours": h,
+            "cheapest_from": _slot_label(lo_from, tz),
+            "cheapest_to": _slot_label(lo_from + w * SLOT_SECONDS, tz),
+            "cheapest_avg": round(float(e["min_avg"]), 3),
+            "dearest_from": _slot_label(hi_from, tz),
+            "dearest_to": _slot_label(hi_from + w * SLOT_SECONDS, tz),
+            "dearest_avg": round(float(e["max_avg"]), 3),
+        })
+
+    s = price_stats(grid)
+    stats = {
+        "std": round(float(s["std"]), 3),
+        "negative_slots": int(s["negative_slots"]),
+    }
+    for p in PERCENTILES:
+        stats[f"p{p}"] = round(float(s[f"p{p}"]), 3)
+    return {"cheapest_windows": windows, "stats": stats}
@@ -0,0 +1,316 @@
+"""
+Downsampled Agile price series for the charts.
+
+The half-hourly store is far too big to ship to the browser, so every run
+folds it into min / mean / max (and slot count) per region per bucket at
+three resolutions:
+
+    day    one bucket per UK-local day      chunked per month  series/day/2025-01.json
+    week   ISO weeks (Monday start)         chunked per year   series/week/2025.json
+    month  calendar months                  one chunk          series/month/all.json
+
+Chunk files are columnar per region:
+
+{
+  "resolution": "day",
+  "chunk": "2025-01",
+  "regions": {"C": {"t": ["2025-01-01", ...], "min": [...], "mean": [...], "max": [...], "n": [...]}}
+}
+
+and are published through payloads.publish_json (minified, .gz, hashed
+copy). data/series_index.json lists every chunk with its hashed file name
+and date range, so a chart loads the index once and then only the chunks
+it needs.
+
+Updates are incremental. data/series/state.json records the stored slot
+count per region, UTC month and product code (AgileStore.monthly_counts());
+rows are only added or moved to a family's new product, so only months
+whose counts moved have new data. Only the
+day / week / month buckets that touch those days are recomputed and only
+the chunks holding them are rewritten.
+
+    python -m scripts.agile_series            # update
+    python -m scripts.agile_series --rebuild  # ignore state, rebuild everything
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .agile_analytics import store_matrix
+from .agile_store import AGILE_PRODUCT, AgileStore
+from .artifacts import source_path, write_json
+from .fetch_octopus import GSP_REGIONS
+from .payloads import publish_json
+from .tracing import span
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+
+# Bump when the chunk layout or the statistics change (forces a rebuild).
+SERIES_FORMAT_VERSION = 2
+
+RESOLUTIONS = ("day", "week", "month")
+
+
+def _paths(data_dir: Path) -> Tuple[Path, Path, Path]:
+    """(series dir, state file, index file) under data_dir."""
+    series_dir = data_dir / "series"
+    return series_dir, series_dir / "state.json", data_dir / "series_index.json"
+
+
+def _read_json(path: Path, default):
+    path = source_path(path)
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+# --- buckets ---
+
+
+def bucket_key(resolution: str, day: date) -> str:
+    if resolution == "day":
+        return day.isoformat()
+    if resolution == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if resolution == "month":
+        return day.strftime("%Y-%m")
+    raise ValueError(f"unknown resolution {resolution!r}")
+
+
+def chunk_key(resolution: str, bucket: str) -> str:
+    if resolution == "day":
+        return bucket[:7]
+    if resolution == "week":
+        return bucket[:4]
+    return "all"
+
+
+def _covering_range(first: date, last: date) -> Tuple[date, date]:
+    """Widen [first, last] to whole ISO weeks and whole months."""
+    week_start = first - timedelta(days=first.weekday())
+    week_end = last + timedelta(days=6 - last.weekday())
+    month_start = first.replace(day=1)
+    next_month = (last.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return min(week_start, month_start), max(week_end, next_month - timedelta(days=1))
+
+
+def _spans(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Touched days → merged (first, last) ranges, each widened to cover its weeks and months."""
+    spans: List[Tuple[date, date]] = []
+    for d in sorted(set(days)):
+        lo, hi = _covering_range(d, d)
+        if spans and lo <= spans[-1][1] + timedelta(days=1):
+            spans[-1] = (spans[-1][0], max(spans[-1][1], hi))
+        else:
+            spans.append((lo, hi))
+    return spans
+
+
+def _touched_days(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Set[date]:
+    """
+    UK-local days that may hold new rows. A UTC month's rows fall on the UK
+    days of that month plus the first day of the next month (BST puts the
+    last UTC hour of the month on the next UK day).
+    """
+    days: Set[date] = set()
+    for region, months in current.items():
+        before = previous.get(region, {})
+        for month, count in months.items():
+            if before.get(month) == count:
+                continue
+            first = date(int(month[:4]), int(month[5:7]), 1)
+            last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            days.update(first + timedelta(days=i) for i in range((last - first).days + 2))
+    return days
+
+
+# --- statistics ---
+
+
+def group_stats(matrix: np.ndarray, starts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    min / mean / max / count over consecutive day groups.
+
+    matrix is (regions, days, SLOTS_PER_DAY) with NaN for missing slots;
+    starts are the first day index of each group. Returns arrays of shape
+    (regions, groups); groups with no data have count 0 and NaN stats.
+    """
+    regions, n_days, slots = matrix.shape
+    flat = matrix.reshape(regions, n_days * slots)
+    idx = np.asarray(starts, dtype=np.intp) * slots
+    valid = np.isfinite(flat)
+
+    counts = np.add.reduceat(valid, idx, axis=1)
+    sums = np.add.reduceat(np.where(valid, flat, 0.0), idx, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return {
+        "min": np.fmin.reduceat(flat, idx, axis=1),   # fmin/fmax skip NaN
+        "mean": mean,
+        "max": np.fmax.reduceat(flat, idx, axis=1),
+        "n": counts,
+    }
+
+
+def _bucket_rows(
+    matrix: np.ndarray,
+    regions: List[str],
+    first: date,
+    resolution: str,
+    wanted: Set[str],
+) -> Dict[str, Dict[str, Optional[Tuple]]]:
+    """{bucket: {region: (min, mean, max, n) or None}} for the wanted buckets inside the matrix."""
+    n_days = matrix.shape[1]
+    keys = [bucket_key(resolution, first + timedelta(days=i)) for i in range(n_days)]
+    starts = [i for i in range(n_days) if i == 0 or keys[i] != keys[i - 1]]
+    stats = group_stats(matrix, np.array(starts))
+
+    out: Dict[str, Dict[str, Optional[Tuple]]] = {}
+    for g, start in enumerate(starts):
+        key = keys[start]
+        if key not in wanted:
+            continue
+        row: Dict[str, Optional[Tuple]] = {}
+        for r, region in enumerate(regions):
+            n = int(stats["n"][r, g])
+            row[region] = None if n == 0 else (
+                round(float(stats["min"][r, g]), 3),
+                round(float(stats["mean"][r, g]), 3),
+                round(float(stats["max"][r, g]), 3),
+                n,
+            )
+        out[key] = row
+    return out
+
+
+# --- chunks ---
+
+
+def _merge_chunk(chunk: Dict, updates: Dict[str, Dict[str, Optional[Tuple]]]) -> Dict:
+    """Apply {bucket: {region: stats or None}} to a chunk's columnar per-region data."""
+    regions = chunk.setdefault("regions", {})
+    for region in sorted({r for row in updates.values() for r in row}):
+        cols = regions.get(region, {})
+        columns = [cols.get(k, []) for k in ("t", "min", "mean", "max", "n")]
+        rows = {t: (lo, mean, hi, n) for t, lo, mean, hi, n in zip(*columns)}
+        for bucket, row in updates.items():
+            if region not in row:
+                continue
+            if row[region] is None:
+                rows.pop(bucket, None)
+            else:
+                rows[bucket] = row[region]
+        if not rows:
+            regions.pop(region, None)
+            continue
+        ts = sorted(rows)
+        regions[region] = {
+            "t": ts,
+            "min": [rows[t][0] for t in ts],
+            "mean": [rows[t][1] for t in ts],
+            "max": [rows[t][2] for t in ts],
+            "n": [rows[t][3] for t in ts],
+        }
+    return chunk
+
+
+def _chunk_range(chunk: Dict) -> Tuple[Optional[str], Optional[str]]:
+    ts = [t for cols in chunk.get("regions", {}).values() for t in cols["t"]]
+    return (min(ts), max(ts)) if ts else (None, None)
+
+
+def update_series(
+    store: Optional[AgileStore] = None,
+    data_dir: Optional[Path] = None,
+    rebuild: bool = False,
+) -> Dict[str, List[str]]:
+    """
+    Bring data/series up to date with the store. Returns {resolution: [chunk, ...]}
+    for the chunks that were recomputed (files whose content came out the
+    same are left untouched by the output layer).
+    """
+    if store is None:
+        with AgileStore() as own_store:
+            return update_series(own_store, data_dir, rebuild)
+
+    data_dir = data_dir or DATA_DIR
+    series_dir, state_path, index_path = _paths(data_dir)
+    state = _read_json(state_path, {})
+    if rebuild or state.get("format") != SERIES_FORMAT_VERSION:
+        state = {}
+    index = _read_json(index_path, {}) if state else {}
+
+    counts = store.monthly_counts(AGILE_PRODUCT)
+    touched = _touched_days(state.get("months", {}), counts)
+    regions = [r for r in GSP_REGIONS if r in counts]
+    rewritten: Dict[str, List[str]] = {res: [] for res in RESOLUTIONS}
+
+    with span("series", touched_days=len(touched)) as s:
+        updates: Dict[str, Dict[str, Dict]] = {res: {} for res in RESOLUTIONS}
+        for first, last in _spans(touched):
+            n_days = (last - first).days + 1
+            matrix = store_matrix(store, regions, first, n_days)
+            for res in RESOLUTIONS:
+                wanted = {bucket_key(res, d) for d in touched if first <= d <= last}
+                for bucket, row in _bucket_rows(matrix, regions, first, res, wanted).items():
+                    updates[res].setdefault(chunk_key(res, bucket), {})[bucket] = row
+
+        resolutions = index.setdefault("resolutions", {})
+        for res in RESOLUTIONS:
+            listing = resolutions.setdefault(res, {})
+            for chunk_name, chunk_updates in sorted(updates[res].items()):
+                path = series_dir / res / f"{chunk_name}.json"
+                chunk = _read_json(path, {}) if state else {}
+                chunk.update({"resolution": res, "chunk": chunk_name})
+                chunk = _merge_chunk(chunk, chunk_updates)
+                if not chunk["regions"] and not source_path(path).exists():
+                    continue  # edge day of a touched month with nothing stored
+                entry = publish_json(path, chunk)
+                t_from, t_to = _chunk_range(chunk)
+                listing[chunk_name] = {
+                    "file": f"series/{res}/{entry['hashed']}",
+                    "from": t_from,
+                    "to": t_to,
+                }
+                rewritten[res].append(chunk_name)
+            resolutions[res] = dict(sorted(listing.items()))
+
+        index.update({
+            "unit": "p/kWh inc VAT",
+            "regions": {r: GSP_REGIONS[r] for r in regions},
+        })
+        s.set(chunks=sum(len(v) for v in rewritten.values()))
+
+    if any(rewritten.values()) or not source_path(index_path).exists():
+        publish_json(index_path, index)
+    write_json(state_path, {"format": SERIES_FORMAT_VERSION, "months": counts}, separators=(",", ":"), sort_keys=True)
+    return rewritten
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Update the downsampled Agile chart series.")
+    parser.add_argument("--rebuild", action="store_true", help="ignore series state and rebuild every chunk")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    rewritten = update_series(rebuild=args.rebuild)
+    elapsed = time.perf_counter() - t0
+    summary = ", ".join(f"{res}: {len(chunks)}" for res, chunks in rewritten.items())
+    print(f"[ok] series updated in {elapsed:.2f}s (chunks recomputed: {summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Local append-only store for half-hourly Octopus unit rates.
+
+Rates are kept in SQLite (data/agile_rates.sqlite; a scratch copy under
+the cassette dir in replay mode, see http_cassette.py), one row per
+(product, region, slot start). Slot times are stored as UTC epoch seconds
+so range queries and gap detection are plain integer comparisons on the
+primary key index.
+
+Each row also records the Octopus product code it was fetched from
+(`product` is the family label, e.g. "AGILE"; `product_code` is e.g.
+"AGILE-24-10-01"; NULL for rows stored before codes were recorded). When
+the product catalogue (octopus_catalogue.py) moves a family to a new
+product, missing_intervals(..., product_code, since) reports slots from
+`since` on that hold another product's rates, and append() replaces them
+with the current product's.
+
+Rows read back out have the same shape as the Octopus API results
+({"valid_from", "valid_to", "value_inc_vat", ...}), so summarize_agile()
+and the report code work on stored data unchanged.
+
+Typical use:
+
+    store = AgileStore()
+    gaps = store.missing_intervals("C", day_start, day_end)   # only fetch these
+    store.append("C", api_results)
+    rates = store.query_range("C", day_start, day_end)
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .http_cassette import runtime_path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_STORE_PATH = ROOT / "data" / "agile_rates.sqlite"
+
+# Family label for Agile rows; other tariff families can share the table.
+AGILE_PRODUCT = "AGILE"
+
+SLOT_SECONDS = 30 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    product       TEXT    NOT NULL,
+    region        TEXT    NOT NULL,
+    slot_start    INTEGER NOT NULL,
+    slot_end      INTEGER NOT NULL,
+    value_inc_vat REAL    NOT NULL,
+    value_exc_vat REAL,
+    product_code  TEXT,
+    PRIMARY KEY (product, region, slot_start)
+) WITHOUT ROWID;
+"""
+
+
+def _to_epoch(value) -> int:
+    """ISO string ("...Z" or with offset) or aware datetime → UTC epoch seconds."""
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _to_iso(epoch: int) -> str:
+    """UTC epoch seconds → Octopus-style ISO string ("2025-01-01T00:00:00Z")."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _to_datetime(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+class AgileStore:
+    """Append-only half-hourly rate store backed by one SQLite file."""
+
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path else runtime_path(DEFAULT_STORE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rates)")}
+        if "product_code" not in columns:
+            # stores created before product codes were recorded
+            self._conn.execute("ALTER TABLE rates ADD COLUMN product_code TEXT")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "AgileStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- writes ---
+
+    def append(
+        self,
+        region: str,
+        rates: Iterable[Dict],
+        product: str = AGILE_PRODUCT,
+        product_code: Optional[str] = None,
+    ) -> int:
+        """
+        Insert API-shaped rate rows fetched from `product_code`. Existing
+        slots are kept (append-only) unless they hold another product's
+        rate; those are replaced. Returns the number of new or replaced rows.
+        """
+        rows = []
+        for r in rates:
+            start = _to_epoch(r["valid_from"])
+            end = _to_epoch(r["valid_to"]) if r.get("valid_to") else start + SLOT_SECONDS
+            rows.append((product, region, start, end, float(r["value_inc_vat"]), r.get("value_exc_vat"), product_code))
+
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO rates "
+                "(product, region, slot_start, slot_end, value_inc_vat, value_exc_vat, product_code) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (product, region, slot_start) DO UPDATE SET "
+                "slot_end = excluded.slot_end, value_inc_vat = excluded.value_inc_vat, "
+                "value_exc_vat = excluded.value_exc_vat, product_code = excluded.product_code "
+                "WHERE excluded.product_code IS NOT NULL AND rates.product_code IS NOT excluded.product_code",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    # --- reads ---
+
+    def query_range(
+        self,
+        region: str,
+        start: datetime,
+        end: datetime,
+        product: str = AGILE_PRODUCT,
+    ) -> List[Dict]:
+        """Rates for slots starting in [start, end), oldest first, in API row shape."""
+        cur = self._conn.execute(
+            "SELECT slot_start, slot_end, value_inc_vat, value_exc_vat FROM rates "
+            "WHERE product = ? AND region = ? AND slot_start >= ? AND slot_start < ? "
+            "ORDER BY slot_start",
+            (product, region, _to_epoch(start), _to_epoch(end)),
+        )
+        return [
+            {
+                "valid_from": _to_iso(s),
+                "valid_to": _to_iso(e),
+                "value_inc_vat": inc,
+                "value_exc_vat": exc,
+            }
+            for s, e, inc, exc in cur
+        ]
+
+    def query_range_raw(
+        self,
+        region: str,
+        start: datetime,
+        end: datetime,
+        product: str = AGILE_PRODUCT,
+    ) -> List[Tuple[int, float]]:
+        """(slot_start epoch, value_inc_vat) pairs for [start, end); cheaper than query_range()."""
+        cur = self._conn.execute(
+            "SELECT slot_start, value_inc_vat FROM rates "
+            "WHERE product = ? AND region = ? AND slot_start >= ? AND slot_start < ? "
+            "ORDER BY slot_start",
+            (product, region, _to_epoch(start), _to_epoch(end)),
+        )
+        return cur.fetchall()
+
+    def regions(self, product: str = AGILE_PRODUCT) -> List[str]:
+        cur = self._conn.execute(
+            "SELECT DISTINCT region FROM rates WHERE product = ? ORDER BY region", (product,)
+        )
+        return [row[0] for row in cur]
+
+    def monthly_counts(self, product: str = AGILE_PRODUCT) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """
+        {region: {"YYYY-MM" (UTC month): {product code: stored slot count}}}
+        ("" for rows without a code). Rows are only added, or moved to the
+        current product code, so counts that moved mean that month has new data.
+        """
+        cur = self._conn.execute(
+            "SELECT region, strftime('%Y-%m', slot_start, 'unixepoch') AS month, "
+            "COALESCE(product_code, ''), COUNT(*) FROM rates "
+            "WHERE product = ? GROUP BY region, month, product_code",
+            (product,),
+        )
+        out: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for region, month, code, count in cur:
+            out.setdefault(region, {}).setdefault(month, {})[code] = count
+        return out
+
+    def latest_slot(self, region: str, product: str = AGILE_PRODUCT) -> Optional[datetime]:
+        cur = self._conn.execute(
+            "SELECT MAX(slot_start) FROM rates WHERE product = ? AND region = ?",
+            (product, region),
+        )
+        value = cur.fetchone()[0]
+        return _to_datetime(value) if value is not None else None
+
+    def missing_intervals(
+        self,
+        region: str,
+        start: datetime,
+        end: datetime,
+        product: str = AGILE_PRODUCT,
+        product_code: Optional[str] = None,
+        since: Optional[datetime] = None,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Half-hour slots in [start, end) that are not stored yet, merged into
+        contiguous (from, to) ranges — i.e. exactly what still needs fetching.
+        With product_code and since, slots from `since` on that were stored
+        from another product also count as missing.
+        """
+        lo, hi = _to_epoch(start), _to_epoch(end)
+        sql = (
+            "SELECT slot_start, slot_end FROM rates "
+            "WHERE product = ? AND region = ? AND slot_start >= ? AND slot_start < ?"
+        )
+        params: List = [product, region, lo, hi]
+        if product_code and since is not None:
+            sql += " AND (slot_start < ? OR product_code IS ?)"
+            params += [_to_epoch(since), product_code]
+        cur = self._conn.execute(sql + " ORDER BY slot_start", params)
+
+        gaps: List[Tuple[datetime, datetime]] = []
+        cursor = lo
+        for slot_start, slot_end in cur:
+            if slot_start > cursor:
+                gaps.append((_to_datetime(cursor), _to_datetime(slot_start)))
+            cursor = max(cursor, slot_end)
+        if cursor < hi:
+            gaps.append((_to_datetime(cursor), _to_datetime(hi)))
+        return gaps
+
@@ -0,0 +1,318 @@
+"""
+AI content generators for the Astro site, as importable job definitions.
+
+Each ContentJob holds everything one generator needs (prompts, output
+directory, frontmatter, filename). run_jobs() executes any number of them
+concurrently with one shared AsyncOpenAI client, a concurrency limit and a
+simple requests-per-minute limiter, so a full run takes about as long as
+the slowest single completion. Completions are cached per day
+(llm_cache.py), so a rerun only calls the API for jobs that failed.
+
+    python -m scripts.ai_jobs                  # every job
+    python -m scripts.ai_jobs news policy      # selected jobs
+    python -m scripts.ai_jobs --concurrency 2 --rpm 30
+
+The old entry points (scripts/auto_*.py) are thin wrappers around this.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from openai import AsyncOpenAI
+
+from .artifacts import write_text
+from .llm_cache import LLMCache, cache_key, freshness_bucket
+from .llm_metrics import InstrumentedClient, record_cache_hit
+
+ROOT = Path(__file__).resolve().parent.parent
+CONTENT_DIR = ROOT / "astro-site" / "src" / "content"
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPM = 60
+
+
+@dataclass(frozen=True)
+class ContentJob:
+    """One Markdown article: prompts in, frontmatter + body out."""
+
+    name: str
+    output_dir: str            # relative to astro-site/src/content
+    system_prompt: str
+    prompt: str
+    title: str                 # "{today}" is filled in
+    description: str
+    label: str                 # used in progress messages
+    model: str = DEFAULT_MODEL
+    temperature: float = 0.7
+    cache_bucket: str = "day"  # llm_cache freshness window
+
+    def cache_key(self) -> str:
+        return cache_key(self.model, self.messages(), self.temperature, freshness_bucket(self.cache_bucket))
+
+    def messages(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.prompt},
+        ]
+
+    def frontmatter(self, today: str) -> str:
+        return (
+            "---\n"
+            f'title: "{self.title.format(today=today)}"\n'
+            f'date: "{today}"\n'
+            f'description: "{self.description}"\n'
+            "---\n\n"
+        )
+
+    def output_path(self, today: str) -> Path:
+        return CONTENT_DIR / self.output_dir / f"{today}-auto-{self.name}.md"
+
+    def write(self, content: str, today: str) -> Path:
+        path = self.output_path(today)
+        write_text(path, self.frontmatter(today) + clean_article(content))
+        return path
+
+
+def clean_article(content: str) -> str:
+    """Drop a leading "# Title" line; the page renders the frontmatter title."""
+    content = content.strip()
+    if content.startswith("# "):
+        content = "\n".join(content.split("\n")[1:]).strip()
+    return content
+
+
+POLICY_JOB = ContentJob(
+    name="policy",
+    output_dir="policy",
+    label="policy article",
+    system_prompt="You are a UK energy policy expert writing for a public energy data website.",
+    prompt="""
+Write a **UK energy policy article** in Markdown format about the latest government energy policy or program as of today.
+
+Follow this structure:
+
+## Overview
+Briefly introduce the topic and its policy background.
+
+## Key Points
+Summarize the main elements of the policy, such as investment targets, renewable goals, timeframes, or institutions involved.
+
+## Impact on the UK Energy Market
+Explain how this affects UK households, businesses, or the overall energy transition.
+
+## Expert Analysis
+Include insights or interpretations based on current UK energy context and global trends.
+
+## Sources
+List 2–3 real credible UK government or media sources (Ofgem, BEIS, GOV.UK, BBC).
+
+Use **Markdown formatting** for headings, bullet points, and bold keywords.
+Make sure every paragraph is separated by a blank line.
+""",
+    title="UK Energy Policy Update {today}",
+    description="Latest update on UK energy policy developments and regulatory changes.",
+)
+
+NEWS_JOB = ContentJob(
+    name="news",
+    output_dir="news",
+    label="news article",
+    system_prompt="You are an energy journalist reporting on UK energy market developments.",
+    prompt="""
+Write a **UK energy news update** in Markdown format about current events, announcements, or market trends
+relevant to the UK energy industry as of today.
+
+Follow this structure:
+
+## Headline Summary
+Give a short summary of the key news event.
+
+## Details
+Describe what happened, who is involved, and why it matters.
+
+## Context
+Provide background context or related developments.
+
+## Implications
+Discuss what this might mean for energy policy, consumers, or companies.
+
+## Sources
+List 2–3 credible UK sources (Ofgem, GOV.UK, BBC, The Guardian).
+
+Use Markdown formatting and ensure clean paragraph spacing.
+""",
+    title="UK Energy News Update {today}",
+    description="Latest UK energy market headlines and industry updates.",
+)
+
+ENERGY_JOB = ContentJob(
+    name="energy",
+    output_dir="energy-saving",
+    label="energy-saving guide",
+    system_prompt="You are a UK energy efficiency advisor writing practical guides.",
+    prompt="""
+Write a **UK energy-saving guide** in Markdown format that provides practical advice to help households
+and businesses reduce energy use and carbon emissions.
+
+Follow this structure:
+
+## Introduction
+Explain the motivation for energy saving and its importance in the UK context.
+
+## Practical Tips
+List 5–7 actionable tips for saving energy at home or at work.
+
+## Benefits
+Describe both financial and environmental benefits.
+
+## Government Support
+Mention relevant UK programs, grants, or incentives.
+
+## Sources
+Include credible references (GOV.UK, Ofgem, Energy Saving Trust).
+
+Use Markdown formatting with lists and spacing for easy reading.
+""",
+    title="UK Energy Saving Guide {today}",
+    description="Daily UK guide on reducing energy use and improving efficiency.",
+)
+
+# Order matches the old auto_all.py run order.
+JOBS: Dict[str, ContentJob] = {job.name: job for job in (POLICY_JOB, NEWS_JOB, ENERGY_JOB)}
+
+
+class RateLimiter:
+    """Spaces request starts so no more than `rpm` begin in any minute."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def run_job(
+    client: InstrumentedClient,
+    job: ContentJob,
+    today: str,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+    cache: LLMCache,
+    key: str,
+) -> Path:
+    async with semaphore:
+        await limiter.acquire()
+        print(f"🧠 Generating AI {job.label}...")
+        content, usage = await client.complete(job.name, job.model, job.messages(), job.temperature)
+    cache.put(key, job.model, freshness_bucket(job.cache_bucket), content, usage)
+    path = job.write(content, today)
+    print(f"✅ Generated: {path}")
+    return path
+
+
+async def run_jobs(
+    jobs: Iterable[ContentJob],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: float = DEFAULT_RPM,
+    client: Optional[AsyncOpenAI] = None,
+    today: Optional[str] = None,
+    cache: Optional[LLMCache] = None,
+) -> Dict[str, Union[Path, BaseException]]:
+    """
+    Run jobs concurrently with one client. Returns {job name: written path
+    or the exception it failed with}; one failure does not stop the others.
+    Cached completions are written straight out; the client is only
+    created when at least one job needs the API. Every call (and cache
+    hit) is logged to data/llm_calls.jsonl by llm_metrics.
+    """
+    jobs = list(jobs)
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    cache = cache or LLMCache()
+
+    outcome: Dict[str, Union[Path, BaseException]] = {}
+    pending = []
+    for job in jobs:
+        key = job.cache_key()
+        entry = cache.get(key)
+        if entry is None:
+            pending.append((job, key))
+            continue
+        path = job.write(entry["content"], today)
+        record_cache_hit(job.name, job.model)
+        print(f"💾 Cached: {path}")
+        outcome[job.name] = path
+
+    if pending:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        limiter = RateLimiter(rpm)
+        own_client = client is None
+        client = client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        instrumented = InstrumentedClient(client)
+        try:
+            results = await asyncio.gather(
+                *(run_job(instrumented, job, today, semaphore, limiter, cache, key) for job, key in pending),
+                return_exceptions=True,
+            )
+        finally:
+            if own_client:
+                await client.close()
+
+        for (job, _), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                print(f"❌ {job.name} failed: {result}")
+            outcome[job.name] = result
+
+    stats = cache.record_stats()
+    cache.evict()
+    if cache.enabled:
+        print(f"💾 LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    return {job.name: outcome[job.name] for job in jobs}
+
+
+def select_jobs(names: Optional[Iterable[str]] = None) -> List[ContentJob]:
+    names = list(names or JOBS)
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        raise SystemExit(f"unknown job(s): {', '.join(unknown)} (known: {', '.join(JOBS)})")
+    return [JOBS[n] for n in names]
+
+
+def run_jobs_sync(
+    names: Optional[Iterable[str]] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rpm: float = DEFAULT_RPM,
+) -> Dict[str, Union[Path, BaseException]]:
+    return asyncio.run(run_jobs(select_jobs(names), concurrency, rpm))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate AI content for the Astro site.")
+    parser.add_argument("jobs", nargs="*", help=f"jobs to run (default: all of {', '.join(JOBS)})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="max requests started per minute (0 = no limit)")
+    args = parser.parse_args(argv)
+
+    results = run_jobs_sync(args.jobs or None, args.concurrency, args.rpm)
+    return 0 if all(isinstance(r, Path) for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
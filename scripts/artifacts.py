@@ -0,0 +1,319 @@
+"""
+Output layer for everything the pipeline publishes (reports, data/*.json).
+
+Every writer goes through here instead of calling Path.write_text():
+
+- write_text() / write_bytes() / write_json() hash the new content and
+  compare it with what is on disk. Identical content is not rewritten, so
+  mtimes stay put and git sees no change.
+- Changed content goes to a temp file in the same directory and is moved
+  into place with os.replace(), so readers (and a second run) only ever
+  see the old file or the new one, never half of each.
+- open_atomic() does the same for streamed output (template rendering).
+- run_lock() holds an exclusive lock on data/.run.lock for the whole run,
+  so overlapping runs (cron plus a manual dispatch on the same machine)
+  queue up instead of interleaving writes.
+- In replay mode (http_cassette.py) every write lands on output_path(),
+  the scratch copy under the cassette dir, so the working tree is never
+  touched. Readers of published files use source_path(), which prefers
+  that copy once this or an earlier replay has written it.
+
+Two kinds of churn do not count as a change, so a rerun with the same
+inputs reports nothing to commit:
+
+- ignore=RUN_STAMP_RE: a file that differs from the copy on disk only in
+  its "YYYY-MM-DD HH:MM UTC" run stamps (generated_at) is left as it is.
+- volatile=True: run telemetry (data/run_metrics.json) differs on every
+  run; it is still written, but recorded as "volatile", not "changed".
+
+Each write is recorded as "changed", "unchanged" or "volatile".
+report_changes() prints the summary and, under GitHub Actions, exports the
+changed files as step outputs:
+
+    artifacts_changed=true|false
+    changed_artifacts=data/latest.json reports/2025-11-14.html ...
+
+so later steps (commit, deploy) can skip work when nothing moved.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Pattern, TextIO
+
+from .http_cassette import runtime_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are not locked
+    fcntl = None
+
+ROOT = Path(__file__).resolve().parent.parent
+LOCK_PATH = ROOT / "data" / ".run.lock"
+
+# How long a second run waits for the first before giving up.
+DEFAULT_LOCK_TIMEOUT_S = 15 * 60
+
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+VOLATILE = "volatile"
+
+# The per-run timestamp stamped into reports and payloads ("generated_at").
+RUN_STAMP_RE = re.compile(rb"\d{4}-\d{2}-\d{2} \d{2}:\d{2} UTC")
+
+# path → CHANGED / UNCHANGED / VOLATILE for this process
+_RESULTS: Dict[str, str] = {}
+
+
+class RunLockTimeout(RuntimeError):
+    pass
+
+
+def output_path(path: Path) -> Path:
+    """Where a published file is written this run (its replay scratch copy in replay mode)."""
+    return runtime_path(Path(path))
+
+
+def source_path(path: Path) -> Path:
+    """The copy of a published file to read: output_path() if it exists, else `path`."""
+    out = output_path(path)
+    return out if out.exists() else Path(path)
+
+
+def _record(path: Path, status: str) -> None:
+    key = str(path)
+    if _RESULTS.get(key) == CHANGED or (_RESULTS.get(key) == VOLATILE and status == UNCHANGED):
+        return
+    _RESULTS[key] = status
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    try:
+        with path.open("rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _same_content(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+    except FileNotFoundError:
+        return False
+    return _file_digest(path) == _digest(data)
+
+
+def _same_apart_from(old: bytes, new: bytes, ignore: Pattern[bytes]) -> bool:
+    return ignore.sub(b"", old) == ignore.sub(b"", new)
+
+
+def stable_content(path: Path, data: bytes, ignore: Optional[Pattern[bytes]]) -> bytes:
+    """The bytes on disk if they differ from `data` only inside `ignore` matches, else `data`."""
+    if ignore is None:
+        return data
+    try:
+        old = source_path(path).read_bytes()
+    except FileNotFoundError:
+        return data
+    return old if _same_apart_from(old, data, ignore) else data
+
+
+def _temp_for(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        # mkstemp creates 0600; published files should stay world-readable
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    os.chmod(tmp, mode)
+    return fd, Path(tmp)
+
+
+def write_bytes(
+    path: Path,
+    data: bytes,
+    ignore: Optional[Pattern[bytes]] = None,
+    volatile: bool = False,
+) -> bool:
+    """
+    Atomically write data unless the file already holds it (apart from
+    `ignore` matches); True if the file was rewritten. volatile=True
+    records a rewrite as VOLATILE instead of CHANGED.
+    """
+    path = output_path(path)
+    data = stable_content(path, data, ignore)
+    if _same_content(path, data):
+        _record(path, UNCHANGED)
+        return False
+
+    fd, tmp = _temp_for(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _record(path, VOLATILE if volatile else CHANGED)
+    return True
+
+
+def write_text(
+    path: Path,
+    text: str,
+    encoding: str = "utf-8",
+    ignore: Optional[Pattern[bytes]] = None,
+    volatile: bool = False,
+) -> bool:
+    return write_bytes(path, text.encode(encoding), ignore=ignore, volatile=volatile)
+
+
+def write_json(
+    path: Path,
+    obj,
+    ignore: Optional[Pattern[bytes]] = None,
+    volatile: bool = False,
+    **dumps_kwargs,
+) -> bool:
+    """json.dumps(obj, **dumps_kwargs) plus a final newline, through write_text()."""
+    return write_text(path, json.dumps(obj, **dumps_kwargs) + "\n", ignore=ignore, volatile=volatile)
+
+
+@contextmanager
+def open_atomic(
+    path: Path,
+    encoding: str = "utf-8",
+    ignore: Optional[Pattern[bytes]] = None,
+) -> Iterator[TextIO]:
+    """
+    Text file handle for streamed output. The temp file replaces `path` on a
+    clean exit only if its content differs (apart from `ignore` matches);
+    on error `path` is untouched.
+    """
+    path = output_path(path)
+    fd, tmp = _temp_for(path)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            yield f
+        same = False
+        try:
+            same = tmp.stat().st_size == path.stat().st_size and _file_digest(tmp) == _file_digest(path)
+            if not same and ignore is not None:
+                same = _same_apart_from(path.read_bytes(), tmp.read_bytes(), ignore)
+        except FileNotFoundError:
+            pass
+        if same:
+            tmp.unlink()
+            _record(path, UNCHANGED)
+        else:
+            os.replace(tmp, path)
+            _record(path, CHANGED)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def remove(path: Path) -> bool:
+    """Delete a published file (recorded as a change); False if it was not there."""
+    path = output_path(path)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    _record(path, CHANGED)
+    return True
+
+
+# --- change reporting ---
+
+
+def results() -> Dict[str, str]:
+    """Every artifact written by this process so far: {path: "changed" | "unchanged" | "volatile"}."""
+    return dict(_RESULTS)
+
+
+def merge_results(other: Dict[str, str]) -> None:
+    """Fold in results recorded by another process (e.g. a backfill worker)."""
+    for path, status in other.items():
+        _record(Path(path), status)
+
+
+def _display(path: str) -> str:
+    try:
+        return Path(path).resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        return path
+
+
+def changed_artifacts() -> List[str]:
+    return sorted(_display(p) for p, status in _RESULTS.items() if status == CHANGED)
+
+
+def report_changes() -> List[str]:
+    """Print the changed/unchanged summary and export it to $GITHUB_OUTPUT if set."""
+    changed = changed_artifacts()
+    volatile = sum(1 for status in _RESULTS.values() if status == VOLATILE)
+    unchanged = len(_RESULTS) - len(changed) - volatile
+    print(f"[ok] artifacts: {len(changed)} changed, {unchanged} unchanged, {volatile} volatile")
+    for path in changed:
+        print(f"  ~ {path}")
+
+    github_output = os.getenv("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as f:
+            f.write(f"artifacts_changed={'true' if changed else 'false'}\n")
+            f.write(f"changed_artifacts={' '.join(changed)}\n")
+    return changed
+
+
+# --- run lock ---
+
+
+@contextmanager
+def run_lock(path: Optional[Path] = None, timeout: float = DEFAULT_LOCK_TIMEOUT_S) -> Iterator[None]:
+    """
+    Exclusive advisory lock for a whole run. A second run waits up to
+    `timeout` seconds, then raises RunLockTimeout. The OS drops the lock if
+    the holder dies, so a crashed run never leaves it stuck.
+    """
+    path = path or LOCK_PATH
+    if fcntl is None:
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+") as f:
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise RunLockTimeout(f"another run still holds {path} after {timeout:g}s")
+                if not waiting:
+                    print(f"[warn] another run holds {path}; waiting")
+                    waiting = True
+                time.sleep(0.5)
+        try:
+            f.seek(0)
+            f.truncate()
+            f.write(f"{os.getpid()}\n")
+            f.flush()
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -1,5 +1,7 @@
 import os
 import subprocess
+import sys
+import time
 from datetime import datetime
 
 # ---------------------------------------------------------
@@ -30,39 +32,32 @@ if not api_key:
     exit(1)
 
 # ---------------------------------------------------------
-# 要运行的生成脚本列表
+# 要运行的生成任务（定义见 scripts/ai_jobs.py）
 # ---------------------------------------------------------
-scripts = [
-    "auto_policy.py",
-    "auto_news.py",
-    "auto_industry.py",
-    "auto_energy.py",
-]
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.ai_jobs import JOBS, run_jobs_sync
+from scripts.artifacts import report_changes
 
-print("════════════════════════════════════════════════════════════")
-print("🔍 Checking AI generation scripts...\n")
-
-for s in scripts:
-    script_path = os.path.join("scripts", s)
-    if os.path.exists(script_path):
-        print(f"✅ Found: {script_path}")
-    else:
-        print(f"❌ Missing: {script_path}")
-        exit(1)
+concurrency = int(os.getenv("UKED_AI_CONCURRENCY", "4"))
+rpm = float(os.getenv("UKED_AI_RPM", "60"))
 
 print("════════════════════════════════════════════════════════════")
+print(f"🚀 Running {len(JOBS)} AI generators concurrently: {', '.join(JOBS)}")
+print(f"   concurrency={concurrency}, rpm={rpm:g}")
+print("════════════════════════════════════════════════════════════\n")
 
 
 # ---------------------------------------------------------
-# 依次运行所有生成脚本
+# 同一进程内并发运行所有生成任务（共享一个 OpenAI 客户端）
 # ---------------------------------------------------------
-for script in scripts:
-    print(f"\n🚀 Running {script.replace('.py','').capitalize()} generator...")
-    print("════════════════════════════════════════════════════════════")
-
-    subprocess.run(["python3", os.path.join("scripts", script)], check=True)
-    print(f"✅ Finished {script.replace('.py','').capitalize()}\n")
+started = time.monotonic()
+results = run_jobs_sync(JOBS, concurrency=concurrency, rpm=rpm)
+failed = [name for name, result in results.items() if isinstance(result, BaseException)]
+if failed:
+    print(f"❌ Generator(s) failed: {', '.join(failed)} — skipping Git push.")
+    exit(1)
 
+print(f"\n⏱  All generators finished in {time.monotonic() - started:.1f}s")
 
 print("════════════════════════════════════════════════════════════")
 print(f"🎉 All AI content scripts completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -70,6 +65,9 @@ print("📝 Check new Markdown files under astro-site/src/content/")
 print("════════════════════════════════════════════════════════════")
 
 # ---------------------------------------------------------
-# 最后自动 Git push
+# 最后自动 Git push（内容没有变化时跳过）
 # ---------------------------------------------------------
-auto_git_push()
+if report_changes():
+    auto_git_push()
+else:
+    print("⏭  No content changed — skipping Git push.")
@@ -0,0 +1,254 @@
+"""
+Rebuild daily reports for a range of past dates.
+
+    python -m scripts.backfill 2025-01-01 2025-12-31 [--workers 8] [--force] [--offline]
+
+Every date is built from historical inputs rather than today's live data:
+
+- the Ofgem cap in force on that date (ofgem_history.py, plus the current
+  live cap from data/latest.json);
+- that day's Agile rates for every region, read from the local store
+  (agile_store.py). Days missing from the store are fetched first, in one
+  ranged, paginated request per region (skipped with --offline).
+
+Each date's inputs are hashed together with the report template and
+compared with data/backfill_state.json. Only dates whose hash changed are
+rendered, across a process pool. After a template or logic change every
+date is rebuilt; otherwise a rerun writes nothing.
+
+reports/YYYY-MM-DD.html, the reports manifest/index, ofgem_history.json,
+the chart series (agile_series.py) and the snapshot inlined into
+index.html are updated. data/latest.json is left to the daily run: its
+live Ofgem section is the fallback fetch_ofgem uses when a live fetch
+fails, and the cap backfill reads as current.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import zoneinfo
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from . import artifacts
+from .agile_series import update_series
+from .agile_store import AgileStore
+from .build_report import (
+    DATA_DIR,
+    INDEX_HTML,
+    REPORTS_DIR,
+    REPORT_CSS,
+    REPORT_TEMPLATE,
+    build_cap_history_with_current,
+    compute_cap_changes,
+    compute_typical_bill,
+    ensure_report_css,
+    render_daily_report,
+    report_context,
+)
+from .fetch_octopus import GSP_REGIONS, UK_TZ, ensure_agile_rates_async, summarize_agile_regions, uk_day_bounds
+from .http_client import make_async_client
+from .index_snapshot import write_snapshot
+from .ofgem_history import CapHistory, load_cap_history
+from .payloads import publish_json
+from .reports_index import add_reports, report_meta
+from .templating import TEMPLATES_DIR
+
+BACKFILL_STATE = DATA_DIR / "backfill_state.json"
+
+# Bump when report logic changes in a way the template hash cannot see.
+BACKFILL_FORMAT_VERSION = 1
+
+
+def _daterange(first: date, last: date) -> List[date]:
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _load_latest() -> Dict:
+    path = artifacts.source_path(DATA_DIR / "latest.json")
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _cap_timeline(current: Optional[Dict]) -> CapHistory:
+    """
+    Historical caps plus the current live one, oldest first. The live entry
+    replaces a history entry for the same period (it carries standing charges).
+    """
+    history = load_cap_history()
+    return history.with_cap(current) if current else history
+
+
+def _ofgem_for_cap(cap: Dict) -> Dict:
+    ofgem = {
+        "period": cap["period"],
+        "electricity_unit_avg": cap["electricity_unit_avg"],
+        "gas_unit_avg": cap["gas_unit_avg"],
+        "elec_standing_avg": cap.get("elec_standing_avg"),
+        "gas_standing_avg": cap.get("gas_standing_avg"),
+        "source": cap.get("source", "history"),
+    }
+    if cap.get("source_urls"):
+        ofgem["source_urls"] = cap["source_urls"]
+    return ofgem
+
+
+async def _fill_agile(first: date, last: date, regions: List[str], offline: bool) -> Dict[str, Dict[str, List[Dict]]]:
+    """{YYYY-MM-DD: {region: [rate, ...]}} for every UK-local day in the range."""
+    start, _ = uk_day_bounds(first)
+    _, end = uk_day_bounds(last)
+    tz = zoneinfo.ZoneInfo(UK_TZ)
+
+    by_day: Dict[str, Dict[str, List[Dict]]] = {}
+    with AgileStore() as store:
+        if not offline:
+            async with make_async_client() as client:
+                await ensure_agile_rates_async(client, store, start, end, regions)
+
+        for region in regions:
+            for row in store.query_range(region, start, end):
+                slot = datetime.fromisoformat(row["valid_from"].replace("Z", "+00:00"))
+                day_key = slot.astimezone(tz).date().isoformat()
+                by_day.setdefault(day_key, {}).setdefault(region, []).append(row)
+    return by_day
+
+
+def _template_fingerprint() -> str:
+    h = hashlib.sha256(str(BACKFILL_FORMAT_VERSION).encode())
+    for name in (REPORT_TEMPLATE, REPORT_CSS):
+        h.update((TEMPLATES_DIR / name).read_bytes())
+    return h.hexdigest()
+
+
+def _inputs_hash(fingerprint: str, inputs: Dict) -> str:
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256((fingerprint + payload).encode("utf-8")).hexdigest()
+
+
+def _render_job(job: Dict) -> Tuple[str, str, Dict[str, str]]:
+    """Worker: build and write one day's report. Returns (date, index meta, artifact result for the page)."""
+    ofgem = job["ofgem"]
+    agile = summarize_agile_regions(job["agile_raw"])
+    typical_bill = compute_typical_bill(ofgem)
+
+    context = report_context(
+        job["date"], job["generated_at"], ofgem, agile, typical_bill, job["cap_change"],
+        agile_day_label=job["date"],
+    )
+    path = render_daily_report(REPORTS_DIR / f"{job['date']}.html", context)
+    written = {str(path): artifacts.results()[str(path)]}
+    return job["date"], report_meta(ofgem, agile, typical_bill), written
+
+
+def backfill(
+    first: date,
+    last: date,
+    workers: Optional[int] = None,
+    force: bool = False,
+    offline: bool = False,
+) -> List[str]:
+    """Rebuild reports for first..last (inclusive); returns the dates that were written."""
+    latest = _load_latest()
+    current = latest.get("ofgem") if latest.get("ofgem", {}).get("source") in ("live", "live-cache") else None
+    if current:
+        current = {k: v for k, v in current.items() if k != "change"}
+    caps = _cap_timeline(current)
+    # change vs previous / peak period, once per cap rather than once per day
+    cap_changes = [compute_cap_changes(caps.caps[: i + 1]) for i in range(len(caps))]
+
+    regions = list(GSP_REGIONS)
+    agile_by_day = asyncio.run(_fill_agile(first, last, regions, offline))
+    # newly stored history feeds the chart series even if no report needs rebuilding
+    update_series(data_dir=DATA_DIR)
+
+    state: Dict[str, str] = {}
+    state_path = artifacts.source_path(BACKFILL_STATE)
+    if state_path.exists() and not force:
+        with state_path.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+
+    fingerprint = _template_fingerprint()
+    generated_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC") + " (backfill)"
+
+    jobs: List[Dict] = []
+    hashes: Dict[str, str] = {}
+    days = _daterange(first, last)
+    for d, i in zip(days, caps.indices_for_dates(days)):
+        if i < 0:
+            print(f"[skip] {d}: no Ofgem cap on record for this date")
+            continue
+
+        day = d.isoformat()
+        ofgem = _ofgem_for_cap(caps.caps[i])
+        cap_change = cap_changes[i]
+        agile_raw = {r: agile_by_day.get(day, {}).get(r, []) for r in regions}
+
+        digest = _inputs_hash(fingerprint, {"ofgem": ofgem, "cap_change": cap_change, "agile": agile_raw})
+        if state.get(day) == digest and artifacts.source_path(REPORTS_DIR / f"{day}.html").exists():
+            continue
+        hashes[day] = digest
+        jobs.append({
+            "date": day,
+            "generated_at": generated_at,
+            "ofgem": ofgem,
+            "cap_change": cap_change,
+            "agile_raw": agile_raw,
+        })
+
+    if not jobs:
+        print(f"[ok] backfill {first}..{last}: all reports up to date")
+        return []
+
+    ensure_report_css()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    written = [day for day, _, _ in results]
+    add_reports({day: meta for day, meta, _ in results})
+    for _, _, page in results:
+        artifacts.merge_results(page)
+
+    state.update(hashes)
+    artifacts.write_json(BACKFILL_STATE, state, indent=2, sort_keys=True)
+
+    # cap history for the chart (same as the daily run)
+    cap_history = build_cap_history_with_current(current or {})
+    publish_json(DATA_DIR / "ofgem_history.json", cap_history)
+
+    if latest:
+        write_snapshot(latest, cap_history, path=INDEX_HTML)
+
+    print(f"[ok] backfill {first}..{last}: wrote {len(written)} report(s) with {workers} worker(s)")
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild daily reports for past dates.")
+    parser.add_argument("first", type=date.fromisoformat, help="first date (YYYY-MM-DD)")
+    parser.add_argument("last", type=date.fromisoformat, nargs="?", help="last date (default: first)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore backfill_state.json and rebuild every date")
+    parser.add_argument("--offline", action="store_true", help="use only Agile rates already in the local store")
+    args = parser.parse_args(argv)
+
+    with artifacts.run_lock():
+        backfill(args.first, args.last or args.first, args.workers, args.force, args.offline)
+    artifacts.report_changes()
+
+
+if __name__ == "__main__":
+    main()
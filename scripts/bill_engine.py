@@ -0,0 +1,194 @@
+"""
+Vectorised bill engine: many households × many cap periods in one pass.
+
+Caps come from data/ofgem_history.json / the cap history store (unit rates in
+p/kWh, standing charges in £/day). cap_arrays() turns a list of caps into
+per-period NumPy vectors; bills() then prices any consumption arrays
+against every period by broadcasting:
+
+    elec = np.array([1800, 2700, 4100]); gas = np.array([7500, 11500, 17000])
+    b = bills(elec, gas)                 # b["dual"].shape == (periods, 3)
+
+    g = bill_grid(np.linspace(0, 8000, 200), np.linspace(0, 30000, 200))
+    g["dual"].shape == (periods, 200, 200)
+
+Monthly consumption works the same way with days=365/12 (see monthly_bills()).
+Periods with no published standing charge price to NaN rather than a
+guessed figure.
+
+    python -m scripts.bill_engine          # export data/bill_table.json
+
+writes a precomputed calculator table. A bill is electricity + gas, so the
+table stores each fuel's cost per grid point and period, and the dual-fuel
+bill for grid point (i, j) is elec_gbp[p][i] + gas_gbp[p][j]. That is exact
+and keeps the table small enough to ship (2 × periods × N values rather
+than periods × N²).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .artifacts import source_path
+from .ofgem_history import load_cap_history
+from .payloads import publish_json
+from .tracing import add_bytes
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY_PATH = ROOT / "data" / "ofgem_history.json"
+BILL_TABLE_PATH = ROOT / "data" / "bill_table.json"
+
+DAYS_PER_YEAR = 365.0
+
+# Default calculator grid (kWh/year).
+GRID_POINTS = 200
+GRID_MAX_ELEC_KWH = 8000.0
+GRID_MAX_GAS_KWH = 30000.0
+
+
+def default_caps() -> List[Dict]:
+    """data/ofgem_history.json (history + current cap) if present, else load_cap_history()."""
+    path = source_path(HISTORY_PATH)
+    if path.exists():
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                caps = json.load(f)
+            if caps:
+                return caps
+        except Exception:
+            pass
+    return load_cap_history().records()
+
+
+def _float_or_nan(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def cap_arrays(caps: Optional[Sequence[Dict]] = None) -> Dict:
+    """Caps → {"labels", "elec_unit_p", "gas_unit_p", "elec_standing_gbp", "gas_standing_gbp"} (one value per period)."""
+    caps = list(caps if caps is not None else default_caps())
+    return {
+        "labels": [c.get("label") or c.get("period") for c in caps],
+        "elec_unit_p": np.array([_float_or_nan(c.get("electricity_unit_avg")) for c in caps]),
+        "gas_unit_p": np.array([_float_or_nan(c.get("gas_unit_avg")) for c in caps]),
+        "elec_standing_gbp": np.array([_float_or_nan(c.get("elec_standing_avg")) for c in caps]),
+        "gas_standing_gbp": np.array([_float_or_nan(c.get("gas_standing_avg")) for c in caps]),
+    }
+
+
+def price(unit_p: np.ndarray, standing_gbp_day: np.ndarray, kwh: np.ndarray, days: float = DAYS_PER_YEAR) -> np.ndarray:
+    """
+    £ for kwh at unit_p (p/kWh) plus `days` of standing charge (£/day).
+    Plain broadcasting: shape the inputs so their axes line up.
+    """
+    return unit_p * kwh / 100.0 + standing_gbp_day * days
+
+
+def bills(
+    elec_kwh,
+    gas_kwh,
+    caps: Optional[Sequence[Dict]] = None,
+    days: float = DAYS_PER_YEAR,
+) -> Dict[str, np.ndarray]:
+    """
+    Price consumption arrays against every cap period.
+
+    elec_kwh and gas_kwh are broadcast together (e.g. both shape (N,) for N
+    households); results have shape (periods, *broadcast shape).
+    Returns {"labels", "elec", "gas", "dual"}.
+    """
+    arr = cap_arrays(caps)
+    elec_kwh, gas_kwh = np.broadcast_arrays(np.asarray(elec_kwh, dtype=np.float64),
+                                            np.asarray(gas_kwh, dtype=np.float64))
+    expand = (slice(None),) + (None,) * elec_kwh.ndim
+
+    elec = price(arr["elec_unit_p"][expand], arr["elec_standing_gbp"][expand], elec_kwh[None], days)
+    gas = price(arr["gas_unit_p"][expand], arr["gas_standing_gbp"][expand], gas_kwh[None], days)
+    return {"labels": arr["labels"], "elec": elec, "gas": gas, "dual": elec + gas}
+
+
+def monthly_bills(elec_kwh_month, gas_kwh_month, caps: Optional[Sequence[Dict]] = None) -> Dict[str, np.ndarray]:
+    """bills() for monthly consumption (standing charge for an average month)."""
+    return bills(elec_kwh_month, gas_kwh_month, caps, days=DAYS_PER_YEAR / 12.0)
+
+
+def bill_grid(
+    elec_values,
+    gas_values,
+    caps: Optional[Sequence[Dict]] = None,
+    days: float = DAYS_PER_YEAR,
+) -> Dict[str, np.ndarray]:
+    """
+    Every elec × gas combination against every period:
+    "elec" (P, E), "gas" (P, G) and "dual" (P, E, G).
+    """
+    arr = cap_arrays(caps)
+    e = np.asarray(elec_values, dtype=np.float64)
+    g = np.asarray(gas_values, dtype=np.float64)
+    elec = price(arr["elec_unit_p"][:, None], arr["elec_standing_gbp"][:, None], e[None, :], days)
+    gas = price(arr["gas_unit_p"][:, None], arr["gas_standing_gbp"][:, None], g[None, :], days)
+    return {
+        "labels": arr["labels"],
+        "elec_kwh": e,
+        "gas_kwh": g,
+        "elec": elec,
+        "gas": gas,
+        "dual": elec[:, :, None] + gas[:, None, :],
+    }
+
+
+def _rounded(arr: np.ndarray) -> List:
+    """2 dp nested lists with NaN → None, for JSON."""
+    out = np.round(arr, 2).astype(object)
+    out[np.isnan(arr)] = None
+    return out.tolist()
+
+
+def export_bill_table(
+    points: int = GRID_POINTS,
+    max_elec_kwh: float = GRID_MAX_ELEC_KWH,
+    max_gas_kwh: float = GRID_MAX_GAS_KWH,
+    caps: Optional[Sequence[Dict]] = None,
+    path: Optional[Path] = None,
+) -> Dict:
+    """Write the precomputed calculator table (see module docstring)."""
+    path = path or BILL_TABLE_PATH
+    grid = bill_grid(np.linspace(0, max_elec_kwh, points), np.linspace(0, max_gas_kwh, points), caps)
+    table = {
+        "periods": grid["labels"],
+        "elec_kwh": np.round(grid["elec_kwh"], 1).tolist(),
+        "gas_kwh": np.round(grid["gas_kwh"], 1).tolist(),
+        "elec_gbp": _rounded(grid["elec"]),
+        "gas_gbp": _rounded(grid["gas"]),
+        "note": "Annual £ per fuel; dual-fuel bill for (i, j) = elec_gbp[p][i] + gas_gbp[p][j].",
+    }
+    add_bytes(publish_json(path, table)["bytes"])
+    print(f"[ok] wrote {path}")
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export the precomputed bill calculator table.")
+    parser.add_argument("--points", type=int, default=GRID_POINTS)
+    parser.add_argument("--max-elec", type=float, default=GRID_MAX_ELEC_KWH)
+    parser.add_argument("--max-gas", type=float, default=GRID_MAX_GAS_KWH)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    grid = bill_grid(np.linspace(0, args.max_elec, args.points), np.linspace(0, args.max_gas, args.points))
+    elapsed = (time.perf_counter() - t0) * 1000
+    print(f"[ok] priced {grid['dual'].size:,} bills ({len(grid['labels'])} periods) in {elapsed:.1f} ms")
+    export_bill_table(args.points, args.max_elec, args.max_gas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Regional Ofgem price cap tables → region × payment method × fuel matrix.
+
+Ofgem publishes the cap unit rates and standing charges for every region
+and payment method on "Get energy price cap standing charges and unit
+rates by region". _CapTablesParser (html.parser, fed while the page
+streams in through http_cache) reads every table on that page, works out
+the payment method and fuel from the nearest heading / caption and the
+column headers, and maps region names to the GSP codes used everywhere
+else (fetch_octopus.GSP_REGIONS). Economy 7 / multi-rate tables are
+skipped: the matrix is for single-rate meters.
+
+matrix_bills() then prices every cell for the Ofgem low / medium / high
+typical consumption values in one NumPy broadcast, and write_cap_matrix()
+stores the lot in data/cap_matrix.json, shaped so the frontend can index
+it directly:
+
+{
+  "period": "1 Oct 2025 – 31 Dec 2025 (Ofgem default tariff cap)",
+  "regions": ["A", ...], "region_names": ["Eastern England", ...],
+  "payment_methods": ["direct_debit", "standard_credit", "prepayment"],
+  "fuels": ["electricity", "gas"],
+  "levels": ["low", "medium", "high"],
+  "consumption_kwh": [[1800, 7500], [2700, 11500], [4100, 17000]],
+  "unit_p":     [region][method][fuel]            p/kWh (null if not published)
+  "standing_p": [region][method][fuel]            p/day
+  "annual_gbp": [region][method][level] → [electricity, gas, dual fuel]
+}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from . import resilience
+from .artifacts import RUN_STAMP_RE, source_path
+from .bill_engine import price
+from .fetch_octopus import GSP_REGIONS
+from .fetch_ofgem import _period_from_groups
+from .http_cache import fetch_parsed
+from .payloads import publish_json
+from .tracing import add_bytes
+
+ROOT = Path(__file__).resolve().parent.parent
+CAP_MATRIX_PATH = ROOT / "data" / "cap_matrix.json"
+
+REGIONAL_RATES_URL = (
+    "https://www.ofgem.gov.uk/information-consumers/energy-advice-households/"
+    "get-energy-price-cap-standing-charges-and-unit-rates-region"
+)
+CAP_MATRIX_TTL_S = 6 * 60 * 60
+
+REGIONS: Tuple[str, ...] = tuple(GSP_REGIONS)
+PAYMENT_METHODS = ("direct_debit", "standard_credit", "prepayment")
+FUELS = ("electricity", "gas")
+
+# Ofgem typical domestic consumption values (kWh/year): electricity, gas
+CONSUMPTION_LEVELS: Dict[str, Tuple[int, int]] = {
+    "low": (1800, 7500),
+    "medium": (2700, 11500),
+    "high": (4100, 17000),
+}
+
+# Checked in order, so more specific names come first.
+_REGION_PATTERNS: List[Tuple[str, str]] = [
+    ("north wales", "D"), ("mersey", "D"),
+    ("east midlands", "B"), ("west midlands", "E"), ("midlands", "E"),
+    ("north east", "F"), ("north west", "G"),
+    ("south east", "J"), ("south west", "L"),
+    ("south wales", "K"), ("southern wales", "K"),
+    ("northern scotland", "P"), ("north scotland", "P"),
+    ("southern scotland", "N"), ("south scotland", "N"),
+    ("london", "C"), ("yorkshire", "M"),
+    ("southern", "H"), ("eastern", "A"), ("east england", "A"), ("east anglia", "A"),
+]
+
+_METHOD_PATTERNS = [
+    ("direct debit", "direct_debit"),
+    ("standard credit", "standard_credit"),
+    ("pay on receipt", "standard_credit"),
+    ("prepayment", "prepayment"),
+    ("pre-payment", "prepayment"),
+    ("prepay", "prepayment"),
+]
+
+_SKIP_CONTEXT = ("economy 7", "economy seven", "multi-rate", "multi-register", "off-peak", "night rate")
+
+_NUMBER_RE = re.compile(r"(£)?\s*(-?\d+(?:\.\d+)?)")
+_MONTH = r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+_PERIOD_RE = re.compile(
+    rf"(\d{{1,2}})\s+{_MONTH}(?:\s+\d{{4}})?\s+(?:to|and|–|-)\s+(\d{{1,2}})\s+{_MONTH}\s+(\d{{4}})",
+    re.IGNORECASE,
+)
+
+
+def region_code(name: str) -> Optional[str]:
+    """Ofgem region label → GSP code ("North West" → "G"); None for GB averages etc."""
+    n = re.sub(r"\s+", " ", name.lower().replace("&", "and")).strip()
+    for pattern, code in _REGION_PATTERNS:
+        if pattern in n:
+            return code
+    return None
+
+
+def _payment_method(text: str) -> Optional[str]:
+    t = text.lower()
+    for pattern, method in _METHOD_PATTERNS:
+        if pattern in t:
+            return method
+    return None
+
+
+def _fuel(text: str) -> Optional[str]:
+    t = text.lower()
+    if "electric" in t:
+        return "electricity"
+    if "gas" in t:
+        return "gas"
+    return None
+
+
+def _quantity(text: str) -> Optional[str]:
+    t = text.lower()
+    if "standing" in t or "p/day" in t or "per day" in t:
+        return "standing"
+    if "unit" in t or "kwh" in t:
+        return "unit"
+    return None
+
+
+def _pence(cell: str) -> Optional[float]:
+    m = _NUMBER_RE.search(cell.replace(",", ""))
+    if not m:
+        return None
+    value = float(m.group(2))
+    return value * 100.0 if m.group(1) else value
+
+
+def _empty_grid() -> List[List[List[Optional[float]]]]:
+    return [[[None for _ in FUELS] for _ in PAYMENT_METHODS] for _ in REGIONS]
+
+
+class _CapTablesParser(HTMLParser):
+    """
+    Streaming parser for the regional rates page, usable with
+    http_cache.fetch_parsed(): feed(text), close() -> dict.
+    """
+
+    _CONTEXT_TAGS = ("h1", "h2", "h3", "h4", "h5", "caption", "summary")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.unit_p = _empty_grid()
+        self.standing_p = _empty_grid()
+        self.period: Optional[str] = None
+        self._headings: Dict[int, str] = {}   # open heading text by level (h1..h5, summary=6)
+        self._context_tag: Optional[str] = None
+        self._context_buf: List[str] = []
+        self._table: Optional[Dict] = None
+        self._cell: Optional[List[str]] = None
+        self._text_tail = ""        # recent page text, for the period sentence
+
+    # --- HTMLParser hooks ---
+
+    def handle_starttag(self, tag, attrs):
+        if self.period is None:
+            self._text_tail += " "
+        if tag in self._CONTEXT_TAGS:
+            self._context_tag = tag
+            self._context_buf = []
+        elif tag == "table":
+            context = " ".join(self._headings[level] for level in sorted(self._headings))
+            self._table = {"context": context, "caption": "", "rows": [], "header": None}
+        elif self._table is not None and tag == "tr":
+            self._table["row"] = []
+            self._table["row_is_header"] = True
+        elif self._table is not None and tag in ("td", "th"):
+            self._cell = []
+            if tag == "td":
+                self._table["row_is_header"] = False
+
+    def handle_endtag(self, tag):
+        if self.period is None:
+            self._text_tail += " "
+        if tag == self._context_tag:
+            text = " ".join("".join(self._context_buf).split())
+            if tag == "caption":
+                if self._table is not None:
+                    self._table["caption"] = text
+            else:
+                # accordion <summary> labels sit below every heading level
+                level = 6 if tag == "summary" else int(tag[1])
+                self._headings = {k: v for k, v in self._headings.items() if k < level}
+                self._headings[level] = text
+            self._context_tag = None
+        elif self._table is not None and tag in ("td", "th") and self._cell is not None:
+            self._table["row"].append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif self._table is not None and tag == "tr" and "row" in self._table:
+            row = self._table.pop("row")
+            if self._table.pop("row_is_header") and self._table["header"] is None:
+                self._table["header"] = row
+            elif row:
+                self._table["rows"].append(row)
+        elif tag == "table" and self._table is not None:
+            self._finish_table(self._table)
+            self._table = None
+
+    def handle_data(self, data):
+        if self._context_tag:
+            self._context_buf.append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+        if self.period is None:
+            self._text_tail = (self._text_tail + data)[-400:]
+            m = _PERIOD_RE.search(" ".join(self._text_tail.split()))
+            if m:
+                try:
+                    self.period = _period_from_groups((*m.groups(), None))
+                except ValueError:
+                    pass
+
+    # --- table → matrix ---
+
+    def _finish_table(self, table: Dict) -> None:
+        context = f"{table['context']} {table['caption']}"
+        if any(s in context.lower() for s in _SKIP_CONTEXT):
+            return
+        header = table["header"]
+        if not header:
+            return
+
+        method = _payment_method(context)
+        columns = []  # (index, fuel, quantity, method)
+        for i, label in enumerate(header[1:], start=1):
+            quantity = _quantity(label)
+            fuel = _fuel(label) or _fuel(context)
+            col_method = _payment_method(label) or method
+            if quantity and fuel and col_method:
+                columns.append((i, fuel, quantity, col_method))
+        if not columns:
+            return
+
+        for row in table["rows"]:
+            code = region_code(row[0]) if row else None
+            if code is None:
+                continue
+            r = REGIONS.index(code)
+            for i, fuel, quantity, col_method in columns:
+                if i >= len(row):
+                    continue
+                value = _pence(row[i])
+                if value is None:
+                    continue
+                grid = self.unit_p if quantity == "unit" else self.standing_p
+                grid[r][PAYMENT_METHODS.index(col_method)][FUELS.index(fuel)] = round(value, 2)
+
+    # --- streaming interface ---
+
+    def close(self) -> Dict:  # type: ignore[override]
+        super().close()
+        complete = [
+            m for m, method in enumerate(PAYMENT_METHODS)
+            if all(self.unit_p[r][m][f] is not None for r in range(len(REGIONS)) for f in range(len(FUELS)))
+        ]
+        if not complete:
+            raise ValueError("No complete regional cap table (all regions, both fuels) found on Ofgem page.")
+        return {"period": self.period, "unit_p": self.unit_p, "standing_p": self.standing_p}
+
+
+def parse_cap_tables(html: str) -> Dict:
+    parser = _CapTablesParser()
+    parser.feed(html)
+    return parser.close()
+
+
+def _as_array(grid) -> np.ndarray:
+    return np.array([[[np.nan if v is None else v for v in fuels] for fuels in methods] for methods in grid], dtype=np.float64)
+
+
+def matrix_bills(unit_p: np.ndarray, standing_p: np.ndarray, consumption_kwh: np.ndarray) -> np.ndarray:
+    """
+    Annual bills (£) for every region × method × consumption level × fuel:
+    unit_p/standing_p are (R, M, F) in pence, consumption_kwh is (L, F).
+    Returns (R, M, L, F); missing rates give NaN.
+    """
+    return price(unit_p[:, :, None, :], standing_p[:, :, None, :] / 100.0, consumption_kwh[None, None, :, :])
+
+
+def _json_grid(arr: np.ndarray):
+    """ndarray → nested lists rounded to 2 dp, NaN → None."""
+    if arr.ndim == 0:
+        v = float(arr)
+        return None if np.isnan(v) else round(v, 2)
+    return [_json_grid(a) for a in arr]
+
+
+def build_cap_matrix(parsed: Dict, period_fallback: Optional[str] = None, source: str = "live") -> Dict:
+    unit = _as_array(parsed["unit_p"])
+    standing = _as_array(parsed["standing_p"])
+    kwh = np.array(list(CONSUMPTION_LEVELS.values()), dtype=np.float64)
+
+    bills = matrix_bills(unit, standing, kwh)                     # (R, M, L, F)
+    with_dual = np.concatenate([bills, bills.sum(axis=-1, keepdims=True)], axis=-1)
+
+    return {
+        "period": parsed.get("period") or period_fallback,
+        "source": source,
+        "generated_at_utc": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
+        "regions": list(REGIONS),
+        "region_names": [GSP_REGIONS[r] for r in REGIONS],
+        "payment_methods": list(PAYMENT_METHODS),
+        "fuels": list(FUELS),
+        "levels": list(CONSUMPTION_LEVELS),
+        "consumption_kwh": [list(v) for v in CONSUMPTION_LEVELS.values()],
+        "unit_p": parsed["unit_p"],
+        "standing_p": parsed["standing_p"],
+        "annual_gbp": _json_grid(with_dual),
+    }
+
+
+def load_previous_cap_matrix() -> Optional[Dict]:
+    """Last written data/cap_matrix.json (tables only), or None."""
+    path = source_path(CAP_MATRIX_PATH)
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            previous = json.load(f)
+        return {"period": previous.get("period"), "unit_p": previous["unit_p"],
+                "standing_p": previous["standing_p"], "source": "previous"}
+    except Exception:
+        return None
+
+
+async def fetch_cap_tables_async(client: httpx.AsyncClient, force_refresh: bool = False) -> Optional[Dict]:
+    """
+    Parsed regional tables from Ofgem (through the conditional-GET cache);
+    on any failure the previously written matrix, else None.
+    """
+    try:
+        parsed = await resilience.call("ofgem", lambda: fetch_parsed(
+            client, REGIONAL_RATES_URL, _CapTablesParser, ttl_s=CAP_MATRIX_TTL_S, force_refresh=force_refresh
+        ))
+        return {**parsed, "source": "live"}
+    except Exception as e:
+        print(f"[warn] Ofgem regional cap tables fetch failed: {e}; reusing previous cap_matrix.json if any.")
+        return load_previous_cap_matrix()
+
+
+def write_cap_matrix(
+    parsed: Optional[Dict],
+    period_fallback: Optional[str] = None,
+    path: Optional[Path] = None,
+) -> Optional[Dict]:
+    path = path or CAP_MATRIX_PATH
+    if not parsed:
+        print("[skip] no regional cap tables available; cap_matrix.json not updated")
+        return None
+    matrix = build_cap_matrix(parsed, period_fallback, parsed.get("source", "live"))
+    add_bytes(publish_json(path, matrix, ignore=RUN_STAMP_RE)["bytes"])
+    print(f"[ok] wrote {path}")
+    return matrix
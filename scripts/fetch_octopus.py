@@ -1,51 +1,211 @@
+from __future__ import annotations
+
+import asyncio
 import httpx
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
 import zoneinfo
 
+from .agile_analytics import day_window_summary
+from . import resilience
+from .agile_store import AGILE_PRODUCT, AgileStore
+from .http_client import make_async_client
+from .octopus_catalogue import FALLBACK_PRODUCT_CODES, OCTOPUS_API_BASE, product_code, product_since, tariff_code
+from .tracing import add_bytes, span
+
 UK_TZ = "Europe/London"
 
-# 示例 Agile 产品与费率代码
-# 如后续你用真实账户，可按 Octopus 官方文档替换为当前有效产品代码
-AGILE_PRODUCT_CODE = "AGILE-FLEX-22-11-25"
-AGILE_TARIFF_CODE = "E-1R-AGILE-FLEX-22-11-25-C"
+# Agile 产品代码：运行时由 octopus_catalogue 从 /products/ 自动解析（带磁盘缓存），
+# 这里只是目录尚无记录时的兜底值
+AGILE_PRODUCT_CODE = FALLBACK_PRODUCT_CODES[AGILE_PRODUCT]
+
+# 14 个 GSP 区域（电价按区域不同，费率代码末尾字母即区域）
+GSP_REGIONS = {
+    "A": "Eastern England",
+    "B": "East Midlands",
+    "C": "London",
+    "D": "Merseyside and North Wales",
+    "E": "West Midlands",
+    "F": "North Eastern England",
+    "G": "North Western England",
+    "H": "Southern England",
+    "J": "South Eastern England",
+    "K": "Southern Wales",
+    "L": "South Western England",
+    "M": "Yorkshire",
+    "N": "Southern Scotland",
+    "P": "Northern Scotland",
+}
+
+# API 单页最大条数（超出部分通过 "next" 分页）
+AGILE_PAGE_SIZE = 1500
+
+# 首页/报告标题数字沿用的默认区域（伦敦）
+AGILE_DEFAULT_REGION = "C"
+
+# 同时进行的区域请求上限，避免对 Octopus API 造成突发压力
+AGILE_REGION_CONCURRENCY = 4
+
+
+def agile_tariff_code(region: str) -> str:
+    """区域 Agile 费率代码（来自产品目录），例如 region "C" → "E-1R-AGILE-FLEX-22-11-25-C"。"""
+    return tariff_code(AGILE_PRODUCT, region)
+
+
+AGILE_TARIFF_CODE = agile_tariff_code(AGILE_DEFAULT_REGION)
+
+
+def _agile_rates_url(region: str) -> str:
+    return (
+        f"{OCTOPUS_API_BASE}/products/{product_code(AGILE_PRODUCT)}"
+        f"/electricity-tariffs/{agile_tariff_code(region)}/standard-unit-rates/"
+    )
+
+
+def uk_day_bounds(day: date, days: int = 1) -> Tuple[datetime, datetime]:
+    """英国本地日期 day 的 00:00 到 days 天后的 00:00，转换为 UTC（自动处理夏令时）。"""
+    tz = zoneinfo.ZoneInfo(UK_TZ)
+    start = datetime(day.year, day.month, day.day, tzinfo=tz)
+    end_day = day + timedelta(days=days)
+    end = datetime(end_day.year, end_day.month, end_day.day, tzinfo=tz)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def _today_bounds() -> Tuple[datetime, datetime]:
+    """今天（英国本地时间）00:00 到明天 00:00，转换为 UTC。"""
+    return uk_day_bounds(datetime.now(zoneinfo.ZoneInfo(UK_TZ)).date())
+
+
+async def _get_page(client: httpx.AsyncClient, url: str, params: Dict | None) -> Dict:
+    r = await client.get(url, params=params)
+    r.raise_for_status()
+    add_bytes(len(r.content))
+    return r.json()
+
+
+async def _get_all_pages(client: httpx.AsyncClient, url: str, params: Dict) -> List[Dict]:
+    """
+    读取分页结果直到最后一页。
+    Octopus 的 "next" 链接已包含全部查询参数，因此后续页不再附加 params。
+    每一页都经过 resilience.call()（重试、退避、对冲请求、熔断）。
+    """
+    results: List[Dict] = []
+    next_url, next_params = url, params
+    while next_url:
+        data = await resilience.call("octopus", lambda: _get_page(client, next_url, next_params))
+        results.extend(data.get("results", []))
+        next_url, next_params = data.get("next"), None
+
+    # API 按时间倒序返回，这里统一为正序
+    results.sort(key=lambda r: r["valid_from"])
+    return results
+
+
+async def _fill_region(
+    client: httpx.AsyncClient,
+    store: AgileStore,
+    region: str,
+    start: datetime,
+    end: datetime,
+) -> List[Dict]:
+    """
+    只请求本地库中缺失的区间，写入后从本地库读取 [start, end)。
+    每行记录来源产品代码；产品切换后，新产品上线以来存的旧产品电价也算缺失，会重新拉取替换。
+    """
+    with span(f"agile.{region}") as s:
+        added = 0
+        code = product_code(AGILE_PRODUCT)
+        try:
+            gaps = store.missing_intervals(region, start, end, product_code=code, since=product_since(AGILE_PRODUCT))
+            s.set(gaps=len(gaps))
+            for gap_from, gap_to in gaps:
+                params = {
+                    "period_from": gap_from.isoformat(),
+                    "period_to": gap_to.isoformat(),
+                    "page_size": AGILE_PAGE_SIZE,
+                }
+                rates = await _get_all_pages(client, _agile_rates_url(region), params)
+                added += store.append(region, rates, product_code=code)
+        except Exception as e:
+            # 网络失败时仍返回库中已有的数据
+            print(f"[warn] Agile region {region} fetch failed: {e}")
+            s.set(error=str(e))
+        s.set(new_rows=added)
+        return store.query_range(region, start, end)
+
+
+async def ensure_agile_rates_async(
+    client: httpx.AsyncClient,
+    store: AgileStore,
+    start: datetime,
+    end: datetime,
+    regions: Iterable[str] = GSP_REGIONS,
+    concurrency: int = AGILE_REGION_CONCURRENCY,
+) -> Dict[str, List[Dict]]:
+    """
+    保证本地库包含各区域 [start, end) 的数据（只补缺口），并返回 {region: [rate, ...]}。
+    同时最多 concurrency 个区域在请求。回填（backfill）与图表也走这里。
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(region: str) -> List[Dict]:
+        async with sem:
+            return await _fill_region(client, store, region, start, end)
+
+    regions = list(regions)
+    rates = await asyncio.gather(*(one(region) for region in regions))
+    return dict(zip(regions, rates))
+
+
+async def fetch_agile_rates_all_regions_async(
+    client: httpx.AsyncClient | None = None,
+    regions: Iterable[str] = GSP_REGIONS,
+    concurrency: int = AGILE_REGION_CONCURRENCY,
+    store: AgileStore | None = None,
+) -> Dict[str, List[Dict]]:
+    """
+    所有区域今天的 Agile 半小时电价（本地库已有的时段不再请求）。
+    返回 {region: [rate, ...]}；单个区域失败时返回库中已有部分（可能为 []）。
+    """
+    if client is None:
+        async with make_async_client() as own_client:
+            return await fetch_agile_rates_all_regions_async(own_client, regions, concurrency, store)
+
+    if store is None:
+        with AgileStore() as own_store:
+            return await fetch_agile_rates_all_regions_async(client, regions, concurrency, own_store)
+
+    start, end = _today_bounds()
+    return await ensure_agile_rates_async(client, store, start, end, regions, concurrency)
+
+
+async def fetch_agile_rates_for_today_async(client: httpx.AsyncClient | None = None) -> List[Dict]:
+    """
+    fetch_agile_rates_for_today() 的异步版本（默认区域）。
+    传入共享 client 可复用连接池；否则临时创建一个。
+    请求按 resilience 策略重试；仍失败时返回库中已有部分（可能为 []）
+    """
+    by_region = await fetch_agile_rates_all_regions_async(client, [AGILE_DEFAULT_REGION])
+    return by_region[AGILE_DEFAULT_REGION]
 
 
 def fetch_agile_rates_for_today() -> List[Dict]:
     """
-    拉取今天（英国本地时间）的 Octopus Agile 半小时电价。
+    拉取今天（英国本地时间）默认区域的 Octopus Agile 半小时电价。
     返回列表元素格式：
     {
       "valid_from": "...",
       "valid_to": "...",
       "value_inc_vat": 12.345
     }
-    若失败返回 []（上层逻辑会兜底）
-    """
-    try:
-        tz = zoneinfo.ZoneInfo(UK_TZ)
-        now_uk = datetime.now(tz)
-        start = now_uk.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = start + timedelta(days=1)
-
-        params = {
-            "period_from": start.astimezone(timezone.utc).isoformat(),
-            "period_to": end.astimezone(timezone.utc).isoformat(),
-            "page_size": 5000,
-        }
+    重试仍失败时返回库中已有部分（可能为 []，上层逻辑会兜底）
+    """
+    return asyncio.run(fetch_agile_rates_for_today_async())
 
-        base = "https://api.octopus.energy/v1"
-        url = (
-            f"{base}/products/{AGILE_PRODUCT_CODE}"
-            f"/electricity-tariffs/{AGILE_TARIFF_CODE}/standard-unit-rates/"
-        )
 
-        r = httpx.get(url, params=params, timeout=20.0)
-        r.raise_for_status()
-        data = r.json()
-        return data.get("results", [])
-    except Exception:
-        return []
+def fetch_agile_rates_all_regions() -> Dict[str, List[Dict]]:
+    """同步封装：一次拉取全部 14 个区域。"""
+    return asyncio.run(fetch_agile_rates_all_regions_async())
 
 
 def summarize_agile(rates: List[Dict]) -> Dict:
@@ -59,6 +219,8 @@ def summarize_agile(rates: List[Dict]) -> Dict:
             "low": None,
             "high": None,
             "cheapest_slots": [],
+            "cheapest_windows": [],
+            "stats": None,
         }
 
     prices = [float(r["value_inc_vat"]) for r in rates]
@@ -77,10 +239,41 @@ def summarize_agile(rates: List[Dict]) -> Dict:
             f"{frm} — {to} · {price:.2f} p/kWh"
         )
 
+    # 最便宜 / 最贵的连续 1–4 小时窗口及分位数（agile_analytics 向量化计算）
+    windows = day_window_summary(rates)
+
     return {
         "has_data": True,
         "avg": round(avg, 3),
         "low": round(low, 3),
         "high": round(high, 3),
         "cheapest_slots": cheapest_slots,
+        "cheapest_windows": windows["cheapest_windows"],
+        "stats": windows["stats"],
     }
+
+
+def summarize_agile_regions(rates_by_region: Dict[str, List[Dict]]) -> Dict:
+    """
+    汇总全部区域：
+    - 顶层字段（avg/low/high/cheapest_slots）沿用默认区域，兼容现有页面；
+    - "regions" 中给出每个区域的统计。
+    """
+    summary = summarize_agile(rates_by_region.get(AGILE_DEFAULT_REGION, []))
+    summary["region"] = AGILE_DEFAULT_REGION
+
+    regions: Dict[str, Dict] = {}
+    for region, name in GSP_REGIONS.items():
+        if region not in rates_by_region:
+            continue
+        s = summarize_agile(rates_by_region[region])
+        regions[region] = {
+            "name": name,
+            "has_data": s["has_data"],
+            "avg": s["avg"],
+            "low": s["low"],
+            "high": s["high"],
+            "cheapest_2h": next((w for w in s["cheapest_windows"] if w["hours"] == 2), None),
+        }
+    summary["regions"] = regions
+    return summary
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 
+from . import resilience
+from .artifacts import source_path
+from .http_cache import fetch_parsed
+from .http_client import make_async_client
+from .ofgem_history import record_cap
+
 """
 Fetch current Ofgem default tariff price cap (GB average, Direct Debit).
 
@@ -34,6 +41,10 @@ PRICE_CAP_EXPLAINED_URL = (
     "https://www.ofgem.gov.uk/information-consumers/energy-advice-households/energy-price-cap-explained"
 )
 
+# The cap changes once a quarter; within this window the cached parse is
+# reused without asking Ofgem at all (after it, a conditional GET is made).
+OFGEM_CACHE_TTL_S = 6 * 60 * 60
+
 # Static fallback (only used作为最后兜底)
 FALLBACK_CAP = {
     "period": "1 Oct 2025 – 31 Dec 2025 (Ofgem default tariff cap)",
@@ -46,6 +57,23 @@ FALLBACK_CAP = {
 }
 
 
+_PERIOD_RE = re.compile(
+    r"Between\s+(\d{1,2})\s+([A-Za-z]+)\s+and\s+(\d{1,2})\s+([A-Za-z]+)\s+(\d{4}),"
+    r"\s+the energy price cap is set at £\s*([\d,]+(?:\.\d+)?)\s*per year",
+    flags=re.IGNORECASE,
+)
+_ELEC_RE = re.compile(
+    r"Electricity\s+([\d\.]+)\s+pence per (?:kilowatt hour\s*\(kWh\)|kWh)"
+    r"\s+([\d\.]+)\s+pence daily standing charge",
+    flags=re.IGNORECASE,
+)
+_GAS_RE = re.compile(
+    r"Gas\s+([\d\.]+)\s+pence per (?:kilowatt hour\s*\(kWh\)|kWh)"
+    r"\s+([\d\.]+)\s+pence daily standing charge",
+    flags=re.IGNORECASE,
+)
+
+
 def _strip_tags(html: str) -> str:
     """Very small HTML → text cleaner."""
     html = re.sub(r"(?is)<(script|style).*?</\1>", " ", html)
@@ -54,23 +82,8 @@ def _strip_tags(html: str) -> str:
     return text.strip()
 
 
-def _parse_period(text: str) -> str:
-    """
-    Parse sentence like:
-      "Between 1 October and 31 December 2025, the energy price cap is set at £1,755 per year ..."
-    into:
-      "1 Oct 2025 – 31 Dec 2025 (Ofgem default tariff cap)"
-    """
-    m = re.search(
-        r"Between\s+(\d{1,2})\s+([A-Za-z]+)\s+and\s+(\d{1,2})\s+([A-Za-z]+)\s+(\d{4}),"
-        r"\s+the energy price cap is set at £\s*([\d,]+(?:\.\d+)?)\s*per year",
-        text,
-        flags=re.IGNORECASE,
-    )
-    if not m:
-        raise ValueError("Could not find 'Between ... the energy price cap is set at £...' sentence on Ofgem page.")
-
-    sd, sm, ed, em, year, _annual = m.groups()
+def _period_from_groups(groups) -> str:
+    sd, sm, ed, em, year, _annual = groups
     year_i = int(year)
 
     def parse_date(day: str, month: str) -> datetime:
@@ -89,6 +102,37 @@ def _parse_period(text: str) -> str:
     return f"{start_label} \u2013 {end_label} (Ofgem default tariff cap)"
 
 
+def _parse_period(text: str) -> str:
+    """
+    Parse sentence like:
+      "Between 1 October and 31 December 2025, the energy price cap is set at £1,755 per year ..."
+    into:
+      "1 Oct 2025 – 31 Dec 2025 (Ofgem default tariff cap)"
+    """
+    m = _PERIOD_RE.search(text)
+    if not m:
+        raise ValueError("Could not find 'Between ... the energy price cap is set at £...' sentence on Ofgem page.")
+    return _period_from_groups(m.groups())
+
+
+def _rates_from_pairs(elec_pair, gas_pair, elec_count: int, gas_count: int):
+    if not elec_count or not gas_count:
+        raise ValueError(
+            f"Failed to parse cap rates from Ofgem explained page "
+            f"(found Electricity={elec_count}, Gas={gas_count} pairs)."
+        )
+
+    elec_unit_s, elec_sc_s = elec_pair
+    gas_unit_s, gas_sc_s = gas_pair
+
+    elec_unit = float(elec_unit_s)
+    elec_sc_p = float(elec_sc_s)
+    gas_unit = float(gas_unit_s)
+    gas_sc_p = float(gas_sc_s)
+
+    return elec_unit, elec_sc_p, gas_unit, gas_sc_p
+
+
 def _parse_rates(text: str):
     """
     From the plain text of "Energy price cap explained", extract the latest:
@@ -102,36 +146,203 @@ def _parse_rates(text: str):
           "Gas <x> pence per kWh ... <y> pence daily standing charge"
       - The last pair for each is the current cap.
     """
-
-    elec_pattern = re.compile(
-        r"Electricity\s+([\d\.]+)\s+pence per (?:kilowatt hour\s*\(kWh\)|kWh)"
-        r"\s+([\d\.]+)\s+pence daily standing charge",
-        flags=re.IGNORECASE,
-    )
-    gas_pattern = re.compile(
-        r"Gas\s+([\d\.]+)\s+pence per (?:kilowatt hour\s*\(kWh\)|kWh)"
-        r"\s+([\d\.]+)\s+pence daily standing charge",
-        flags=re.IGNORECASE,
+    elec_matches = _ELEC_RE.findall(text)
+    gas_matches = _GAS_RE.findall(text)
+
+    return _rates_from_pairs(
+        elec_matches[-1] if elec_matches else None,
+        gas_matches[-1] if gas_matches else None,
+        len(elec_matches),
+        len(gas_matches),
     )
 
-    elec_matches = elec_pattern.findall(text)
-    gas_matches = gas_pattern.findall(text)
 
-    if not elec_matches or not gas_matches:
-        raise ValueError(
-            f"Failed to parse cap rates from Ofgem explained page "
-            f"(found Electricity={len(elec_matches)}, Gas={len(gas_matches)} pairs)."
-        )
+# --- Streaming extraction ---
+#
+# _CapStreamExtractor does _strip_tags + _parse_period + _parse_rates in one
+# pass over the response chunks as they arrive, without holding the page.
+#
+# A match is only accepted once it ends at least _MATCH_WINDOW characters
+# before the end of the text seen so far, so a sentence split across chunk
+# boundaries is never cut short. The sentences we look for are ~100 chars.
+_MATCH_WINDOW = 1024
 
-    elec_unit_s, elec_sc_s = elec_matches[-1]
-    gas_unit_s, gas_sc_s = gas_matches[-1]
+# Trim already-scanned text once the window grows past this many characters.
+_TRIM_AT = 64 * 1024
 
-    elec_unit = float(elec_unit_s)
-    elec_sc_p = float(elec_sc_s)
-    gas_unit = float(gas_unit_s)
-    gas_sc_p = float(gas_sc_s)
+_RAW_OPEN_RE = re.compile(r"<(script|style)", re.IGNORECASE)
+_RAW_CLOSE_RE = {
+    "script": re.compile(r"</script>", re.IGNORECASE),
+    "style": re.compile(r"</style>", re.IGNORECASE),
+}
+_WS_RE = re.compile(r"\s+")
 
-    return elec_unit, elec_sc_p, gas_unit, gas_sc_p
+
+class _TagStripper:
+    """
+    Incremental _strip_tags(): feed HTML chunks, get collapsed text back.
+
+    Mirrors the three regex passes as chained stages: drop <script>/<style>
+    blocks, replace remaining tags with a space, collapse whitespace.
+    Unfinished constructs (a tag without its ">", a raw block without its
+    closing tag) stay buffered until the next chunk.
+    """
+
+    def __init__(self):
+        self._raw_buf = ""    # stage 1 input not yet resolved
+        self._tag_buf = ""    # stage 2 input not yet resolved
+        self._started = False
+        self._pending_space = False
+
+    def _drop_raw_blocks(self, final: bool) -> str:
+        buf = self._raw_buf
+        out: List[str] = []
+        i = 0
+        while True:
+            m = _RAW_OPEN_RE.search(buf, i)
+            if not m:
+                # an opener may straddle the chunk boundary: hold back its length
+                keep = len(buf) if final else max(i, len(buf) - len("<script"))
+                out.append(buf[i:keep])
+                i = keep
+                break
+            out.append(buf[i:m.start()])
+            close = _RAW_CLOSE_RE[m.group(1).lower()].search(buf, m.end())
+            if close:
+                out.append(" ")
+                i = close.end()
+            elif final:
+                # never closed: the opener is ordinary text for the next stage
+                out.append("<")
+                i = m.start() + 1
+            else:
+                i = m.start()
+                break
+        self._raw_buf = buf[i:]
+        return "".join(out)
+
+    def _emit_text(self, seg: str, out: List[str]) -> None:
+        seg = _WS_RE.sub(" ", seg)
+        core = seg.strip(" ")
+        if not core:
+            if seg:
+                self._pending_space = True
+            return
+        if self._started and (self._pending_space or seg[0] == " "):
+            out.append(" ")
+        out.append(core)
+        self._started = True
+        self._pending_space = seg[-1] == " "
+
+    def feed(self, html: str, final: bool = False) -> str:
+        self._raw_buf += html
+        buf = self._tag_buf + self._drop_raw_blocks(final)
+        final = final and not self._raw_buf
+        n = len(buf)
+        out: List[str] = []
+        i = 0
+
+        while i < n:
+            lt = buf.find("<", i)
+            if lt < 0:
+                self._emit_text(buf[i:], out)
+                i = n
+                break
+            if lt > i:
+                self._emit_text(buf[i:lt], out)
+                i = lt
+
+            gt = buf.find(">", lt + 1)
+            if gt == lt + 1 or (gt < 0 and final):
+                # "<>" or a "<" that never closes is plain text
+                self._emit_text("<", out)
+                i = lt + 1
+                continue
+            if gt < 0:
+                break
+
+            self._pending_space = True
+            i = gt + 1
+
+        self._tag_buf = buf[i:]
+        return "".join(out)
+
+
+class _CapStreamExtractor:
+    """
+    Streaming equivalent of _summary_from_html().
+
+    feed(text_chunk) takes the next chunk; close() returns the summary dict
+    (or raises the same ValueError as the regex parsers). _parse_rates()
+    keeps the last rate pair on the whole page, so any later chunk can
+    still change the answer, so the whole page is scanned (only the
+    unscanned tail is held).
+    """
+
+    def __init__(self):
+        self._strip = _TagStripper()
+        self._text = ""
+        self._period: Optional[Tuple] = None
+        self._pos = {"period": 0, "elec": 0, "gas": 0}
+        self._last: Dict[str, Optional[Tuple]] = {"elec": None, "gas": None}
+        self._count = {"elec": 0, "gas": 0}
+
+    def _scan(self, final: bool) -> None:
+        text = self._text
+        limit = len(text) if final else len(text) - _MATCH_WINDOW
+        pos = dict(self._pos)
+        last = dict(self._last)
+        count = dict(self._count)
+        period = self._period
+
+        if period is None:
+            m = _PERIOD_RE.search(text, pos["period"])
+            if m and (final or m.end() <= limit):
+                period = m.groups()
+            elif m:
+                pos["period"] = m.start()
+            else:
+                pos["period"] = max(pos["period"], limit)
+
+        for key, pattern in (("elec", _ELEC_RE), ("gas", _GAS_RE)):
+            p = pos[key]
+            while True:
+                m = pattern.search(text, p)
+                if not m:
+                    p = max(p, limit)
+                    break
+                if not final and m.end() > limit:
+                    p = m.start()
+                    break
+                last[key] = m.groups()
+                count[key] += 1
+                p = m.end()
+            pos[key] = p
+
+        self._pos, self._last, self._count, self._period = pos, last, count, period
+
+    def _trim(self) -> None:
+        active = [v for k, v in self._pos.items() if not (k == "period" and self._period is not None)]
+        keep_from = min(active)
+        if keep_from < _TRIM_AT:
+            return
+        self._text = self._text[keep_from:]
+        self._pos = {k: v - keep_from for k, v in self._pos.items()}
+
+    def feed(self, chunk: str) -> None:
+        self._text += self._strip.feed(chunk)
+        self._scan(final=False)
+        self._trim()
+
+    def close(self) -> Dict:
+        self._text += self._strip.feed("", final=True)
+        self._scan(final=True)
+
+        if self._period is None:
+            raise ValueError("Could not find 'Between ... the energy price cap is set at £...' sentence on Ofgem page.")
+        period = _period_from_groups(self._period)
+        rates = _rates_from_pairs(self._last["elec"], self._last["gas"], self._count["elec"], self._count["gas"])
+        return _summary_from_parts(period, rates)
 
 
 def _try_load_previous_live() -> Dict | None:
@@ -140,7 +351,7 @@ def _try_load_previous_live() -> Dict | None:
     Returns a normalized summary dict or None.
     """
     root = Path(__file__).resolve().parents[1]
-    latest_path = root / "data" / "latest.json"
+    latest_path = source_path(root / "data" / "latest.json")
     if not latest_path.exists():
         return None
 
@@ -202,49 +413,96 @@ def _try_load_previous_live() -> Dict | None:
     }
 
 
-def fetch_ofgem_cap_summary() -> Dict:
+def _summary_from_parts(period: str, rates) -> Dict:
+    elec_unit, elec_sc_p, gas_unit, gas_sc_p = rates
+
+    elec_sc_gbp = round(elec_sc_p / 100.0, 2)
+    gas_sc_gbp = round(gas_sc_p / 100.0, 2)
+
+    return {
+        "period": period,
+        "electricity_unit_avg": round(elec_unit, 2),
+        "gas_unit_avg": round(gas_unit, 2),
+        "elec_standing_avg": elec_sc_gbp,
+        "gas_standing_avg": gas_sc_gbp,
+        "source": "live",
+        "source_urls": [PRICE_CAP_EXPLAINED_URL],
+    }
+
+
+def _summary_from_html(html: str) -> Dict:
+    """Parse the "Energy price cap explained" HTML into the summary dict (source=live)."""
+    text = _strip_tags(html)
+
+    period = _parse_period(text)
+    rates = _parse_rates(text)
+    return _summary_from_parts(period, rates)
+
+
+def fallback_cap_summary(reason: object) -> Dict:
     """
-    Public entrypoint used by build_report.py.
+    Summary to use when the live scrape failed or ran out of time:
+    previous live data from latest.json (source=live-cache), else FALLBACK_CAP.
+    """
+    print(f"Ofgem price cap fetch failed, trying cached latest.json. Reason: {reason}")
+    cached = _try_load_previous_live()
+    if cached:
+        print("Reusing previous live Ofgem cap from latest.json (source=live-cache).")
+        return cached
 
-    1. Try live scrape from Ofgem.
-    2. If fail → try reuse previous live data from latest.json (source=live-cache).
-    3. If still fail → use static FALLBACK_CAP.
+    print("Using static fallback Ofgem cap values.")
+    return FALLBACK_CAP.copy()
+
+
+async def fetch_ofgem_cap_summary_async(
+    client: httpx.AsyncClient | None = None,
+    force_refresh: bool = False,
+) -> Dict:
+    """
+    Async variant of fetch_ofgem_cap_summary().
+
+    Pass a shared client to reuse its connection pool; otherwise a
+    short-lived client is opened for this single request.
+    The page goes through the conditional-GET cache (http_cache.py), so an
+    unchanged page is not re-parsed; force_refresh=True bypasses it.
+    A changed page is parsed while it streams in (_CapStreamExtractor).
+    Transient failures are retried (resilience.py); a live period not yet
+    in data/cap_history.json is recorded there.
     """
     try:
-        with httpx.Client(follow_redirects=True, timeout=15.0) as client:
-            resp = client.get(PRICE_CAP_EXPLAINED_URL)
-            resp.raise_for_status()
-            text = _strip_tags(resp.text)
-
-        period = _parse_period(text)
-        elec_unit, elec_sc_p, gas_unit, gas_sc_p = _parse_rates(text)
-
-        elec_sc_gbp = round(elec_sc_p / 100.0, 2)
-        gas_sc_gbp = round(gas_sc_p / 100.0, 2)
-
-        return {
-            "period": period,
-            "electricity_unit_avg": round(elec_unit, 2),
-            "gas_unit_avg": round(gas_unit, 2),
-            "elec_standing_avg": elec_sc_gbp,
-            "gas_standing_avg": gas_sc_gbp,
-            "source": "live",
-            "source_urls": [PRICE_CAP_EXPLAINED_URL],
-        }
+        if client is None:
+            async with make_async_client(timeout=15.0) as own_client:
+                return await fetch_ofgem_cap_summary_async(own_client, force_refresh)
+
+        summary = await resilience.call("ofgem", lambda: fetch_parsed(
+            client,
+            PRICE_CAP_EXPLAINED_URL,
+            _CapStreamExtractor,
+            ttl_s=OFGEM_CACHE_TTL_S,
+            force_refresh=force_refresh,
+        ))
 
     except Exception as e:
-        print(f"Ofgem price cap fetch failed, trying cached latest.json. Reason: {e}")
-        cached = _try_load_previous_live()
-        if cached:
-            print("Reusing previous live Ofgem cap from latest.json (source=live-cache).")
-            return cached
+        return fallback_cap_summary(e)
 
-        print("Using static fallback Ofgem cap values.")
-        return FALLBACK_CAP.copy()
+    record_cap(summary)
+    return summary
+
+
+def fetch_ofgem_cap_summary(force_refresh: bool = False) -> Dict:
+    """
+    Public entrypoint used by build_report.py.
+
+    1. Try live scrape from Ofgem (via the conditional-GET cache, with retries).
+    2. If fail → try reuse previous live data from latest.json (source=live-cache).
+    3. If still fail → use static FALLBACK_CAP.
+    """
+    return asyncio.run(fetch_ofgem_cap_summary_async(force_refresh=force_refresh))
 
 
 if __name__ == "__main__":
     import json
+    import sys
 
-    data = fetch_ofgem_cap_summary()
+    data = fetch_ofgem_cap_summary(force_refresh="--refresh" in sys.argv)
     print(json.dumps(data, indent=2))
@@ -0,0 +1,105 @@
+"""
+Concurrent fetch stage for the daily pipeline.
+
+All upstream sources are fetched at the same time over one pooled
+httpx.AsyncClient, under a single overall deadline. A run therefore
+takes as long as the slowest source instead of the sum of all of them.
+
+Each source has a fallback used when it does not finish in time, so the
+report builder always gets the same dicts it got from the sequential
+fetchers:
+
+{
+  "ofgem": {...},        # fetch_ofgem_cap_summary() result
+  "agile_raw": {...},    # fetch_agile_rates_all_regions() result, keyed by GSP region
+  "cap_matrix": {...},   # regional cap tables (cap_matrix.py), or None
+  "catalogue": {...},    # refreshed Octopus product catalogue, or None if still fresh
+}
+
+The catalogue refresh (octopus_catalogue.py) runs beside the rate fetches
+rather than before them: this run uses the cached product codes, the next
+one picks up any change.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple
+
+import httpx
+
+from . import resilience
+from .cap_matrix import fetch_cap_tables_async, load_previous_cap_matrix
+from .fetch_octopus import fetch_agile_rates_all_regions_async
+from .fetch_ofgem import fallback_cap_summary, fetch_ofgem_cap_summary_async
+from .http_client import make_async_client
+from .octopus_catalogue import refresh_if_stale_async
+from .tracing import span
+
+# Overall wall-clock budget for the whole fetch stage (seconds).
+FETCH_DEADLINE_S = 30.0
+
+
+def _sources(client: httpx.AsyncClient) -> Dict[str, Tuple[Awaitable, Callable[[str], object]]]:
+    """name -> (coroutine using the shared client, fallback factory taking the failure reason)."""
+    return {
+        "ofgem": (
+            fetch_ofgem_cap_summary_async(client),
+            fallback_cap_summary,
+        ),
+        "agile_raw": (
+            fetch_agile_rates_all_regions_async(client),
+            lambda reason: {},
+        ),
+        "cap_matrix": (
+            fetch_cap_tables_async(client),
+            lambda reason: load_previous_cap_matrix(),
+        ),
+        "catalogue": (
+            refresh_if_stale_async(client),
+            lambda reason: None,
+        ),
+    }
+
+
+async def _traced_source(name: str, coro: Awaitable):
+    with span(f"fetch.{name}"):
+        return await coro
+
+
+async def fetch_sources_async(deadline: float = FETCH_DEADLINE_S) -> Dict:
+    """Fetch every source concurrently; sources still running at the deadline fall back."""
+    async with make_async_client() as client:
+        sources = _sources(client)
+        tasks = {
+            name: asyncio.create_task(_traced_source(name, coro))
+            for name, (coro, _) in sources.items()
+        }
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results: Dict = {}
+        for name, task in tasks.items():
+            if task in done and task.exception() is None:
+                results[name] = task.result()
+                continue
+
+            if task in done:
+                reason = resilience.describe(task.exception())
+                print(f"[warn] {name} fetch failed: {reason}; using fallback.")
+            else:
+                reason = f"fetch stage deadline ({deadline:.0f}s) exceeded"
+                print(f"[warn] {name} fetch did not finish within {deadline:.0f}s; using fallback.")
+            results[name] = sources[name][1](reason)
+
+        return results
+
+
+def fetch_sources(deadline: float = FETCH_DEADLINE_S) -> Dict:
+    """Blocking wrapper around fetch_sources_async() for the synchronous pipeline."""
+    with span("fetch", deadline_s=deadline):
+        return asyncio.run(fetch_sources_async(deadline))
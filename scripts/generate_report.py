@@ -1,6 +1,9 @@
-import json
 import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.artifacts import report_changes, run_lock, write_json
 
 # 模拟今日数据（后面可以改成抓 Ofgem 或 API）
 electricity = 25.73
@@ -24,7 +27,8 @@ os.makedirs(output_dir, exist_ok=True)
 
 # 保存 JSON 文件
 file_path = os.path.join(output_dir, f"{today}.json")
-with open(file_path, "w", encoding="utf-8") as f:
-    json.dump(report, f, indent=2)
+with run_lock():
+    changed = write_json(file_path, report, indent=2)
 
-print(f"✅ Report generated: {file_path}")
+print(f"✅ Report generated: {file_path}" if changed else f"✅ Report unchanged: {file_path}")
+report_changes()
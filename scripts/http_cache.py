@@ -0,0 +1,166 @@
+"""
+Small conditional-GET disk cache for pages we scrape and parse.
+
+For each URL we keep one JSON entry under data/cache/http/ (a scratch
+dir under the cassette dir in replay mode, see http_cassette.py):
+
+{
+  "url": "...",
+  "etag": "...",              # validators sent back as If-None-Match /
+  "last_modified": "...",     # If-Modified-Since on the next request
+  "body_sha256": "...",       # hash of the body the parsed result came from
+  "parsed": {...},            # output of the parse function
+  "fetched_at": 1731400000,   # when the body was last downloaded
+  "validated_at": 1731400000  # when upstream last confirmed it (200 or 304)
+}
+
+Lookup order in fetch_parsed():
+
+1. Entry validated within the TTL → return the parsed result, no request.
+2. Conditional GET; 304 → return the parsed result.
+3. 200 with the same body hash → return the parsed result.
+4. Otherwise stream the new body into the parser and store the result.
+
+Steps 1–3 never call the parse function. Set UKED_FORCE_REFRESH=1 (or
+pass force_refresh=True) to skip the cache and re-parse.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .http_cassette import runtime_path
+from .tracing import span
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = ROOT / "data" / "cache" / "http"
+
+FORCE_REFRESH_ENV = "UKED_FORCE_REFRESH"
+
+
+def force_refresh_requested() -> bool:
+    return os.getenv(FORCE_REFRESH_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def _entry_path(url: str) -> Path:
+    return runtime_path(CACHE_DIR) / (hashlib.sha256(url.encode("utf-8")).hexdigest()[:32] + ".json")
+
+
+def load_entry(url: str) -> Optional[Dict]:
+    path = _entry_path(url)
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except Exception:
+        return None
+    if entry.get("url") != url or "parsed" not in entry:
+        return None
+    return entry
+
+
+def save_entry(url: str, entry: Dict) -> None:
+    path = _entry_path(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _validators(resp: httpx.Response) -> Dict:
+    return {
+        "etag": resp.headers.get("etag"),
+        "last_modified": resp.headers.get("last-modified"),
+    }
+
+
+def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _reuse(url: str, entry: Dict, resp: httpx.Response, now: float) -> Dict:
+    """Upstream confirmed the cached body: refresh validators and return the cached parse."""
+    entry.update({k: v for k, v in _validators(resp).items() if v})
+    entry["validated_at"] = now
+    save_entry(url, entry)
+    return entry["parsed"]
+
+
+async def fetch_parsed(
+    client: httpx.AsyncClient,
+    url: str,
+    make_parser: Callable[[], Any],
+    ttl_s: float,
+    force_refresh: bool = False,
+) -> Dict:
+    """
+    Return the parsed result for url, reusing the cached result whenever
+    upstream says (or the body hash shows) that the page has not changed.
+
+    make_parser() must return a streaming parser with feed(text) and
+    close() -> dict. The body is fed to it chunk by chunk while being
+    hashed; on a hash hit the parser is dropped without close().
+
+    HTTP and parse errors propagate; the caller owns the fallback.
+    """
+    with span("http_cache", url=url) as s:
+        force_refresh = force_refresh or force_refresh_requested()
+        entry = None if force_refresh else load_entry(url)
+        now = time.time()
+
+        if entry and now - entry.get("validated_at", 0) < ttl_s:
+            s.set(result="ttl")
+            return entry["parsed"]
+
+        async with client.stream("GET", url, headers=conditional_headers(entry)) as resp:
+            if resp.status_code == 304 and entry:
+                s.set(result="not-modified")
+                return _reuse(url, entry, resp, now)
+            resp.raise_for_status()
+
+            parser = make_parser()
+            decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+            hasher = hashlib.sha256()
+            read = 0
+
+            # Parse while hashing: nothing is buffered, and a hash hit just
+            # discards the fresh parse in favour of the cached one.
+            async for chunk in resp.aiter_bytes():
+                hasher.update(chunk)
+                read += len(chunk)
+                parser.feed(decoder.decode(chunk))
+            s.add_bytes(read)
+
+            if entry and hasher.hexdigest() == entry.get("body_sha256"):
+                s.set(result="unchanged")
+                return _reuse(url, entry, resp, now)
+
+            parser.feed(decoder.decode(b"", final=True))
+            parsed = parser.close()
+            s.set(result="parsed")
+
+        save_entry(url, {
+            "url": url,
+            **_validators(resp),
+            "body_sha256": hasher.hexdigest(),
+            "parsed": parsed,
+            "fetched_at": now,
+            "validated_at": now,
+        })
+        return parsed
@@ -0,0 +1,246 @@
+"""
+Record / replay of upstream HTTP exchanges ("cassettes") for offline runs.
+
+make_async_client() picks the transport from UKED_HTTP_MODE:
+
+    live    (default) real network
+    record  real network; every response is also saved to the cassette dir
+    replay  no network; responses come from the cassette dir
+
+so every fetcher (fetch_ofgem, fetch_octopus, cap_matrix, tariff_compare)
+records and replays without changes. The cassette dir is data/cassettes/
+unless UKED_CASSETTE_DIR is set. One JSON file per request:
+
+    data/cassettes/<host>/<path>/<query hash>.json
+    {"request": {"method", "url"}, "response": {"status", "headers", "text" | "base64"}, "recorded_at"}
+
+Recording drops conditional headers (If-None-Match / If-Modified-Since), so
+a cassette always holds a full body even when the HTTP cache had the page.
+In replay, a request whose exact URL (query included) was never recorded
+gets a 404 that the fetchers treat like any other upstream error: a
+recording for another period_from is never served as today's rates.
+
+Replayed responses must not mix with live state either. runtime_path()
+moves the rate store, the HTTP cache, the product catalogue, the tariff
+comparison cache and the breaker state to <cassette dir>/_state/ during
+replay, and artifacts.py sends everything the run publishes (data/,
+reports/, index.html) there too, under the same relative paths.
+
+Fault injection for the fallback paths (replay only):
+
+    UKED_REPLAY_LATENCY_MS   fixed ("150") or uniform range ("50-400") per request
+    UKED_REPLAY_ERROR_RATE   0..1, share of requests that fail
+    UKED_REPLAY_ERROR        503 (any status), "timeout" or "connect"; default 503
+    UKED_REPLAY_SEED         seed for the latency / error draws
+
+    python run_daily.py --http record
+    python run_daily.py --http replay
+    UKED_REPLAY_ERROR_RATE=1 python run_daily.py --http replay    # every fallback path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CASSETTE_DIR = ROOT / "data" / "cassettes"
+
+HTTP_MODE_ENV = "UKED_HTTP_MODE"
+CASSETTE_DIR_ENV = "UKED_CASSETTE_DIR"
+LATENCY_ENV = "UKED_REPLAY_LATENCY_MS"
+ERROR_RATE_ENV = "UKED_REPLAY_ERROR_RATE"
+ERROR_ENV = "UKED_REPLAY_ERROR"
+SEED_ENV = "UKED_REPLAY_SEED"
+
+MODES = ("live", "record", "replay")
+
+# runtime state written during replay goes here, under the cassette dir
+SCRATCH_DIR_NAME = "_state"
+
+# response headers worth keeping; encoding / length no longer match the decoded body
+KEEP_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "retry-after")
+
+_CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+def http_mode() -> str:
+    mode = os.getenv(HTTP_MODE_ENV, "live").strip().lower() or "live"
+    if mode not in MODES:
+        raise ValueError(f"{HTTP_MODE_ENV}={mode!r}; expected one of {', '.join(MODES)}")
+    return mode
+
+
+def cassette_dir() -> Path:
+    value = os.getenv(CASSETTE_DIR_ENV, "").strip()
+    return Path(value) if value else DEFAULT_CASSETTE_DIR
+
+
+def runtime_path(path: Path) -> Path:
+    """
+    `path`, or in replay mode its scratch stand-in: <cassette dir>/_state/
+    plus the path relative to the repo root (data/latest.json →
+    _state/data/latest.json). Paths already under _state/ are returned as is.
+    """
+    if http_mode() != "replay":
+        return path
+    path = Path(path)
+    scratch = cassette_dir() / SCRATCH_DIR_NAME
+    resolved = path.resolve()
+    try:
+        resolved.relative_to(scratch.resolve())
+        return path
+    except ValueError:
+        pass
+    try:
+        return scratch / resolved.relative_to(ROOT)
+    except ValueError:
+        return scratch / path.name
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_")[:120] or "_"
+
+
+def cassette_path(root: Path, request: httpx.Request) -> Path:
+    """<root>/<host>/<path slug>/<hash of method + sorted query>.json"""
+    url = request.url
+    query = "&".join(sorted(f"{k}={v}" for k, v in url.params.multi_items()))
+    digest = hashlib.sha256(f"{request.method} {query}".encode("utf-8")).hexdigest()[:16]
+    return root / _slug(url.host) / _slug(url.path) / f"{digest}.json"
+
+
+def _dump_response(request: httpx.Request, status: int, headers: httpx.Headers, body: bytes) -> Dict:
+    response: Dict = {
+        "status": status,
+        "headers": {k: headers[k] for k in KEEP_HEADERS if k in headers},
+    }
+    try:
+        response["text"] = body.decode("utf-8")
+    except UnicodeDecodeError:
+        response["base64"] = base64.b64encode(body).decode("ascii")
+    return {
+        "request": {"method": request.method, "url": str(request.url)},
+        "response": response,
+        "recorded_at": int(time.time()),
+    }
+
+
+def _load_response(path: Path, request: httpx.Request) -> httpx.Response:
+    with path.open("r", encoding="utf-8") as f:
+        saved = json.load(f)["response"]
+    body = saved["text"].encode("utf-8") if "text" in saved else base64.b64decode(saved.get("base64", ""))
+    return httpx.Response(saved["status"], headers=saved.get("headers", {}), content=body, request=request)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to `inner` and saves each response as a cassette."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, root: Path):
+        self.inner = inner
+        self.root = root
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for name in _CONDITIONAL_HEADERS:
+            request.headers.pop(name, None)
+        upstream = await self.inner.handle_async_request(request)
+        try:
+            body = await upstream.aread()   # decoded (gzip / br) body
+        finally:
+            await upstream.aclose()
+
+        path = cassette_path(self.root, request)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(_dump_response(request, upstream.status_code, upstream.headers, body), indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+        return _load_response(path, request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def _parse_latency(value: str) -> Tuple[float, float]:
+    """"150" → (0.15, 0.15); "50-400" → (0.05, 0.4) seconds."""
+    if not value.strip():
+        return 0.0, 0.0
+    lo, _, hi = value.partition("-")
+    lo_s = float(lo) / 1000.0
+    return lo_s, float(hi) / 1000.0 if hi else lo_s
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded cassettes; optional latency and injected failures."""
+
+    def __init__(
+        self,
+        root: Path,
+        latency_s: Tuple[float, float] = (0.0, 0.0),
+        error_rate: float = 0.0,
+        error: str = "503",
+        seed: Optional[int] = None,
+    ):
+        self.root = root
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.error = error
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls, root: Path) -> "ReplayTransport":
+        seed = os.getenv(SEED_ENV, "").strip()
+        return cls(
+            root,
+            latency_s=_parse_latency(os.getenv(LATENCY_ENV, "")),
+            error_rate=float(os.getenv(ERROR_RATE_ENV, "0") or 0),
+            error=os.getenv(ERROR_ENV, "503").strip().lower() or "503",
+            seed=int(seed) if seed else None,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        lo, hi = self.latency_s
+        if hi > 0:
+            await asyncio.sleep(self._rng.uniform(lo, hi))
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            if self.error == "timeout":
+                raise httpx.ReadTimeout("injected timeout (replay)", request=request)
+            if self.error == "connect":
+                raise httpx.ConnectError("injected connection error (replay)", request=request)
+            return httpx.Response(int(self.error), text="injected error (replay)", request=request)
+
+        path = cassette_path(self.root, request)
+        if not path.exists():
+            print(f"[warn] no cassette for {request.method} {request.url}")
+            return httpx.Response(404, text="no cassette recorded", request=request)
+        return _load_response(path, request)
+
+
+def transport_for_mode(
+    inner: Optional[httpx.AsyncBaseTransport],
+    make_live: Callable[[], httpx.AsyncBaseTransport],
+) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Transport for the current UKED_HTTP_MODE: None (live, client default)
+    unless `inner` was given, a RecordingTransport around `inner` (or
+    make_live()), or a ReplayTransport.
+    """
+    mode = http_mode()
+    if mode == "record":
+        return RecordingTransport(inner or make_live(), cassette_dir())
+    if mode == "replay":
+        return ReplayTransport.from_env(cassette_dir())
+    return inner
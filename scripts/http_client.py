@@ -0,0 +1,40 @@
+"""
+Shared httpx client settings for the upstream fetchers (Ofgem, Octopus).
+
+All fetchers accept an optional ``httpx.AsyncClient`` so a single pooled
+client can be reused for every request in a run (see fetch_stage.py).
+When no client is passed they open a short-lived one from here.
+
+UKED_HTTP_MODE=record / replay swaps in the cassette transports
+(http_cassette.py) for every client made here.
+"""
+
+from __future__ import annotations
+
+import httpx
+
+from .http_cassette import transport_for_mode
+
+# Per-request timeout; the overall run deadline lives in fetch_stage.py.
+DEFAULT_TIMEOUT = httpx.Timeout(20.0, connect=10.0)
+
+# One pool shared by every source. Octopus and Ofgem are different hosts,
+# so a handful of keep-alive connections covers a whole run.
+POOL_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+
+
+def make_async_client(**overrides) -> httpx.AsyncClient:
+    """Create an AsyncClient with the project defaults (redirects, timeout, pool)."""
+    opts = {
+        "follow_redirects": True,
+        "timeout": DEFAULT_TIMEOUT,
+        "limits": POOL_LIMITS,
+    }
+    opts.update(overrides)
+    transport = transport_for_mode(
+        opts.pop("transport", None),
+        lambda: httpx.AsyncHTTPTransport(limits=opts["limits"]),
+    )
+    if transport is not None:
+        opts["transport"] = transport
+    return httpx.AsyncClient(**opts)
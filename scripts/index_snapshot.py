@@ -0,0 +1,113 @@
+"""
+Inline data snapshot for the dashboard (index.html).
+
+Without it the page paints "--" and then waits for data/manifest.json,
+data/latest.json and data/ofgem_history.json before showing a number.
+Every run now rewrites two marked blocks inside index.html:
+
+    <!-- snapshot:cards -->  ...  <!-- /snapshot:cards -->
+        the headline cards (electricity / gas averages, cap period, typical
+        bill) pre-rendered from templates/index_cards.html
+
+    <!-- snapshot:data -->  ...  <!-- /snapshot:data -->
+        <script id="snapshot" type="application/json"> with the few fields
+        the page scripts need (headline numbers + the last cap periods for
+        the chart), minified
+
+so first paint needs nothing but the document. The page only fetches
+latest.json / ofgem_history.json when the snapshot is missing or older
+than today's date (a page served from a stale cache).
+
+Everything outside the markers is left alone; the file goes through the
+output layer, so an unchanged snapshot does not touch index.html.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .artifacts import source_path, write_text
+from .templating import load_template
+
+ROOT = Path(__file__).resolve().parent.parent
+INDEX_HTML = ROOT / "index.html"
+
+CARDS_TEMPLATE = "index_cards.html"
+
+# cap periods shown on the dashboard chart
+HISTORY_POINTS = 5
+
+_BLOCK_RE = re.compile(
+    r"^(?P<indent>[ \t]*)<!-- snapshot:(?P<name>[a-z]+) -->\n.*?^[ \t]*<!-- /snapshot:(?P=name) -->",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def snapshot_data(latest: Dict, history: List[Dict]) -> Dict:
+    """The subset of latest.json / ofgem_history.json the page renders from."""
+    ofgem = latest.get("ofgem") or {}
+    bill = latest.get("typical_bill") or {}
+    data: Dict = {
+        "date": latest.get("date"),
+        "ofgem": {k: ofgem.get(k) for k in ("period", "electricity_unit_avg", "gas_unit_avg")},
+        "history": [
+            {k: h.get(k) for k in ("label", "electricity_unit_avg", "gas_unit_avg")}
+            for h in history[-HISTORY_POINTS:]
+        ],
+    }
+    if bill:
+        data["typical_bill"] = {k: bill.get(k) for k in ("dual_annual_gbp", "dual_monthly_gbp")}
+    return data
+
+
+def render_cards(snapshot: Dict) -> str:
+    ofgem = snapshot["ofgem"]
+    return load_template(CARDS_TEMPLATE).render({
+        "elec": ofgem.get("electricity_unit_avg") or 0,
+        "gas": ofgem.get("gas_unit_avg") or 0,
+        "period": ofgem.get("period") or "Unknown period",
+        "bill": snapshot.get("typical_bill"),
+    })
+
+
+def render_data(snapshot: Dict) -> str:
+    # "</" cannot appear inside a <script> element; "<\/" is the same JSON string
+    payload = json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False).replace("</", "<\\/")
+    return f'<script id="snapshot" type="application/json">{payload}</script>\n'
+
+
+def inject(html: str, blocks: Dict[str, str]) -> str:
+    """Replace the body of each marked block, re-indented to its markers."""
+    found = set()
+
+    def replace(m: re.Match) -> str:
+        name, indent = m.group("name"), m.group("indent")
+        if name not in blocks:
+            return m.group(0)
+        found.add(name)
+        body = "".join(f"{indent}{line}\n" if line else "\n" for line in blocks[name].splitlines())
+        return f"{indent}<!-- snapshot:{name} -->\n{body}{indent}<!-- /snapshot:{name} -->"
+
+    html = _BLOCK_RE.sub(replace, html)
+    missing = set(blocks) - found
+    if missing:
+        raise ValueError(f"snapshot markers not found: {', '.join(sorted(missing))}")
+    return html
+
+
+def write_snapshot(latest: Dict, history: List[Dict], path: Optional[Path] = None) -> bool:
+    """Inline the snapshot into index.html; True if the file changed."""
+    path = path or INDEX_HTML
+    source = source_path(path)
+    if not source.exists():
+        print(f"[skip] {path} not found; no snapshot inlined")
+        return False
+    snapshot = snapshot_data(latest, history)
+    html = inject(source.read_text(encoding="utf-8"), {
+        "cards": render_cards(snapshot),
+        "data": render_data(snapshot),
+    })
+    return write_text(path, html)
@@ -0,0 +1,177 @@
+"""
+Content-addressed disk cache for LLM completions.
+
+A completion is keyed by sha256 of (model, messages, temperature, bucket),
+where the bucket is a freshness window: "day" (the default, YYYY-MM-DD),
+"week" (ISO week) or "forever". Same prompt, same day → same key, so a
+rerun of auto_all.py or a retry of one failed job reuses every completion
+that already succeeded and costs no API time or tokens.
+
+One JSON file per key under data/cache/llm/:
+
+{
+  "key": "...",
+  "model": "gpt-4o-mini",
+  "bucket": "2025-11-14",
+  "content": "...",          # assistant message text
+  "usage": {...},            # token usage reported with the original call
+  "created_at": 1731400000
+}
+
+Hits and misses are counted per process (LLMCache.stats) and added to
+data/cache/llm/stats.json per day. evict() removes entries older than
+max_age and then the oldest entries until the cache fits in max_bytes.
+
+Environment:
+  UKED_LLM_CACHE=0                    disable the cache
+  UKED_FORCE_REFRESH=1                ignore cached entries (new results are still stored)
+  UKED_LLM_CACHE_MAX_AGE_DAYS=14      eviction age
+  UKED_LLM_CACHE_MAX_BYTES=20000000   eviction size
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .http_cache import force_refresh_requested
+
+ROOT = Path(__file__).resolve().parent.parent
+LLM_CACHE_DIR = ROOT / "data" / "cache" / "llm"
+STATS_FILE = "stats.json"
+
+CACHE_ENV = "UKED_LLM_CACHE"
+MAX_AGE_ENV = "UKED_LLM_CACHE_MAX_AGE_DAYS"
+MAX_BYTES_ENV = "UKED_LLM_CACHE_MAX_BYTES"
+
+DEFAULT_MAX_AGE_S = 14 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 20 * 1000 * 1000
+
+BUCKETS = ("day", "week", "forever")
+
+
+def cache_enabled() -> bool:
+    return os.getenv(CACHE_ENV, "1").strip().lower() not in ("0", "false", "no")
+
+
+def freshness_bucket(freshness: str = "day", now: Optional[datetime] = None) -> str:
+    now = now or datetime.now()
+    if freshness == "day":
+        return now.strftime("%Y-%m-%d")
+    if freshness == "week":
+        year, week, _ = now.isocalendar()
+        return f"{year}-W{week:02d}"
+    if freshness == "forever":
+        return ""
+    raise ValueError(f"unknown cache bucket {freshness!r} (expected one of {', '.join(BUCKETS)})")
+
+
+def cache_key(model: str, messages: List[Dict], temperature: float, bucket: str) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "bucket": bucket},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Disk cache of completions; one instance per run keeps the hit/miss counts."""
+
+    def __init__(self, directory: Path | str = LLM_CACHE_DIR, enabled: Optional[bool] = None):
+        self.dir = Path(directory)
+        self.enabled = cache_enabled() if enabled is None else enabled
+        self.read_enabled = self.enabled and not force_refresh_requested()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached entry for key, or None. Counts a hit or a miss."""
+        entry = None
+        if self.read_enabled:
+            path = self._path(key)
+            if path.exists():
+                try:
+                    with path.open("r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                except Exception:
+                    entry = None
+                if entry is not None and (entry.get("key") != key or "content" not in entry):
+                    entry = None
+        self.stats["hits" if entry is not None else "misses"] += 1
+        return entry
+
+    def put(self, key: str, model: str, bucket: str, content: str, usage: Optional[Dict] = None) -> None:
+        if not self.enabled:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "key": key,
+            "model": model,
+            "bucket": bucket,
+            "content": content,
+            "usage": usage,
+            "created_at": time.time(),
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def record_stats(self) -> Dict:
+        """Add this run's hits/misses to stats.json (per day) and return the run's counts."""
+        if not self.enabled or not (self.stats["hits"] or self.stats["misses"]):
+            return dict(self.stats)
+        path = self.dir / STATS_FILE
+        totals: Dict[str, Dict[str, int]] = {}
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    totals = json.load(f)
+            except Exception:
+                totals = {}
+        day = totals.setdefault(datetime.now().strftime("%Y-%m-%d"), {"hits": 0, "misses": 0})
+        day["hits"] += self.stats["hits"]
+        day["misses"] += self.stats["misses"]
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(totals, indent=2, sort_keys=True), encoding="utf-8")
+        return dict(self.stats)
+
+    def evict(self, max_age_s: Optional[float] = None, max_bytes: Optional[int] = None) -> int:
+        """
+        Drop entries older than max_age_s, then the oldest entries until the
+        total size is at most max_bytes. Defaults come from the environment.
+        Returns the number of entries removed.
+        """
+        if not self.dir.exists():
+            return 0
+        if max_age_s is None:
+            max_age_s = float(os.getenv(MAX_AGE_ENV, DEFAULT_MAX_AGE_S / 86400)) * 86400
+        if max_bytes is None:
+            max_bytes = int(os.getenv(MAX_BYTES_ENV, DEFAULT_MAX_BYTES))
+
+        entries = []
+        for path in self.dir.glob("*.json"):
+            if path.name == STATS_FILE:
+                continue
+            st = path.stat()
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+
+        now = time.time()
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if now - mtime <= max_age_s and total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
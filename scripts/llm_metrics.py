@@ -0,0 +1,227 @@
+"""
+Latency, token and cost records for OpenAI chat completions.
+
+InstrumentedClient wraps an AsyncOpenAI client. Every completion goes
+through complete(), which streams the response (with include_usage, so
+token counts still arrive) and appends one line to data/llm_calls.jsonl:
+
+{"ts": 1731400000.0, "day": "2025-11-14", "job": "news", "model": "gpt-4o-mini",
+ "ok": true, "cached": false, "wall_s": 6.41, "ttft_s": 0.82,
+ "prompt_tokens": 180, "completion_tokens": 640, "cost_usd": 0.000411}
+
+Cache hits are logged too (cached: true, no tokens, no cost) so the spend
+trend shows what the cache saved.
+
+    python -m scripts.llm_metrics              # p50/p95 per job + daily spend
+    python -m scripts.llm_metrics --days 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+CALLS_LOG = ROOT / "data" / "llm_calls.jsonl"
+
+# USD per 1M tokens (input, output).
+PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    price = PRICING.get(model)
+    if price is None:
+        return None
+    return round((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000, 6)
+
+
+def append_record(record: Dict, path: Path = CALLS_LOG) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def _record(job: str, model: str, **fields) -> Dict:
+    now = time.time()
+    record = {
+        "ts": round(now, 3),
+        "day": datetime.fromtimestamp(now).strftime("%Y-%m-%d"),
+        "job": job,
+        "model": model,
+        "ok": True,
+        "cached": False,
+        "wall_s": None,
+        "ttft_s": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "cost_usd": None,
+    }
+    record.update(fields)
+    return record
+
+
+class InstrumentedClient:
+    """Thin wrapper that times and costs every chat completion it makes."""
+
+    def __init__(self, client, log_path: Path = CALLS_LOG):
+        self.client = client
+        self.log_path = log_path
+
+    async def complete(self, job: str, model: str, messages: List[Dict], temperature: float) -> Tuple[str, Optional[Dict]]:
+        """Stream one completion; returns (content, usage dict or None) and logs the call."""
+        started = time.perf_counter()
+        ttft = None
+        parts: List[str] = []
+        usage = None
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage.model_dump()
+                for choice in chunk.choices:
+                    text = choice.delta.content
+                    if text:
+                        if ttft is None:
+                            ttft = time.perf_counter() - started
+                        parts.append(text)
+        except BaseException as e:
+            append_record(_record(
+                job, model, ok=False, error=f"{type(e).__name__}: {e}",
+                wall_s=round(time.perf_counter() - started, 3),
+            ), self.log_path)
+            raise
+
+        prompt_tokens = (usage or {}).get("prompt_tokens")
+        completion_tokens = (usage or {}).get("completion_tokens")
+        append_record(_record(
+            job, model,
+            wall_s=round(time.perf_counter() - started, 3),
+            ttft_s=round(ttft, 3) if ttft is not None else None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_usd=estimate_cost(model, prompt_tokens, completion_tokens) if usage else None,
+        ), self.log_path)
+        return "".join(parts), usage
+
+
+def record_cache_hit(job: str, model: str, path: Path = CALLS_LOG) -> None:
+    append_record(_record(job, model, cached=True, wall_s=0.0, cost_usd=0.0), path)
+
+
+# --- summary ---
+
+
+def load_records(path: Path = CALLS_LOG, since: Optional[date] = None) -> List[Dict]:
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                r = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if since and r.get("day", "") < since.isoformat():
+                continue
+            records.append(r)
+    return records
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _fmt(value: Optional[float], spec: str = ".2f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def summarize(records: List[Dict]) -> Dict:
+    by_job: Dict[str, Dict] = {}
+    by_day: Dict[str, Dict] = {}
+    for r in records:
+        job = by_job.setdefault(r["job"], {"calls": 0, "cached": 0, "errors": 0, "wall": [], "ttft": [],
+                                           "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+        day = by_day.setdefault(r["day"], {"calls": 0, "cached": 0, "tokens": 0, "cost_usd": 0.0})
+        if r.get("cached"):
+            job["cached"] += 1
+            day["cached"] += 1
+            continue
+        job["calls"] += 1
+        day["calls"] += 1
+        if not r.get("ok", True):
+            job["errors"] += 1
+            continue
+        if r.get("wall_s") is not None:
+            job["wall"].append(r["wall_s"])
+        if r.get("ttft_s") is not None:
+            job["ttft"].append(r["ttft_s"])
+        job["prompt_tokens"] += r.get("prompt_tokens") or 0
+        job["completion_tokens"] += r.get("completion_tokens") or 0
+        job["cost_usd"] += r.get("cost_usd") or 0.0
+        day["tokens"] += (r.get("prompt_tokens") or 0) + (r.get("completion_tokens") or 0)
+        day["cost_usd"] += r.get("cost_usd") or 0.0
+
+    for job in by_job.values():
+        job["wall_p50"] = percentile(job["wall"], 50)
+        job["wall_p95"] = percentile(job["wall"], 95)
+        job["ttft_p50"] = percentile(job["ttft"], 50)
+        job["ttft_p95"] = percentile(job["ttft"], 95)
+        del job["wall"], job["ttft"]
+    return {"jobs": by_job, "days": dict(sorted(by_day.items()))}
+
+
+def print_summary(summary: Dict) -> None:
+    jobs, days = summary["jobs"], summary["days"]
+    if not jobs:
+        print("[skip] no LLM calls recorded")
+        return
+
+    print(f"{'job':<10} {'calls':>5} {'cached':>6} {'err':>4} {'p50 s':>7} {'p95 s':>7} "
+          f"{'ttft50':>7} {'ttft95':>7} {'tokens':>8} {'cost $':>9}")
+    for name, j in sorted(jobs.items()):
+        print(f"{name:<10} {j['calls']:>5} {j['cached']:>6} {j['errors']:>4} "
+              f"{_fmt(j['wall_p50']):>7} {_fmt(j['wall_p95']):>7} "
+              f"{_fmt(j['ttft_p50']):>7} {_fmt(j['ttft_p95']):>7} "
+              f"{j['prompt_tokens'] + j['completion_tokens']:>8} {j['cost_usd']:>9.4f}")
+
+    print()
+    print(f"{'day':<10} {'calls':>5} {'cached':>6} {'tokens':>8} {'cost $':>9}")
+    for day, d in days.items():
+        print(f"{day:<10} {d['calls']:>5} {d['cached']:>6} {d['tokens']:>8} {d['cost_usd']:>9.4f}")
+    total = sum(d["cost_usd"] for d in days.values())
+    print(f"{'total':<10} {'':>5} {'':>6} {'':>8} {total:>9.4f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarise recorded OpenAI call latency, tokens and cost.")
+    parser.add_argument("--days", type=int, default=None, help="only the last N days")
+    parser.add_argument("--log", type=Path, default=CALLS_LOG)
+    args = parser.parse_args(argv)
+
+    since = date.today() - timedelta(days=args.days - 1) if args.days else None
+    print_summary(summarize(load_records(args.log, since)))
+
+
+if __name__ == "__main__":
+    main()
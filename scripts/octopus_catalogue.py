@@ -0,0 +1,302 @@
+"""
+Octopus product catalogue: which product / tariff codes are current.
+
+Octopus retires products (AGILE-FLEX-22-11-25 → AGILE-24-10-01 → ...), and
+a retired code just makes the rate endpoints 404. So instead of trusting a
+hardcoded code, refresh_catalogue_async() walks the public /products/
+listing (page 1 for the count, then the remaining pages concurrently),
+picks the newest available import product for each tariff family, reads
+its per-region single-register tariff codes, and caches the result in
+data/cache/octopus_catalogue.json:
+
+{
+  "fetched_at": 1731400000,
+  "products": {
+    "AGILE": {"code": "AGILE-24-10-01", "display_name": "Agile Octopus",
+              "available_from": "2024-10-01T00:00:00+01:00",
+              "tariffs": {"A": "E-1R-AGILE-24-10-01-A", ...}},
+    "GO": {...}, "COSY": {...}, "TRACKER": {...}
+  }
+}
+
+Lookups (product_code(), tariff_code(), product_since()) are dictionary
+reads on the cached file, falling back to FALLBACK_PRODUCT_CODES for a
+family the catalogue does not know yet. They never touch the network:
+once the cache is older than CATALOGUE_TTL_S, refresh_if_stale_async()
+refreshes it alongside the other fetches (fetch_stage.py runs it as a
+source of its own), so the current run keeps the cached codes and the
+next lookup sees the new ones.
+
+    python -m scripts.octopus_catalogue            # show resolved codes (refresh if stale)
+    python -m scripts.octopus_catalogue --refresh  # refresh now
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from . import resilience
+from .agile_store import AGILE_PRODUCT
+from .http_cassette import runtime_path
+from .http_client import make_async_client
+from .tracing import add_bytes, span
+
+ROOT = Path(__file__).resolve().parent.parent
+CATALOGUE_PATH = ROOT / "data" / "cache" / "octopus_catalogue.json"
+
+OCTOPUS_API_BASE = "https://api.octopus.energy/v1"
+
+CATALOGUE_TTL_S = 24 * 60 * 60
+
+# Used until the catalogue has resolved a family (first run, API down).
+FALLBACK_PRODUCT_CODES: Dict[str, str] = {
+    AGILE_PRODUCT: "AGILE-FLEX-22-11-25",
+    "GO": "GO-VAR-22-10-14",
+    "COSY": "COSY-22-12-08",
+    "TRACKER": "SILVER-FLEX-22-11-25",
+}
+
+# Product code patterns per family (import products only; see _candidates()).
+FAMILY_PATTERNS: Dict[str, re.Pattern] = {
+    AGILE_PRODUCT: re.compile(r"^AGILE-(?!OUTGOING)"),
+    "GO": re.compile(r"^GO-(?!GREEN)"),
+    "COSY": re.compile(r"^COSY-"),
+    "TRACKER": re.compile(r"^SILVER-"),
+}
+
+# Pages of the /products/ listing fetched at once.
+LISTING_CONCURRENCY = 4
+
+_CATALOGUE: Optional[Dict] = None
+_CATALOGUE_PATH: Optional[Path] = None
+
+
+# --- lookups ---
+
+
+def catalogue_path() -> Path:
+    """CATALOGUE_PATH, or its scratch copy in replay mode (http_cassette.py)."""
+    return runtime_path(CATALOGUE_PATH)
+
+
+def catalogue() -> Dict:
+    """The cached catalogue (loaded once per process); empty if none was saved yet."""
+    global _CATALOGUE, _CATALOGUE_PATH
+    path = catalogue_path()
+    if _CATALOGUE is None or _CATALOGUE_PATH != path:
+        _CATALOGUE, _CATALOGUE_PATH = {"fetched_at": 0, "products": {}}, path
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    _CATALOGUE = json.load(f)
+                _CATALOGUE.setdefault("products", {})
+            except Exception:
+                pass
+    return _CATALOGUE
+
+
+def is_stale(ttl_s: float = CATALOGUE_TTL_S) -> bool:
+    return time.time() - catalogue().get("fetched_at", 0) >= ttl_s
+
+
+def product_code(family: str) -> str:
+    """Current product code of a family, e.g. "AGILE" → "AGILE-24-10-01"."""
+    entry = catalogue()["products"].get(family) or {}
+    return entry.get("code") or FALLBACK_PRODUCT_CODES[family]
+
+
+def product_since(family: str) -> Optional[datetime]:
+    """
+    When the family's current product became available, if the catalogue
+    knows it. Stored rates from this time on that came from another product
+    are refetched (AgileStore.missing_intervals).
+    """
+    entry = catalogue()["products"].get(family) or {}
+    value = entry.get("available_from")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def tariff_code(family: str, region: str) -> str:
+    """Single-register electricity tariff code, e.g. ("GO", "C") → "E-1R-GO-VAR-22-10-14-C"."""
+    entry = catalogue()["products"].get(family) or {}
+    return entry.get("tariffs", {}).get(region) or f"E-1R-{product_code(family)}-{region}"
+
+
+# --- refresh ---
+
+
+async def _get_json(client: httpx.AsyncClient, url: str, params: Optional[Dict] = None) -> Dict:
+    async def get() -> Dict:
+        r = await client.get(url, params=params)
+        r.raise_for_status()
+        add_bytes(len(r.content))
+        return r.json()
+
+    return await resilience.call("octopus", get)
+
+
+async def list_products(client: httpx.AsyncClient) -> List[Dict]:
+    """Every product in the /products/ listing: page 1 for the count, the rest concurrently."""
+    url = f"{OCTOPUS_API_BASE}/products/"
+    params = {"brand": "OCTOPUS_ENERGY", "is_business": "false"}
+    first = await _get_json(client, url, params)
+    products = list(first.get("results", []))
+    per_page = len(products)
+    if not first.get("next") or not per_page:
+        return products
+
+    pages = math.ceil(first.get("count", 0) / per_page)
+    if pages <= 1:
+        # count missing or wrong: follow the links instead
+        next_url = first["next"]
+        while next_url:
+            page = await _get_json(client, next_url)
+            products.extend(page.get("results", []))
+            next_url = page.get("next")
+        return products
+
+    sem = asyncio.Semaphore(LISTING_CONCURRENCY)
+
+    async def one(n: int) -> List[Dict]:
+        async with sem:
+            return (await _get_json(client, url, {**params, "page": n})).get("results", [])
+
+    for results in await asyncio.gather(*(one(n) for n in range(2, pages + 1))):
+        products.extend(results)
+    return products
+
+
+def _available(product: Dict, now: datetime) -> bool:
+    until = product.get("available_to")
+    if not until:
+        return True
+    try:
+        return datetime.fromisoformat(until.replace("Z", "+00:00")) > now
+    except ValueError:
+        return True
+
+
+def _candidates(products: List[Dict], family: str, now: datetime) -> List[Dict]:
+    """Available domestic import products of a family, newest first."""
+    pattern = FAMILY_PATTERNS[family]
+    found = [
+        p for p in products
+        if pattern.match(p.get("code", ""))
+        and p.get("direction", "IMPORT") == "IMPORT"
+        and not p.get("is_business")
+        and not p.get("is_prepay")
+        and _available(p, now)
+    ]
+    return sorted(found, key=lambda p: p.get("available_from") or "", reverse=True)
+
+
+def _region_tariffs(detail: Dict) -> Dict[str, str]:
+    """{region: tariff code} from a product detail's single-register electricity tariffs."""
+    tariffs: Dict[str, str] = {}
+    for key, methods in (detail.get("single_register_electricity_tariffs") or {}).items():
+        for method in ("direct_debit_monthly", "varying", *methods):
+            code = (methods.get(method) or {}).get("code")
+            if code:
+                tariffs[key.lstrip("_")] = code
+                break
+    return tariffs
+
+
+def _save(data: Dict) -> None:
+    path = catalogue_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+async def refresh_catalogue_async(client: httpx.AsyncClient | None = None) -> Dict:
+    """Re-resolve every family from the API, save the catalogue and return it."""
+    if client is None:
+        async with make_async_client() as own_client:
+            return await refresh_catalogue_async(own_client)
+
+    global _CATALOGUE
+    with span("octopus_catalogue") as s:
+        products = await list_products(client)
+        now = datetime.now(timezone.utc)
+        chosen = {f: c[0] for f in FAMILY_PATTERNS if (c := _candidates(products, f, now))}
+        fetched = await asyncio.gather(
+            *(_get_json(client, f"{OCTOPUS_API_BASE}/products/{p['code']}/") for p in chosen.values()),
+            return_exceptions=True,
+        )
+        # a failed detail page only costs the per-region codes (tariff_code() derives them)
+        details = {f: d if isinstance(d, dict) else {} for f, d in zip(chosen, fetched)}
+        s.set(products=len(products), families=len(chosen))
+
+    previous = catalogue()["products"]
+    resolved: Dict[str, Dict] = {}
+    for family in FAMILY_PATTERNS:
+        if family not in chosen:
+            # keep what we had; lookups fall back to the constant if that is nothing
+            print(f"[warn] no available Octopus product found for {family}; keeping {product_code(family)}")
+            if family in previous:
+                resolved[family] = previous[family]
+            continue
+        product = chosen[family]
+        old = product_code(family)
+        if product["code"] != old:
+            print(f"[ok] Octopus {family} product is now {product['code']} (was {old})")
+        resolved[family] = {
+            "code": product["code"],
+            "display_name": product.get("display_name"),
+            "available_from": product.get("available_from"),
+            "tariffs": _region_tariffs(details[family]),
+        }
+
+    _CATALOGUE = {"fetched_at": int(time.time()), "products": resolved}
+    _save(_CATALOGUE)
+    return _CATALOGUE
+
+
+async def refresh_if_stale_async(client: httpx.AsyncClient | None = None) -> Optional[Dict]:
+    """Refresh when the cache is older than the TTL; failures only warn (lookups keep working)."""
+    if not is_stale():
+        return None
+    try:
+        return await refresh_catalogue_async(client)
+    except Exception as e:
+        print(f"[warn] Octopus product catalogue refresh failed: {resilience.describe(e)}; using cached codes")
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Resolve current Octopus product and tariff codes.")
+    parser.add_argument("--refresh", action="store_true", help="refresh even if the cache is fresh")
+    args = parser.parse_args(argv)
+
+    if args.refresh:
+        asyncio.run(refresh_catalogue_async())
+    else:
+        asyncio.run(refresh_if_stale_async())
+
+    fetched_at = catalogue().get("fetched_at")
+    print(f"catalogue: {catalogue_path()} (fetched {time.ctime(fetched_at) if fetched_at else 'never'})")
+    for family in FAMILY_PATTERNS:
+        source = "catalogue" if family in catalogue()["products"] else "fallback"
+        print(f"  {family:<8} {product_code(family):<24} {tariff_code(family, 'C')}  [{source}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,98 @@
-<<<<<<< HEAD
 # scripts/ofgem_history.py
 
 """
-Manual record of recent Ofgem default tariff cap periods (GB average, Direct Debit).
-Values are typical unit rates incl. VAT in p/kWh.
+Ofgem default tariff cap periods (GB average, Direct Debit).
+Values are typical unit rates incl. VAT in p/kWh; standing charges, where
+recorded, are £/day incl. VAT (same units as fetch_ofgem's summary).
 
-This file is intentionally short and human-editable.
-Update when Ofgem announces new caps so the history chart and comparisons stay useful.
+OFGEM_CAP_HISTORY below is the short, human-editable seed. Every period
+fetch_ofgem sees live is added to data/cap_history.json automatically
+(record_cap()), with parsed start / end dates:
+
+{
+  "format": 1,
+  "caps": [
+    {"start": "2023-07-01", "end": "2023-09-30", "period": "1 Jul 2023 – 30 Sep 2023",
+     "label": "Jul–Sep 2023", "electricity_unit_avg": 30.11, "gas_unit_avg": 7.51, ...},
+    ...
+  ]
+}
+
+load_cap_history() merges the two (recorded periods win) into a CapHistory:
+caps sorted by start date with the start / end days as integer arrays, so
+"which cap was in force on day d" is a binary search (cap_for_date) and
+pricing thousands of days is one np.searchsorted (caps_for_dates).
 """
 
+import bisect
 import json
+import re
+from datetime import date, datetime
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-# --- Manual records of historical caps ---
-=======
-"""
-Manual record of recent Ofgem default tariff cap periods (GB average, Direct Debit).
-Values are typical unit rates incl. VAT in p/kWh.
-"""
+import numpy as np
+
+from .artifacts import source_path, write_json
+from .payloads import publish_json
 
->>>>>>> 4448ace (Add Astro frontend project (before rebase))
+ROOT = Path(__file__).resolve().parent.parent
+CAP_HISTORY_PATH = ROOT / "data" / "cap_history.json"
+
+CAP_HISTORY_FORMAT_VERSION = 1
+
+# values copied from a cap entry into the store (rates first, then provenance)
+_CAP_FIELDS = (
+    "electricity_unit_avg",
+    "gas_unit_avg",
+    "elec_standing_avg",
+    "gas_standing_avg",
+    "source",
+    "source_urls",
+)
+
+# --- Manual records of historical caps ---
 OFGEM_CAP_HISTORY = [
     {
         "period": "1 Jul 2023 – 30 Sep 2023",
         "label": "Jul–Sep 2023",
         "electricity_unit_avg": 30.11,
         "gas_unit_avg": 7.51,
+        "elec_standing_avg": 0.5297,
+        "gas_standing_avg": 0.2911,
     },
     {
         "period": "1 Oct 2023 – 31 Dec 2023",
         "label": "Oct–Dec 2023",
         "electricity_unit_avg": 27.35,
         "gas_unit_avg": 6.89,
+        "elec_standing_avg": 0.5337,
+        "gas_standing_avg": 0.296,
     },
     {
         "period": "1 Jan 2024 – 31 Mar 2024",
         "label": "Jan–Mar 2024",
         "electricity_unit_avg": 28.62,
         "gas_unit_avg": 7.42,
+        "elec_standing_avg": 0.5335,
+        "gas_standing_avg": 0.296,
     },
     {
         "period": "1 Apr 2024 – 30 Jun 2024",
         "label": "Apr–Jun 2024",
         "electricity_unit_avg": 24.50,
         "gas_unit_avg": 6.04,
+        "elec_standing_avg": 0.601,
+        "gas_standing_avg": 0.3143,
     },
     {
         "period": "1 Jul 2024 – 30 Sep 2024",
         "label": "Jul–Sep 2024",
         "electricity_unit_avg": 22.36,
         "gas_unit_avg": 5.48,
+        "elec_standing_avg": 0.6012,
+        "gas_standing_avg": 0.3141,
     },
-<<<<<<< HEAD
     {
         "period": "1 Oct 2024 – 31 Dec 2024",
         "label": "Oct–Dec 2024",
@@ -60,22 +101,183 @@ OFGEM_CAP_HISTORY = [
     },
 ]
 
+# --- Period lookup ---
+_PERIOD_BOUNDS_RE = re.compile(r"(\d{1,2} [A-Za-z]{3} \d{4})\s*\u2013\s*(\d{1,2} [A-Za-z]{3} \d{4})")
+
+
+def period_bounds(period: str) -> Optional[Tuple[date, date]]:
+    """
+    "1 Oct 2025 – 31 Dec 2025 (Ofgem default tariff cap)" → (2025-10-01, 2025-12-31).
+    Returns None when the label is not in that form.
+    """
+    m = _PERIOD_BOUNDS_RE.search(period or "")
+    if not m:
+        return None
+    start, end = (datetime.strptime(x, "%d %b %Y").date() for x in m.groups())
+    return start, end
+
+
+def short_label(start: date, end: date) -> str:
+    """(2025-10-01, 2025-12-31) → "Oct–Dec 2025" (the chart labels)."""
+    if start.year == end.year:
+        return f"{start:%b}\u2013{end:%b %Y}"
+    return f"{start:%b %Y}\u2013{end:%b %Y}"
+
+
+def cap_record(entry: Dict) -> Optional[Dict]:
+    """
+    A history entry or fetch_ofgem summary as a store record (start / end
+    added, a missing or long label shortened). None if its period cannot be
+    parsed or it has no unit rates.
+    """
+    bounds = period_bounds(entry.get("period", ""))
+    if not bounds or entry.get("electricity_unit_avg") is None or entry.get("gas_unit_avg") is None:
+        return None
+    start, end = bounds
+    label = entry.get("label")
+    if not label or label == entry["period"]:
+        label = short_label(start, end)
+    record = {"start": start.isoformat(), "end": end.isoformat(), "period": entry["period"], "label": label}
+    record.update({k: entry[k] for k in _CAP_FIELDS if entry.get(k) is not None})
+    return record
+
+
+def _ordinals(dates) -> np.ndarray:
+    """dates (datetime.date objects or a datetime64 array) → proleptic ordinals."""
+    arr = np.asarray(dates)
+    if arr.dtype.kind == "M":
+        return arr.astype("datetime64[D]").astype(np.int64) + date(1970, 1, 1).toordinal()
+    return np.fromiter((d.toordinal() for d in arr.ravel()), dtype=np.int64, count=arr.size).reshape(arr.shape)
+
+
+class CapHistory:
+    """Cap periods sorted by start date, indexed for point-in-time lookups."""
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        by_start: Dict[str, Dict] = {}
+        for entry in entries:
+            record = cap_record(entry)
+            if record:
+                by_start[record["start"]] = record   # later entries win
+        self.caps: List[Dict] = [by_start[k] for k in sorted(by_start)]
+        self._starts = [date.fromisoformat(c["start"]).toordinal() for c in self.caps]
+        self.starts = np.array(self._starts, dtype=np.int64)
+        self.ends = np.array([date.fromisoformat(c["end"]).toordinal() for c in self.caps], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.caps)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.caps)
+
+    def with_cap(self, entry: Dict) -> "CapHistory":
+        """Copy with `entry` added (replacing any period starting the same day)."""
+        return CapHistory([*self.caps, entry])
+
+    def records(self) -> List[Dict]:
+        return [dict(c) for c in self.caps]
+
+    def index_for_date(self, day: date) -> int:
+        """Position of the cap in force on `day`, or -1."""
+        n = day.toordinal()
+        i = bisect.bisect_right(self._starts, n) - 1
+        return i if i >= 0 and n <= self.ends[i] else -1
+
+    def cap_for_date(self, day: date) -> Optional[Dict]:
+        i = self.index_for_date(day)
+        return self.caps[i] if i >= 0 else None
+
+    def indices_for_dates(self, dates) -> np.ndarray:
+        """Vectorised index_for_date(): int array shaped like `dates`, -1 outside known periods."""
+        n = _ordinals(dates)
+        idx = np.searchsorted(self.starts, n, side="right") - 1
+        if not len(self.caps):
+            return np.full(n.shape, -1)
+        inside = (idx >= 0) & (n <= self.ends[np.maximum(idx, 0)])
+        return np.where(inside, idx, -1)
+
+    def caps_for_dates(self, dates) -> List[Optional[Dict]]:
+        return [self.caps[i] if i >= 0 else None for i in self.indices_for_dates(dates).ravel()]
+
+    def values_for_dates(self, field: str, dates) -> np.ndarray:
+        """`field` of the cap in force on each date as floats; NaN where unknown."""
+        values = np.array([np.nan if c.get(field) is None else float(c[field]) for c in self.caps] + [np.nan])
+        return values[self.indices_for_dates(dates)]   # -1 picks the trailing NaN
+
+
+def cap_for_date(day: date, caps: Optional[Sequence[Dict]] = None) -> Optional[Dict]:
+    """The cap in force on `day` (from load_cap_history() unless caps are given)."""
+    history = CapHistory(caps) if caps is not None else load_cap_history()
+    return history.cap_for_date(day)
+
+
+def caps_for_dates(dates, caps: Optional[Sequence[Dict]] = None) -> List[Optional[Dict]]:
+    """cap_for_date() for many dates with one binary search pass."""
+    history = CapHistory(caps) if caps is not None else load_cap_history()
+    return history.caps_for_dates(dates)
+
+
+def cap_in_force(day: date, caps: List[Dict]) -> Optional[Dict]:
+    """The cap entry whose period covers `day` (caps as in OFGEM_CAP_HISTORY)."""
+    return CapHistory(caps).cap_for_date(day)
+
+
+# --- Structured store (data/cap_history.json) ---
+def _read_store(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f).get("caps", [])
+    except Exception:
+        return []
+
+
+def load_cap_history(path: Optional[Path] = None) -> CapHistory:
+    """OFGEM_CAP_HISTORY overlaid with the recorded periods in data/cap_history.json."""
+    path = path or CAP_HISTORY_PATH
+    return CapHistory([*OFGEM_CAP_HISTORY, *_read_store(source_path(path))])
+
+
+def record_cap(summary: Dict, path: Optional[Path] = None) -> bool:
+    """
+    Add (or refresh) the cap period in a live fetch_ofgem summary in
+    data/cap_history.json. Cached and fallback summaries are ignored.
+    Returns True if the store changed.
+    """
+    if summary.get("source") != "live":
+        return False
+    record = cap_record(summary)
+    if record is None:
+        return False
+
+    path = path or CAP_HISTORY_PATH
+    history = load_cap_history(path)
+    known = history.cap_for_date(date.fromisoformat(record["start"]))
+    is_new = known is None or known["start"] != record["start"]
+    if not is_new:
+        record["label"] = known["label"]   # keep a hand-edited label
+    history = history.with_cap(record)
+    changed = write_json(
+        path,
+        {"format": CAP_HISTORY_FORMAT_VERSION, "caps": history.records()},
+        indent=2,
+        ensure_ascii=False,
+    )
+    if changed and is_new:
+        print(f"[ok] recorded new Ofgem cap period {record['label']} in {path}")
+    return changed
+
+
 # --- Write JSON file for frontend ---
 def write_history_json():
-    root = Path(__file__).resolve().parent.parent
-    data_dir = root / "data"
+    data_dir = ROOT / "data"
     data_dir.mkdir(exist_ok=True)
 
     outfile = data_dir / "ofgem_history.json"
-    outfile.write_text(
-        json.dumps(OFGEM_CAP_HISTORY, indent=2),
-        encoding="utf-8"
-    )
+    publish_json(outfile, load_cap_history().records())
     print(f"[ok] wrote {outfile}")
 
-# --- Allow manual run ---
+# --- Allow manual run (python -m scripts.ofgem_history) ---
 if __name__ == "__main__":
     write_history_json()
-=======
-]
->>>>>>> 4448ace (Add Astro frontend project (before rebase))
@@ -0,0 +1,142 @@
+"""
+Compact, precompressed JSON payloads for the dashboard.
+
+publish_json(path, obj) replaces json.dumps(indent=2) + write for every
+file index.html fetches. For data/latest.json it writes:
+
+    data/latest.json                  minified (what the scripts read back)
+    data/latest.json.gz / .br         precompressed copies of the above
+    data/latest.<hash>.json(.gz/.br)  content-hashed copies, safe to cache forever
+    data/manifest.json                logical name → current hashed name + sizes
+
+The page reads data/manifest.json (short cache) and then fetches the hashed
+name, so a CDN can serve the payloads with an immutable Cache-Control.
+The previous hashed version is kept for pages still holding an older
+manifest; anything older is removed.
+
+.gz is always written (stdlib). .br needs the optional `brotli` package
+and is skipped without it. Servers such as nginx (gzip_static / brotli_static)
+or a CDN pick the precompressed file by Accept-Encoding.
+
+Indented copies for reading by eye go to data/pretty/ only when
+UKED_PRETTY_JSON=1 (run_daily.py --pretty sets it).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Pattern
+
+from .artifacts import output_path, remove, source_path, stable_content, write_bytes, write_json, write_text
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants are skipped
+    brotli = None
+
+# written next to the payloads they describe (data/manifest.json, data/pretty/)
+MANIFEST_NAME = "manifest.json"
+PRETTY_DIR_NAME = "pretty"
+
+PRETTY_ENV = "UKED_PRETTY_JSON"
+
+HASH_LEN = 10
+
+# hashed versions kept per payload: current + previous
+KEEP_VERSIONS = 2
+
+
+def pretty_enabled() -> bool:
+    return os.getenv(PRETTY_ENV, "0").strip().lower() in ("1", "true", "yes")
+
+
+def minify(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """{".gz": ..., ".br": ...}; deterministic output so unchanged data stays byte-identical."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return variants
+
+
+def _load_manifest(path: Path) -> Dict:
+    if not path.exists():
+        return {"files": {}}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest.setdefault("files", {})
+        return manifest
+    except Exception:
+        return {"files": {}}
+
+
+def _prune(path: Path, keep: set) -> None:
+    """Remove hashed copies of `path` (and their .gz/.br) that are not in `keep`."""
+    pattern = re.compile(
+        rf"^{re.escape(path.stem)}\.[0-9a-f]{{{HASH_LEN}}}{re.escape(path.suffix)}(\.gz|\.br)?$"
+    )
+    for candidate in output_path(path).parent.iterdir():
+        m = pattern.match(candidate.name)
+        if not m:
+            continue
+        base = candidate.name[: -len(m.group(1))] if m.group(1) else candidate.name
+        if base not in keep:
+            remove(candidate)
+
+
+def publish_json(
+    path: Path,
+    obj,
+    manifest_path: Optional[Path] = None,
+    pretty: Optional[bool] = None,
+    ignore: Optional[Pattern[bytes]] = None,
+) -> Dict:
+    """
+    Write `obj` as a dashboard payload (see module docstring) and update the
+    manifest. Returns the manifest entry ({"hashed", "bytes", "gz_bytes", ...}).
+    If the published payload differs only inside `ignore` matches (e.g.
+    artifacts.RUN_STAMP_RE), it is kept as it is, hashed copies included.
+    """
+    path = Path(path)
+    manifest_path = manifest_path or path.parent / MANIFEST_NAME
+    data = minify(obj)
+    kept = stable_content(path, data, ignore)
+    if kept is not data:
+        data, obj = kept, json.loads(kept)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    hashed = path.with_name(f"{path.stem}.{digest}{path.suffix}")
+    variants = compressed_variants(data)
+
+    for target in (path, hashed):
+        write_bytes(target, data)
+        for ext, blob in variants.items():
+            write_bytes(target.with_name(target.name + ext), blob)
+
+    if pretty is None:
+        pretty = pretty_enabled()
+    if pretty:
+        write_text(path.parent / PRETTY_DIR_NAME / path.name, json.dumps(obj, indent=2, ensure_ascii=False))
+
+    name = path.relative_to(manifest_path.parent).as_posix()
+    manifest = _load_manifest(source_path(manifest_path))
+    previous = manifest["files"].get(name, {})
+    history = [hashed.name] + [h for h in previous.get("versions", []) if h != hashed.name]
+    entry = {
+        "hashed": hashed.name,
+        "bytes": len(data),
+        **{f"{ext[1:]}_bytes": len(blob) for ext, blob in variants.items()},
+        "versions": history[:KEEP_VERSIONS],
+    }
+    manifest["files"][name] = entry
+    write_json(manifest_path, manifest, indent=1, sort_keys=True)
+    _prune(path, set(entry["versions"]))
+    return entry
@@ -0,0 +1,411 @@
+"""
+Reports archive index, backed by a JSON manifest.
+
+Entries live in small per-month shards, so a daily run only touches the
+current month no matter how large the archive gets:
+
+  reports/manifest/YYYY-MM.json   {"2025-11-12": {"meta": "25.73p elec / ..."}, ...}
+  reports/manifest/index.json     {"months": {"2025-11": 3, ...}}
+
+HTML pages are regenerated from the manifest, and only the pages whose
+entries changed:
+
+  reports/index.html              latest month + every month with its report count
+  reports/archive/YYYY-MM.html    one page per month, linking every month
+
+A month page's nav lists months without counts, so it only goes stale
+when a month is added; then every month page is rewritten once.
+
+add_report() is O(1) in the number of archived reports: dedupe is a dict
+lookup in the month shard, and an unchanged entry writes nothing.
+"""
+
+from __future__ import annotations
+
+import calendar
+import json
+import re
+from pathlib import Path
+from string import Template
+from typing import Dict, List, Optional
+
+from .artifacts import source_path, write_json, write_text
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORTS_DIR = ROOT / "reports"
+MANIFEST_DIR = REPORTS_DIR / "manifest"
+ARCHIVE_DIR = REPORTS_DIR / "archive"
+MANIFEST_INDEX = MANIFEST_DIR / "index.json"
+
+_PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <title>UK Energy Data – $title</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <style>
+    :root {
+      --bg: #020817;
+      --bg-card: #070f23;
+      --border-subtle: rgba(148, 163, 253, 0.16);
+      --accent: #38bdf8;
+      --text-main: #e5e7eb;
+      --text-subtle: #9ca3af;
+      --radius-xl: 20px;
+      --font-sans: system-ui, -apple-system, BlinkMacSystemFont, -system-ui, sans-serif;
+    }
+    * { box-sizing: border-box; }
+    body {
+      margin: 0;
+      padding: 24px 18px 32px;
+      font-family: var(--font-sans);
+      background: radial-gradient(circle at top, #020817 0, #000 55%);
+      color: var(--text-main);
+    }
+    .page { max-width: 960px; margin: 0 auto; }
+
+    header {
+      margin-bottom: 16px;
+    }
+    .brand {
+      display: flex;
+      align-items: center;
+      gap: 8px;
+    }
+    .dot {
+      width: 9px;
+      height: 9px;
+      border-radius: 999px;
+      background: var(--accent);
+      box-shadow: 0 0 10px var(--accent);
+    }
+    h1 {
+      font-size: 22px;
+      margin: 0;
+    }
+    .subtitle {
+      font-size: 12px;
+      color: var(--text-subtle);
+      margin-top: 4px;
+    }
+    nav {
+      margin-top: 8px;
+      font-size: 12px;
+      display: flex;
+      gap: 14px;
+    }
+    nav a {
+      color: var(--text-subtle);
+      text-decoration: none;
+    }
+    nav a:hover { text-decoration: underline; }
+    nav a.active { color: var(--accent); }
+
+    .card {
+      background: var(--bg-card);
+      border-radius: var(--radius-xl);
+      border: 1px solid var(--border-subtle);
+      padding: 14px 14px 10px;
+      margin-top: 10px;
+    }
+
+    .card-title {
+      font-size: 14px;
+      font-weight: 600;
+      margin: 0 0 4px;
+    }
+    .card-text {
+      font-size: 11px;
+      color: var(--text-subtle);
+      margin: 0 0 4px;
+    }
+
+    ul#reports-list {
+      list-style: none;
+      padding-left: 0;
+      margin: 4px 0 0;
+      font-size: 12px;
+    }
+    ul#reports-list li {
+      padding: 6px 8px;
+      border-radius: 10px;
+      border: 1px solid rgba(148,163,253,0.18);
+      background: rgba(5,10,25,0.98);
+      margin-bottom: 5px;
+      display: flex;
+      justify-content: space-between;
+      gap: 8px;
+      align-items: baseline;
+    }
+    ul#reports-list a {
+      color: var(--accent);
+      text-decoration: none;
+    }
+    ul#reports-list a:hover {
+      text-decoration: underline;
+    }
+    .archive-year { font-size: 12px; margin: 6px 0 0; }
+    .archive-year strong { color: var(--text-main); margin-right: 8px; }
+    .archive-year a { color: var(--accent); text-decoration: none; margin-right: 10px; }
+    .archive-year a.active { text-decoration: underline; }
+    .archive-year .count { color: var(--text-subtle); font-size: 10px; }
+    .meta {
+      font-size: 10px;
+      color: var(--text-subtle);
+      white-space: nowrap;
+    }
+
+    footer {
+      margin-top: 18px;
+      font-size: 9px;
+      color: var(--text-subtle);
+    }
+
+    @media (max-width: 640px) {
+      body { padding: 18px 12px 24px; }
+      ul#reports-list li { flex-direction: column; align-items: flex-start; }
+      .meta { margin-top: 2px; }
+    }
+  </style>
+</head>
+<body>
+<div class="page">
+  <header>
+    <div class="brand">
+      <div class="dot"></div>
+      <h1>Daily Energy Price Reports</h1>
+    </div>
+    <div class="subtitle">
+      Archived daily snapshots of Ofgem price cap levels and Octopus Agile data.
+      Generated automatically from public sources.
+    </div>
+    <nav>
+      <a href="${root}../index.html">&larr; Back to dashboard</a>
+      <a href="${root}index.html" class="active">Reports archive</a>
+      <a href="https://github.com/youknowwho00o/ukenergydata-site" target="_blank" rel="noopener">Source on GitHub</a>
+    </nav>
+  </header>
+
+  <section class="card">
+    <div class="card-title">$heading</div>
+    <p class="card-text">
+      Each report is a static HTML file containing the Ofgem cap snapshot, Octopus Agile summary
+      (when available), and the calculated typical-bill estimate for that day.
+    </p>
+    <ul id="reports-list">
+$items
+    </ul>
+  </section>
+
+  <section class="card">
+    <div class="card-title">Archive by month</div>
+$archive
+  </section>
+
+  <footer>
+    &copy; ukenergydata.co.uk · Auto-generated from public data sources.
+  </footer>
+</div>
+</body>
+</html>
+""")
+
+_LEGACY_ITEM_RE = re.compile(
+    r'<li><a href="(\d{4}-\d{2}-\d{2})\.html">[^<]*</a>(?:<span class="meta">([^<]*)</span>)?</li>'
+)
+_REPORT_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.html$")
+
+
+def report_meta(ofgem: Dict, agile: Dict, typical_bill: Optional[Dict]) -> str:
+    """One-line summary shown next to each report link."""
+    parts = []
+    eu = ofgem.get("electricity_unit_avg")
+    gu = ofgem.get("gas_unit_avg")
+    if eu and gu:
+        parts.append(f"{eu:.2f}p elec / {gu:.2f}p gas")
+    if typical_bill and typical_bill.get("dual_annual_gbp"):
+        parts.append(f"typical ~£{typical_bill['dual_annual_gbp']:.0f}/yr")
+    if agile.get("has_data") and agile.get("avg") is not None:
+        parts.append(f"Agile {agile['avg']:.2f}p")
+
+    return " · ".join(parts) if parts else ""
+
+
+# --- manifest ---
+
+def _read_json(path: Path, default):
+    path = source_path(path)
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def _write_json(path: Path, obj) -> None:
+    write_json(path, obj, indent=2, sort_keys=True)
+
+
+def _shard_path(month: str) -> Path:
+    return MANIFEST_DIR / f"{month}.json"
+
+
+def load_month(month: str) -> Dict[str, Dict]:
+    return _read_json(_shard_path(month), {})
+
+
+def load_months() -> Dict[str, int]:
+    return _read_json(MANIFEST_INDEX, {}).get("months", {})
+
+
+def _migrate_legacy_index() -> None:
+    """
+    One-off: seed the manifest from the old hand-grown reports/index.html
+    list plus any report files on disk that were never linked.
+    """
+    entries: Dict[str, str] = {}
+    index_file = source_path(REPORTS_DIR / "index.html")
+    if index_file.exists():
+        for date_str, meta in _LEGACY_ITEM_RE.findall(index_file.read_text(encoding="utf-8")):
+            entries.setdefault(date_str, meta or "")
+    if REPORTS_DIR.exists():
+        for p in REPORTS_DIR.iterdir():
+            m = _REPORT_FILE_RE.match(p.name)
+            if m:
+                entries.setdefault(m.group(1), "")
+
+    shards: Dict[str, Dict[str, Dict]] = {}
+    for date_str, meta in entries.items():
+        shards.setdefault(date_str[:7], {})[date_str] = {"meta": meta}
+    for month, shard in shards.items():
+        _write_json(_shard_path(month), shard)
+    _write_json(MANIFEST_INDEX, {"months": {m: len(s) for m, s in shards.items()}})
+
+    months = load_months()
+    for month in months:
+        write_month_page(month, months)
+    write_index_page(months)
+
+
+def ensure_manifest() -> None:
+    """Create the manifest (migrating the legacy index once) if it does not exist yet."""
+    if source_path(MANIFEST_INDEX).exists():
+        return
+    REPORTS_DIR.mkdir(exist_ok=True)
+    _migrate_legacy_index()
+
+
+def add_reports(entries: Dict[str, str]) -> List[str]:
+    """
+    Record {date: meta} entries in the manifest and refresh the affected
+    pages: each touched month shard and page is written once (every month
+    page when a month is new), plus the landing page. Returns the dates
+    whose entry actually changed.
+    """
+    ensure_manifest()
+    by_month: Dict[str, Dict[str, str]] = {}
+    for date_str, meta in entries.items():
+        by_month.setdefault(date_str[:7], {})[date_str] = meta
+
+    months = load_months()
+    changed: List[str] = []
+    touched: Dict[str, Dict] = {}
+    for month, month_entries in by_month.items():
+        shard = load_month(month)
+        month_changed = [d for d, meta in month_entries.items() if shard.get(d, {}).get("meta") != meta]
+        if not month_changed:
+            continue
+        for d in month_changed:
+            shard[d] = {"meta": month_entries[d]}
+        _write_json(_shard_path(month), shard)
+        months[month] = len(shard)
+        touched[month] = shard
+        changed += month_changed
+
+    if not touched:
+        return changed
+
+    new_month = set(months) != set(load_months())
+    _write_json(MANIFEST_INDEX, {"months": months})
+    # a new month changes the nav on every month page
+    for month in (months if new_month else touched):
+        write_month_page(month, months, touched.get(month))
+    write_index_page(months, touched.get(max(months)))
+    return sorted(changed)
+
+
+def add_report(date_str: str, meta: str) -> bool:
+    """
+    Record a report in the manifest and refresh the affected pages.
+    Returns False (and writes nothing) when the entry is already up to date.
+    """
+    return bool(add_reports({date_str: meta}))
+
+
+# --- pages ---
+
+def _items_html(shard: Dict[str, Dict], root: str) -> str:
+    lines = []
+    for date_str in sorted(shard, reverse=True):
+        line = f'    <li><a href="{root}{date_str}.html">{date_str}</a>'
+        meta = shard[date_str].get("meta")
+        if meta:
+            line += f'<span class="meta">{meta}</span>'
+        line += "</li>"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _archive_html(
+    months: Dict[str, int],
+    archive_root: str,
+    active: Optional[str] = None,
+    counts: bool = True,
+) -> str:
+    by_year: Dict[str, List[str]] = {}
+    for month in sorted(months, reverse=True):
+        by_year.setdefault(month[:4], []).append(month)
+
+    lines = []
+    for year, year_months in by_year.items():
+        links = []
+        for month in sorted(year_months):
+            cls = ' class="active"' if month == active else ""
+            link = f'<a href="{archive_root}{month}.html"{cls}>{calendar.month_abbr[int(month[5:])]}</a>'
+            if counts:
+                link += f'<span class="count">({months[month]})</span>'
+            links.append(link)
+        lines.append(f'    <p class="archive-year"><strong>{year}</strong>{" ".join(links)}</p>')
+    return "\n".join(lines)
+
+
+def write_month_page(month: str, months: Dict[str, int], shard: Optional[Dict] = None) -> Path:
+    shard = load_month(month) if shard is None else shard
+    html = _PAGE.substitute(
+        title=f"Daily Reports {month}",
+        heading=f"Daily snapshots – {month}",
+        root="../",
+        items=_items_html(shard, "../"),
+        archive=_archive_html(months, "", active=month, counts=False),
+    )
+    path = ARCHIVE_DIR / f"{month}.html"
+    write_text(path, html)
+    return path
+
+
+def write_index_page(months: Dict[str, int], latest_shard: Optional[Dict] = None) -> Path:
+    latest = max(months) if months else None
+    if latest_shard is None:
+        latest_shard = load_month(latest) if latest else {}
+    html = _PAGE.substitute(
+        title="Daily Reports",
+        heading=f"Latest snapshots – {latest}" if latest else "Browse daily snapshots",
+        root="",
+        items=_items_html(latest_shard, ""),
+        archive=_archive_html(months, "archive/"),
+    )
+    path = REPORTS_DIR / "index.html"
+    write_text(path, html)
+    return path
@@ -0,0 +1,281 @@
+"""
+Retries, backoff, hedging and circuit breaking for the upstream fetchers.
+
+Every request to Octopus or Ofgem goes through call():
+
+    data = await resilience.call("octopus", lambda: _get_page(client, url, params))
+
+The lambda is a coroutine factory, called again for each attempt. What
+happens around it is set per source in SOURCE_POLICIES:
+
+- Retries: transport errors (timeouts, resets, DNS) and HTTP 408/425/429/5xx
+  are retried with full-jitter exponential backoff, honouring Retry-After
+  (capped). Anything else (404, a parse error) fails at once.
+- Budget: all attempts, backoff sleeps and hedges of one call share
+  budget_s. An attempt still running when the budget is spent is
+  cancelled, so a call never takes longer than its budget, however many
+  retries and per-request timeouts are configured.
+- Hedging (opt-in per source): if an attempt has not answered after the
+  source's p95 latency (from recent successful calls; hedge_after_s until
+  there are enough samples), one duplicate request is started and the first
+  answer wins. Only idempotent GETs go through here.
+- Circuit breaker: breaker_threshold failed calls in a row open the
+  breaker. While it is open calls fail immediately with SourceUnavailable
+  and the caller uses its fallback. After breaker_cooldown_s one trial call
+  is let through; success closes the breaker, failure re-opens it.
+
+Breaker state and latency samples live in data/cache/source_health.json
+(next to the HTTP cache), so a source that was down in the last run starts
+the next run half-open and the hedge delay is learned across runs (replay
+runs, see http_cassette.py, keep a separate file under the cassette dir).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from .http_cassette import runtime_path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEALTH_PATH = ROOT / "data" / "cache" / "source_health.json"
+
+T = TypeVar("T")
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# never sleep longer than this for a Retry-After header
+MAX_RETRY_AFTER_S = 10.0
+
+# successful-call latencies kept per source, and how many are needed before
+# their p95 replaces hedge_after_s
+LATENCY_SAMPLES = 50
+MIN_LATENCY_SAMPLES = 10
+
+
+@dataclass(frozen=True)
+class SourcePolicy:
+    """How hard to try one upstream source."""
+
+    attempts: int = 3
+    base_delay_s: float = 0.5
+    max_delay_s: float = 8.0
+    budget_s: float = 20.0            # whole call: attempts + backoff + hedges
+    hedge: bool = False
+    hedge_after_s: float = 2.0        # hedge delay until p95 is known
+    breaker_threshold: int = 3        # failed calls in a row that open the breaker
+    breaker_cooldown_s: float = 15 * 60
+
+
+# Budgets stay under fetch_stage.FETCH_DEADLINE_S so a retrying source still
+# answers (or fails over to its fallback) inside the daily run's deadline.
+SOURCE_POLICIES: Dict[str, SourcePolicy] = {
+    # small JSON pages: a duplicate request is cheap
+    "octopus": SourcePolicy(attempts=4, hedge=True, hedge_after_s=1.5),
+    # large HTML pages behind the conditional-GET cache: retry, never hedge
+    "ofgem": SourcePolicy(attempts=3),
+}
+DEFAULT_POLICY = SourcePolicy()
+
+
+class SourceUnavailable(RuntimeError):
+    """The source's breaker is open, or the call used up its time budget."""
+
+
+def policy_for(source: str) -> SourcePolicy:
+    return SOURCE_POLICIES.get(source, DEFAULT_POLICY)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    try:
+        return max(0.0, float(exc.response.headers.get("retry-after", "")))
+    except ValueError:
+        return None   # HTTP-date form: fall back to our own backoff
+
+
+def describe(exc: BaseException) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HTTP {exc.response.status_code}"
+    return f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+
+
+def backoff_delay(attempt: int, policy: SourcePolicy, retry_after: Optional[float] = None) -> float:
+    """Full jitter: uniform(0, min(max_delay, base * 2**attempt)), at least Retry-After (capped)."""
+    delay = random.uniform(0.0, min(policy.max_delay_s, policy.base_delay_s * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, MAX_RETRY_AFTER_S))
+    return delay
+
+
+# --- breaker state ---
+
+
+class SourceHealth:
+    """Breaker state and latency samples per source, persisted after every change."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sources: Dict[str, Dict] = {}
+        self._probing: set = set()   # half-open sources with a trial call in flight
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    self.sources = json.load(f).get("sources", {})
+            except Exception:
+                self.sources = {}
+
+    def _entry(self, source: str) -> Dict:
+        return self.sources.setdefault(source, {"failures": 0, "opened_at": None, "latencies": []})
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"sources": self.sources}, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def allow(self, source: str, policy: SourcePolicy) -> bool:
+        """False while the breaker is open; once cooled down, lets one trial call through."""
+        opened_at = self._entry(source).get("opened_at")
+        if opened_at is None:
+            return True
+        if time.time() - opened_at < policy.breaker_cooldown_s or source in self._probing:
+            return False
+        self._probing.add(source)
+        return True
+
+    def hedge_delay(self, source: str, policy: SourcePolicy) -> float:
+        samples = sorted(self._entry(source)["latencies"])
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return policy.hedge_after_s
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def success(self, source: str, latency_s: Optional[float] = None) -> None:
+        """The source answered (latency_s is None when the answer was an error we do not retry)."""
+        entry = self._entry(source)
+        if entry["opened_at"] is not None:
+            print(f"[ok] {source}: responding again, circuit closed")
+        self._probing.discard(source)
+        entry.update({"failures": 0, "opened_at": None})
+        if latency_s is not None:
+            entry["latencies"] = (entry["latencies"] + [round(latency_s, 3)])[-LATENCY_SAMPLES:]
+        self._save()
+
+    def failure(self, source: str, policy: SourcePolicy, error: BaseException) -> None:
+        entry = self._entry(source)
+        entry["failures"] += 1
+        entry["last_error"] = describe(error)[:300]
+        trial_failed = source in self._probing
+        self._probing.discard(source)
+        if trial_failed or (entry["opened_at"] is None and entry["failures"] >= policy.breaker_threshold):
+            entry["opened_at"] = time.time()
+            print(
+                f"[warn] {source}: {entry['failures']} failed calls in a row; "
+                f"circuit open for {policy.breaker_cooldown_s:g}s"
+            )
+        self._save()
+
+
+_HEALTH: Optional[SourceHealth] = None
+
+
+def health() -> SourceHealth:
+    """
+    Process-wide breaker state, loaded from HEALTH_PATH on first use. Replay
+    runs keep theirs under the cassette dir so injected failures never open
+    the breaker for live runs.
+    """
+    global _HEALTH
+    path = runtime_path(HEALTH_PATH)
+    if _HEALTH is None or _HEALTH.path != path:
+        _HEALTH = SourceHealth(path)
+    return _HEALTH
+
+
+# --- calls ---
+
+
+async def _hedged(fn: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+    """Run fn(); if it has not finished after hedge_after seconds, race a second fn()."""
+    first = asyncio.ensure_future(fn())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.add(asyncio.ensure_future(fn()))
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def call(
+    source: str,
+    fn: Callable[[], Awaitable[T]],
+    policy: Optional[SourcePolicy] = None,
+) -> T:
+    """
+    Await fn() under the source's retry / budget / hedge / breaker policy
+    (see module docstring). Raises SourceUnavailable when the breaker is
+    open or the budget ran out, else the last error.
+    """
+    policy = policy or policy_for(source)
+    state = health()
+    if not state.allow(source, policy):
+        raise SourceUnavailable(f"{source}: circuit open after repeated failures")
+
+    deadline = time.monotonic() + policy.budget_s
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            remaining = deadline - started
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            if policy.hedge:
+                coro = _hedged(fn, state.hedge_delay(source, policy))
+            else:
+                coro = fn()
+            result = await asyncio.wait_for(coro, remaining)
+        except asyncio.TimeoutError:
+            error = SourceUnavailable(f"{source}: no answer within its {policy.budget_s:g}s budget")
+            state.failure(source, policy, error)
+            raise error from None
+        except Exception as e:
+            if not is_retryable(e):
+                state.success(source)   # it answered; the request itself is the problem
+                raise
+            delay = backoff_delay(attempt, policy, _retry_after(e))
+            if attempt + 1 < policy.attempts and time.monotonic() + delay < deadline:
+                attempt += 1
+                print(f"[warn] {source}: {describe(e)}; retry {attempt}/{policy.attempts - 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            state.failure(source, policy, e)
+            raise
+        state.success(source, time.monotonic() - started)
+        return result
@@ -0,0 +1,460 @@
+"""
+Which tariff would have been cheaper for a given load shape?
+
+A load profile is kWh per half-hour slot of a UK-local day: either one
+daily shape (48 values, or 50 to cover the long clock-change day) that is
+reused every day, or a (days, 48|50) array of metered history. Each
+profile is priced under several Octopus tariff families and under the
+Ofgem cap's flat electricity unit rate, for every day in a range at once:
+
+    rates    (tariffs, days, 50)   p/kWh, NaN where no rate is stored
+    loads    (profiles, 50) or (profiles, days, 50)
+    costs    (profiles, tariffs, days) = einsum over the slot axis
+
+Rates come from the local store (agile_store.py), which keeps one row per
+(product, region, half-hour), with `product` set to the family label
+below. Go / Cosy / Tracker publish multi-hour or daily rate rows; they are
+expanded to half-hour slots before they are stored, so every family reads
+back the same way as Agile. Only missing slots are fetched.
+
+Costs are unit-rate costs only (standing charges are left out). Totals
+are compared over the days on which every family has a rate for every
+loaded slot, so one family's missing data cannot make it look cheap.
+
+Results are cached per profile in data/cache/tariff_compare/, keyed by a
+hash of the load profile, the region, the date range, the families and a
+digest of the rate tensor, so a rerun only prices new or changed profiles
+and any new rates invalidate the entry.
+
+    python -m scripts.tariff_compare --region C --days 90
+    python -m scripts.tariff_compare --profiles my_profiles.json --offline
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import httpx
+import numpy as np
+import zoneinfo
+
+from .agile_analytics import SLOTS_PER_DAY, SLOT_SECONDS, UK_TZ, store_matrix, uk_midnights
+from .agile_store import AGILE_PRODUCT, AgileStore
+from .artifacts import RUN_STAMP_RE, write_json
+from .bill_engine import default_caps
+from .fetch_octopus import AGILE_DEFAULT_REGION, _get_all_pages, uk_day_bounds
+from .http_cassette import runtime_path
+from .http_client import make_async_client
+from .octopus_catalogue import OCTOPUS_API_BASE, product_code, product_since, refresh_if_stale_async, tariff_code
+from .ofgem_history import CapHistory
+from .tracing import span
+
+ROOT = Path(__file__).resolve().parent.parent
+COMPARE_CACHE_DIR = ROOT / "data" / "cache" / "tariff_compare"
+COMPARE_PATH = ROOT / "data" / "tariff_compare.json"
+
+# Tariff families: store product label → display name. The current product
+# and tariff codes for each come from the product catalogue (octopus_catalogue.py).
+TARIFF_FAMILIES: Dict[str, Dict[str, str]] = {
+    AGILE_PRODUCT: {"name": "Agile"},
+    "GO": {"name": "Go"},
+    "COSY": {"name": "Cosy"},
+    "TRACKER": {"name": "Tracker"},
+}
+
+# Pseudo-family priced at the cap's flat electricity unit rate for each day.
+CAP_FAMILY = "CAP"
+CAP_NAME = "Price cap (flat)"
+
+DEFAULT_DAYS = 90
+
+# Same concurrency limit as the Agile region fetches.
+TARIFF_FETCH_CONCURRENCY = 4
+
+# Rows for the other payment method duplicate every slot; keep Direct Debit.
+_SKIP_PAYMENT_METHODS = ("NON_DIRECT_DEBIT",)
+
+
+def family_name(family: str) -> str:
+    if family == CAP_FAMILY:
+        return CAP_NAME
+    return TARIFF_FAMILIES[family]["name"]
+
+
+def _rates_url(family: str, region: str) -> str:
+    return (
+        f"{OCTOPUS_API_BASE}/products/{product_code(family)}"
+        f"/electricity-tariffs/{tariff_code(family, region)}/standard-unit-rates/"
+    )
+
+
+def _epoch(value) -> float:
+    if value is None:
+        return np.inf
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def expand_to_slots(rates: Iterable[Dict], start: datetime, end: datetime) -> List[Dict]:
+    """
+    API rate rows of any length (half-hour, multi-hour, daily, open-ended)
+    → one API-shaped row per half-hour slot in [start, end) that a row covers.
+    Where rows overlap, the one that started last wins.
+    """
+    rows = [r for r in rates if r.get("payment_method") not in _SKIP_PAYMENT_METHODS]
+    if not rows:
+        return []
+    starts = np.array([_epoch(r["valid_from"]) for r in rows])
+    ends = np.array([_epoch(r.get("valid_to")) for r in rows])
+    values = np.array([float(r["value_inc_vat"]) for r in rows])
+    order = np.argsort(starts, kind="stable")
+    starts, ends, values = starts[order], ends[order], values[order]
+
+    lo, hi = int(start.timestamp()), int(end.timestamp())
+    slots = np.arange(lo - lo % SLOT_SECONDS, hi, SLOT_SECONDS, dtype=np.int64)
+    slots = slots[slots >= lo]
+    idx = np.searchsorted(starts, slots, side="right") - 1
+    ok = idx >= 0
+    ok[ok] = slots[ok] < ends[idx[ok]]
+
+    fmt = "%Y-%m-%dT%H:%M:%SZ"
+    return [
+        {
+            "valid_from": datetime.fromtimestamp(int(s), tz=timezone.utc).strftime(fmt),
+            "valid_to": datetime.fromtimestamp(int(s) + SLOT_SECONDS, tz=timezone.utc).strftime(fmt),
+            "value_inc_vat": float(v),
+        }
+        for s, v in zip(slots[ok], values[idx[ok]])
+    ]
+
+
+async def _fill_family(
+    client: httpx.AsyncClient,
+    store: AgileStore,
+    family: str,
+    region: str,
+    start: datetime,
+    end: datetime,
+) -> int:
+    """
+    Fetch and store the missing half-hours of one family (including slots
+    stored from a product the family has since moved off); returns new rows.
+    """
+    with span(f"tariff.{family}.{region}") as s:
+        added = 0
+        code = product_code(family)
+        try:
+            gaps = store.missing_intervals(
+                region, start, end, product=family, product_code=code, since=product_since(family)
+            )
+            s.set(gaps=len(gaps))
+            for gap_from, gap_to in gaps:
+                params = {"period_from": gap_from.isoformat(), "period_to": gap_to.isoformat()}
+                rates = await _get_all_pages(client, _rates_url(family, region), params)
+                added += store.append(
+                    region, expand_to_slots(rates, gap_from, gap_to), product=family, product_code=code
+                )
+        except Exception as e:
+            # keep whatever is stored; days still missing drop out of the comparison
+            print(f"[warn] {family_name(family)} region {region} fetch failed: {e}")
+            s.set(error=str(e))
+        s.set(new_rows=added)
+        return added
+
+
+async def ensure_tariff_rates_async(
+    client: httpx.AsyncClient,
+    store: AgileStore,
+    region: str,
+    start: datetime,
+    end: datetime,
+    families: Iterable[str] = TARIFF_FAMILIES,
+    concurrency: int = TARIFF_FETCH_CONCURRENCY,
+) -> Dict[str, int]:
+    """Make sure the store holds [start, end) for each family; returns {family: new rows}."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(family: str) -> int:
+        async with sem:
+            return await _fill_family(client, store, family, region, start, end)
+
+    families = [f for f in families if f != CAP_FAMILY]
+    added = await asyncio.gather(*(one(f) for f in families))
+    return dict(zip(families, added))
+
+
+# --- tensors ---
+
+
+def day_slot_mask(first: date, n_days: int) -> np.ndarray:
+    """(n_days, SLOTS_PER_DAY) bool: which slot columns exist on each UK-local day (46/48/50)."""
+    lengths = np.diff(uk_midnights(first, n_days)) // SLOT_SECONDS
+    return np.arange(SLOTS_PER_DAY)[None, :] < lengths[:, None]
+
+
+def cap_flat_rates(first: date, n_days: int, caps: Optional[Sequence[Dict]] = None) -> np.ndarray:
+    """(n_days,) cap electricity unit rate (p/kWh) in force each day; NaN outside known periods."""
+    history = CapHistory(caps if caps is not None else default_caps())
+    days = np.datetime64(first, "D") + np.arange(n_days)
+    return history.values_for_dates("electricity_unit_avg", days)
+
+
+def rate_tensor(
+    store: AgileStore,
+    region: str,
+    first: date,
+    n_days: int,
+    families: Sequence[str],
+    caps: Optional[Sequence[Dict]] = None,
+) -> np.ndarray:
+    """(families, n_days, SLOTS_PER_DAY) p/kWh; NaN where no rate is stored."""
+    out = np.full((len(families), n_days, SLOTS_PER_DAY), np.nan)
+    mask = day_slot_mask(first, n_days)
+    for i, family in enumerate(families):
+        if family == CAP_FAMILY:
+            out[i] = np.where(mask, cap_flat_rates(first, n_days, caps)[:, None], np.nan)
+        else:
+            out[i] = store_matrix(store, [region], first, n_days, product=family)[0]
+    return out
+
+
+def as_load(profile) -> np.ndarray:
+    """A daily shape (48|50,) or history (days, 48|50) → float array with a 50-slot last axis."""
+    load = np.asarray(profile, dtype=np.float64)
+    if load.ndim not in (1, 2) or load.shape[-1] > SLOTS_PER_DAY:
+        raise ValueError(f"load profile must be (slots,) or (days, slots) with <= {SLOTS_PER_DAY} slots")
+    pad = [(0, 0)] * (load.ndim - 1) + [(0, SLOTS_PER_DAY - load.shape[-1])]
+    return np.pad(load, pad)
+
+
+def day_costs(loads: np.ndarray, rates: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Pence per (profile, tariff, day).
+
+    loads is (P, 50) for daily shapes or (P, D, 50) for per-day history;
+    rates is (T, D, 50). Slots that do not exist on a day (the spring
+    clock change) carry no cost. A day is NaN for a tariff when any loaded
+    slot that exists on that day has no rate.
+    """
+    missing = np.isnan(rates) & mask[None]
+    filled = np.where(missing | ~mask[None], 0.0, np.nan_to_num(rates))
+    if loads.ndim == 2:
+        cost = np.einsum("ps,tds->ptd", loads, filled, optimize=True)
+        gaps = np.einsum("ps,tds->ptd", loads != 0, missing, optimize=True)
+    else:
+        if loads.shape[1] != rates.shape[1]:
+            raise ValueError(f"per-day loads cover {loads.shape[1]} days, rates cover {rates.shape[1]}")
+        cost = np.einsum("pds,tds->ptd", loads, filled, optimize=True)
+        gaps = np.einsum("pds,tds->ptd", loads != 0, missing, optimize=True)
+    return np.where(gaps > 0, np.nan, cost)
+
+
+# --- summaries and cache ---
+
+
+def profile_hash(load: np.ndarray) -> str:
+    h = hashlib.sha256()
+    h.update(str(load.shape).encode("ascii"))
+    h.update(np.ascontiguousarray(load, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def _cache_key(phash: str, region: str, first: date, n_days: int, families: Sequence[str], rates_digest: str) -> str:
+    payload = json.dumps(
+        [phash, region, first.isoformat(), n_days, list(families), rates_digest], separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(cache_dir: Path, key: str) -> Optional[Dict]:
+    path = cache_dir / f"{key}.json"
+    if not path.exists():
+        return None
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _cache_put(cache_dir: Path, key: str, result: Dict) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{key}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(result, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def summarize_costs(name: str, load: np.ndarray, costs: np.ndarray, mask: np.ndarray, families: Sequence[str]) -> Dict:
+    """One profile's (tariffs, days) pence → totals over the days every tariff can price."""
+    priced = np.isfinite(costs)
+    common = priced.all(axis=0)
+    kwh = float((load * mask).sum(axis=-1)[common].sum())
+
+    totals = np.where(common[None], costs, 0.0).sum(axis=1)
+    wins = np.zeros(len(families), dtype=int)
+    if common.any():
+        wins = np.bincount(np.argmin(costs[:, common], axis=0), minlength=len(families))
+
+    tariffs = {}
+    for i, family in enumerate(families):
+        tariffs[family] = {
+            "name": family_name(family),
+            "cost_gbp": round(float(totals[i]) / 100, 2) if common.any() else None,
+            "avg_p_per_kwh": round(float(totals[i]) / kwh, 3) if kwh else None,
+            "days_priced": int(priced[i].sum()),
+            "cheapest_days": int(wins[i]),
+        }
+    cheapest = families[int(np.argmin(totals))] if common.any() else None
+    return {
+        "profile": name,
+        "common_days": int(common.sum()),
+        "kwh": round(kwh, 2),
+        "cheapest": cheapest,
+        "tariffs": tariffs,
+    }
+
+
+def compare_profiles(
+    profiles: Dict[str, object],
+    store: AgileStore,
+    region: str,
+    first: date,
+    n_days: int,
+    families: Sequence[str] = (*TARIFF_FAMILIES, CAP_FAMILY),
+    caps: Optional[Sequence[Dict]] = None,
+    cache_dir: Optional[Path] = None,
+) -> Dict[str, Dict]:
+    """
+    {name: summary} for every profile over [first, first + n_days).
+    Cached profiles are returned as-is; the rest are priced in one batch.
+    """
+    cache_dir = cache_dir or runtime_path(COMPARE_CACHE_DIR)
+    families = list(families)
+    rates = rate_tensor(store, region, first, n_days, families, caps)
+    mask = day_slot_mask(first, n_days)
+    rates_digest = hashlib.sha256(rates.tobytes()).hexdigest()
+
+    results: Dict[str, Dict] = {}
+    todo: Dict[str, tuple] = {}
+    for name, profile in profiles.items():
+        load = as_load(profile)
+        key = _cache_key(profile_hash(load), region, first, n_days, families, rates_digest)
+        cached = _cache_get(cache_dir, key)
+        if cached is not None:
+            results[name] = {**cached, "profile": name}
+        else:
+            todo[name] = (load, key)
+
+    with span("tariff_compare", profiles=len(profiles), priced=len(todo), days=n_days, tariffs=len(families)):
+        for ndim in (1, 2):
+            batch = {n: v for n, v in todo.items() if v[0].ndim == ndim}
+            if not batch:
+                continue
+            loads = np.stack([load for load, _ in batch.values()])
+            costs = day_costs(loads, rates, mask)
+            for (name, (load, key)), c in zip(batch.items(), costs):
+                summary = summarize_costs(name, load, c, mask, families)
+                _cache_put(cache_dir, key, summary)
+                results[name] = summary
+
+    return {name: results[name] for name in profiles}
+
+
+# --- built-in profiles ---
+
+
+def default_profiles(annual_kwh: float = 2700.0) -> Dict[str, np.ndarray]:
+    """A few 48-slot daily shapes scaled to annual_kwh (the Ofgem medium TDCV)."""
+    hours = (np.arange(48) + 0.5) / 2
+    daily = annual_kwh / 365.0
+
+    flat = np.full(48, daily / 48)
+
+    # overnight base, morning bump, evening peak
+    shape = (
+        0.6
+        + 0.5 * np.exp(-((hours - 8.0) ** 2) / 2.0)
+        + 1.4 * np.exp(-((hours - 18.5) ** 2) / 4.0)
+    )
+    typical = shape / shape.sum() * daily
+
+    # typical household + ~7 kWh of EV charging between 00:30 and 04:30
+    ev = typical.copy()
+    ev[1:9] += 7.0 / 8
+
+    return {"flat": flat, "typical": typical, "ev_overnight": ev}
+
+
+def load_profiles(path: Path) -> Dict[str, np.ndarray]:
+    """{"name": [kWh per slot, ...] or [[...per day...], ...]} from a JSON file."""
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: as_load(values) for name, values in data.items()}
+
+
+async def _refresh(region: str, first: date, n_days: int, families: Sequence[str]) -> None:
+    start, _ = uk_day_bounds(first)
+    _, end = uk_day_bounds(first + timedelta(days=n_days - 1))
+    with AgileStore() as store:
+        async with make_async_client() as client:
+            await refresh_if_stale_async(client)
+            added = await ensure_tariff_rates_async(client, store, region, start, end, families)
+    for family, n in added.items():
+        print(f"[ok] {family_name(family)}: {n} new slots")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Price load profiles under each tariff family.")
+    parser.add_argument("--region", default=AGILE_DEFAULT_REGION)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days of history ending yesterday")
+    parser.add_argument("--families", default=",".join([*TARIFF_FAMILIES, CAP_FAMILY]),
+                        help="comma-separated family labels")
+    parser.add_argument("--profiles", type=Path, default=None, help="JSON {name: slots} (default: built-in shapes)")
+    parser.add_argument("--offline", action="store_true", help="use only rates already in the local store")
+    args = parser.parse_args(argv)
+
+    families = [f.strip().upper() for f in args.families.split(",") if f.strip()]
+    unknown = [f for f in families if f != CAP_FAMILY and f not in TARIFF_FAMILIES]
+    if unknown:
+        parser.error(f"unknown families: {', '.join(unknown)}")
+
+    today = datetime.now(zoneinfo.ZoneInfo(UK_TZ)).date()
+    first = today - timedelta(days=args.days)
+    if not args.offline:
+        asyncio.run(_refresh(args.region, first, args.days, families))
+
+    profiles = load_profiles(args.profiles) if args.profiles else default_profiles()
+    t0 = time.perf_counter()
+    with AgileStore() as store:
+        results = compare_profiles(profiles, store, args.region, first, args.days, families)
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    for name, r in results.items():
+        print(f"\n{name} · {r['kwh']:.0f} kWh over {r['common_days']} comparable days · cheapest: "
+              f"{family_name(r['cheapest']) if r['cheapest'] else 'n/a'}")
+        for t in r["tariffs"].values():
+            cost = f"£{t['cost_gbp']:,.2f}" if t["cost_gbp"] is not None else "n/a"
+            avg = f"{t['avg_p_per_kwh']:.2f} p/kWh" if t["avg_p_per_kwh"] is not None else ""
+            print(f"  {t['name']:<18} {cost:>10}  {avg:>12}  cheapest on {t['cheapest_days']} days")
+    print(f"\n[ok] compared {len(results)} profiles × {args.days} days × {len(families)} tariffs in {elapsed:.1f} ms")
+
+    write_json(COMPARE_PATH, {
+        "region": args.region,
+        "first": first.isoformat(),
+        "days": args.days,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "profiles": results,
+    }, ignore=RUN_STAMP_RE, indent=2, ensure_ascii=False)
+    print(f"[ok] wrote {COMPARE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Tiny compiled HTML templates for the generated report pages.
+
+Templates live in scripts/templates/ and use a deliberately small syntax:
+
+  {{ expr }}                 Python expression, HTML-escaped
+  {{! expr }}                Python expression, inserted as-is
+  {% if expr %} ... {% elif expr %} ... {% else %} ... {% end %}
+  {% for name in expr %} ... {% end %}
+
+Each template is compiled once into a Python function that writes its
+output through a callable (file.write, list.append, ...), so pages can be
+streamed straight to disk and a batch of pages reuses the same compiled
+code. Control tags on a line of their own do not leave blank lines.
+"""
+
+from __future__ import annotations
+
+import builtins
+import html
+import re
+import types
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Pattern, Tuple
+
+from .artifacts import open_atomic, output_path
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+_TOKEN_RE = re.compile(
+    r"(?m)^[ \t]*(\{%.*?%\})[ \t]*\n"   # statement alone on its line
+    r"|(\{%.*?%\})"                      # inline statement
+    r"|(\{\{.*?\}\})",                   # expression
+    re.DOTALL,
+)
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _escape(value) -> str:
+    return html.escape(str(value), quote=True)
+
+
+class Template:
+    """A template compiled to a Python function; render many times."""
+
+    def __init__(self, source: str, name: str = "<template>"):
+        self.name = name
+        self._code = compile(self._to_python(source), name, "exec")
+        module_ns: Dict = {}
+        exec(self._code, {"__builtins__": builtins}, module_ns)
+        self._func_code = module_ns["_render"].__code__
+
+    def _to_python(self, source: str) -> str:
+        lines = ["def _render(_w, _e):"]
+        depth = 1
+        stack = []
+        pos = 0
+
+        def emit(line: str) -> None:
+            lines.append("    " * depth + line)
+
+        def text(chunk: str) -> None:
+            if chunk:
+                emit(f"_w({chunk!r})")
+
+        for m in _TOKEN_RE.finditer(source):
+            text(source[pos:m.start()])
+            pos = m.end()
+            token = m.group(1) or m.group(2) or m.group(3)
+
+            if token.startswith("{{"):
+                expr = token[2:-2].strip()
+                if expr.startswith("!"):
+                    emit(f"_w(str({expr[1:].strip()}))")
+                else:
+                    emit(f"_w(_e({expr}))")
+                continue
+
+            stmt = token[2:-2].strip()
+            keyword = stmt.split(None, 1)[0] if stmt else ""
+            if keyword in ("if", "for"):
+                emit(stmt + ":")
+                stack.append(keyword)
+                depth += 1
+            elif keyword in ("elif", "else"):
+                if not stack or stack[-1] != "if":
+                    raise TemplateError(f"{self.name}: '{keyword}' without 'if'")
+                depth -= 1
+                emit(stmt + ":")
+                depth += 1
+            elif keyword == "end":
+                if not stack:
+                    raise TemplateError(f"{self.name}: unmatched 'end'")
+                stack.pop()
+                emit("pass")
+                depth -= 1
+            else:
+                raise TemplateError(f"{self.name}: unknown statement {token!r}")
+
+        text(source[pos:])
+        if stack:
+            raise TemplateError(f"{self.name}: unclosed '{stack[-1]}'")
+        emit("pass")
+        return "\n".join(lines)
+
+    def render_to(self, write: Callable[[str], object], context: Dict) -> None:
+        """Render with `context` names in scope, passing each fragment to write()."""
+        scope = dict(context)
+        scope["__builtins__"] = builtins
+        types.FunctionType(self._func_code, scope)(write, _escape)
+
+    def render(self, context: Dict) -> str:
+        parts: list = []
+        self.render_to(parts.append, context)
+        return "".join(parts)
+
+    def render_to_path(self, path: Path, context: Dict, ignore: Optional[Pattern[bytes]] = None) -> Path:
+        """
+        Stream to a temp file; replaces `path` atomically, and only if the
+        output changed. Returns the file written (see artifacts.output_path()).
+        """
+        with open_atomic(path, ignore=ignore) as f:
+            self.render_to(f.write, context)
+        return output_path(path)
+
+    def render_many(self, jobs: Iterable[Tuple[Path, Dict]]) -> int:
+        """Render a batch of (path, context) pairs with the same compiled template."""
+        count = 0
+        for path, context in jobs:
+            self.render_to_path(path, context)
+            count += 1
+        return count
+
+
+_CACHE: Dict[str, Tuple[float, Template]] = {}
+
+
+def load_template(name: str) -> Template:
+    """Compile scripts/templates/<name> once per process (recompiled if the file changes)."""
+    path = TEMPLATES_DIR / name
+    mtime = path.stat().st_mtime
+    cached = _CACHE.get(name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    template = Template(path.read_text(encoding="utf-8"), name)
+    _CACHE[name] = (mtime, template)
+    return template
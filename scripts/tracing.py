@@ -0,0 +1,169 @@
+"""
+Lightweight span tracing for the daily pipeline.
+
+    with span("fetch.ofgem") as s:
+        ...
+        s.add_bytes(len(body))
+
+    @traced("render.report")
+    def render(...): ...
+
+Spans nest through a ContextVar, so a span opened inside another (even in
+an asyncio task started from it) becomes its child. Each span records its
+wall-clock duration, a byte count (bytes downloaded, rendered or written)
+and optional attributes. Nothing is recorded when no trace is active.
+
+start_trace() opens the root span for a run; write_run_metrics() closes it
+and writes the tree to data/run_metrics.json for the dashboard:
+
+{
+  "generated_at_utc": "2025-11-14 06:00 UTC",
+  "total_s": 3.21,
+  "spans": [{"name": "fetch", "duration_s": 2.9, "bytes": 812345, "children": [...]}, ...]
+}
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .artifacts import write_json
+
+ROOT = Path(__file__).resolve().parent.parent
+RUN_METRICS_PATH = ROOT / "data" / "run_metrics.json"
+
+
+class Span:
+    __slots__ = ("name", "attrs", "children", "bytes", "_start", "duration_s")
+
+    def __init__(self, name: str, attrs: Optional[Dict] = None):
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.children: List["Span"] = []
+        self.bytes = 0
+        self._start = time.perf_counter()
+        self.duration_s: Optional[float] = None
+
+    def add_bytes(self, n: int) -> None:
+        self.bytes += int(n)
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def finish(self) -> None:
+        if self.duration_s is None:
+            self.duration_s = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict:
+        """Span tree as plain data; "bytes" includes the children's bytes."""
+        children = [c.to_dict() for c in self.children]
+        duration = self.duration_s if self.duration_s is not None else time.perf_counter() - self._start
+        d: Dict = {
+            "name": self.name,
+            "duration_s": round(duration, 4),
+            "bytes": self.bytes + sum(c["bytes"] for c in children),
+        }
+        if self.attrs:
+            d["attrs"] = self.attrs
+        if children:
+            d["children"] = children
+        return d
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("uked_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_bytes(n: int) -> None:
+    """Count bytes against the innermost open span (no-op outside a trace)."""
+    s = _current.get()
+    if s is not None:
+        s.add_bytes(n)
+
+
+class _NullSpan:
+    def add_bytes(self, n: int) -> None:
+        pass
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """Time a block as a child of the current span."""
+    parent = _current.get()
+    if parent is None:
+        yield _NULL_SPAN  # type: ignore[misc]
+        return
+    s = Span(name, attrs)
+    parent.children.append(s)
+    token = _current.set(s)
+    try:
+        yield s
+    finally:
+        s.finish()
+        _current.reset(token)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator form of span(); works on plain and async functions."""
+
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def start_trace(name: str = "run") -> Span:
+    """Open the root span for a run; spans opened afterwards in this context attach to it."""
+    root = Span(name)
+    _current.set(root)
+    return root
+
+
+def end_trace(root: Span) -> Dict:
+    root.finish()
+    if _current.get() is root:
+        _current.set(None)
+    d = root.to_dict()
+    return {
+        "generated_at_utc": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
+        "total_s": d["duration_s"],
+        "bytes": d["bytes"],
+        "spans": d.get("children", []),
+    }
+
+
+def write_run_metrics(root: Span, path: Path = RUN_METRICS_PATH) -> Dict:
+    metrics = end_trace(root)
+    # timings differ on every run: written, but not counted as a change
+    write_json(path, metrics, volatile=True, indent=2)
+    print(f"[ok] wrote {path} ({metrics['total_s']:.2f}s total)")
+    return metrics